@@ -0,0 +1,239 @@
+import os.path
+import numpy as np  # type: ignore
+from collections.abc import Mapping
+from typing import Iterator, Tuple
+
+
+class AliasTables:
+    """Many alias tables packed into flat arrays, for drawing from many small discrete distributions.
+
+    Table i holds the entries offsets[i]:offsets[i + 1] of j and q, so looking up a table is offset arithmetic and
+    the tables of a whole graph take two contiguous arrays instead of a pair of small arrays per table. Drawing from
+    table i picks a uniform entry kk of the table, and returns kk with probability q[kk] and j[kk] otherwise. The
+    arrays can be saved and memory-mapped, so that processes share one read-only copy.
+
+    Attributes:
+        offsets: A numpy int64 array with length the number of tables + 1, with the start of each table in j and q.
+        j: A numpy int32 array with the alias of each entry, as an index within its table.
+        q: A numpy float32 array with the probability of each entry to keep itself instead of its alias.
+    """
+
+    def __init__(self, offsets: np.ndarray, j: np.ndarray, q: np.ndarray):
+        self.offsets = offsets
+        self.j = j
+        self.q = q
+
+    @classmethod
+    def empty(cls, offsets: np.ndarray) -> 'AliasTables':
+        """Allocates tables with the given offsets, to be filled in with set_table.
+
+        Args:
+            offsets: An integer array with length the number of tables + 1, with the start of each table.
+
+        Returns:
+            AliasTables with all entries zero.
+        """
+
+        size = int(offsets[-1]) if len(offsets) else 0
+        return cls(np.asarray(offsets, dtype=np.int64), np.zeros(size, dtype=np.int32),
+                   np.zeros(size, dtype=np.float32))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def table(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Gets the j and q arrays of table i, as views of the flat arrays."""
+
+        start, stop = self.offsets[i], self.offsets[i + 1]
+        return self.j[start:stop], self.q[start:stop]
+
+    def set_table(self, i: int, j: np.ndarray, q: np.ndarray) -> None:
+        """Copies the j and q arrays of table i into the flat arrays."""
+
+        start, stop = self.offsets[i], self.offsets[i + 1]
+        self.j[start:stop] = j
+        self.q[start:stop] = q
+
+    def draw(self, i: int) -> int:
+        """Draws an entry of table i.
+
+        Args:
+            i: The index of the table.
+
+        Returns:
+            The index of the drawn entry within its table.
+        """
+
+        start = self.offsets[i]
+        kk = int(np.random.rand() * (self.offsets[i + 1] - start))
+
+        return kk if np.random.rand() < self.q[start + kk] else int(self.j[start + kk])
+
+    def draw_batch(self, i: np.ndarray) -> np.ndarray:
+        """Draws an entry of many tables at once, with the random numbers of all draws drawn together.
+
+        Args:
+            i: An integer array with the index of the table of each draw, whose tables must not be empty.
+
+        Returns:
+            A numpy int64 array with the index of the drawn entry of each draw within its table.
+        """
+
+        start = self.offsets[i]
+        entry_rand, keep_rand = np.random.rand(2, len(start))
+        kk = start + (entry_rand * (self.offsets[np.asarray(i) + 1] - start)).astype(np.int64)
+
+        return np.where(keep_rand < self.q[kk], kk - start, self.j[kk])
+
+    def nbytes(self) -> int:
+        """Returns the number of bytes of the arrays of the tables."""
+
+        return self.offsets.nbytes + self.j.nbytes + self.q.nbytes
+
+    def save(self, path: str) -> None:
+        """Writes the arrays of the tables to .npy files in a directory, which AliasTables.load reads.
+
+        Args:
+            path: The path of the directory, which is created if it does not exist.
+        """
+
+        os.makedirs(path, exist_ok=True)
+        for name in ('offsets', 'j', 'q'):
+            np.save(os.path.join(path, name + '.npy'), getattr(self, name))
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'AliasTables':
+        """Reads tables written by AliasTables.save.
+
+        Args:
+            path: The path of the directory written by AliasTables.save.
+            mmap: If True, the arrays are memory-mapped read-only instead of read into memory.
+
+        Returns:
+            The AliasTables stored in the directory.
+
+        Raises:
+            ValueError: If the directory cannot be found.
+        """
+
+        if not os.path.isdir(path):
+            raise ValueError('Could not find alias table directory {}'.format(path))
+
+        return cls(*(np.load(os.path.join(path, name + '.npy'), mmap_mode='r' if mmap else None)
+                     for name in ('offsets', 'j', 'q')))
+
+
+def build_alias_tables(offsets: np.ndarray, probs: np.ndarray) -> AliasTables:
+    """Builds the alias tables of many discrete distributions at once, with vectorized numpy operations only.
+
+    This is the sweep form of Vose's alias method. Within each table, every entry has the scaled probability
+    s = size * probability, and is small if s < 1 and large otherwise. The deficits 1 - s of the small entries are
+    laid end to end on a line, and so are the surpluses s - 1 of the large entries, which add up to the same length.
+    Each small entry takes the rest of its cell from the large entry whose surplus covers the start of its deficit.
+    A large entry that gives away more than its surplus fills the overshoot of its own cell from the next large
+    entry, which is the one whose surplus starts where its own ends. The cumulative sums of all tables are computed
+    together, and every binary search is clipped to the entries of its own table.
+
+    Args:
+        offsets: An integer array with length the number of tables + 1, with the start of each table in probs.
+        probs: A float array with the probability of each entry, which only has to be proportional to the
+            probabilities within each table. A table whose probabilities are all zero becomes uniform.
+
+    Returns:
+        AliasTables with the given offsets.
+    """
+
+    offsets = np.asarray(offsets, dtype=np.int64)
+    probs = np.asarray(probs, dtype=np.float64)
+    table_count = len(offsets) - 1
+    sizes = np.diff(offsets)
+    table = np.repeat(np.arange(table_count), sizes)
+    local = np.arange(len(probs)) - offsets[table]
+
+    totals = np.bincount(table, weights=probs, minlength=table_count)
+    scaled = np.ones(len(probs))
+    nonzero = totals[table] > 0
+    scaled[nonzero] = probs[nonzero] * sizes[table[nonzero]] / totals[table[nonzero]]
+
+    # entries within rounding error of 1 are large, so every table with a small entry has a large one
+    small = np.flatnonzero(scaled < 1 - 1e-9)
+    large = np.flatnonzero(scaled >= 1 - 1e-9)
+    small_table, large_table = table[small], table[large]
+    small_bounds = np.concatenate([[0], np.cumsum(np.bincount(small_table, minlength=table_count))])
+    large_bounds = np.concatenate([[0], np.cumsum(np.bincount(large_table, minlength=table_count))])
+
+    # the deficits and surpluses laid end to end, with each table starting at the same point on both lines; the
+    # starts are taken from the same cumulative sums as the ends, and the surpluses are cut at the end of the deficits
+    # of their table, so that boundaries compare exactly and both lines stay sorted despite rounding errors
+    deficit_line = np.concatenate([[0], np.cumsum(1 - scaled[small])])
+    deficit_starts, deficit_ends = deficit_line[:-1], deficit_line[1:]
+    surplus_line = np.concatenate([[0], np.cumsum(np.maximum(scaled[large] - 1, 0))])
+    surplus_ends = np.minimum(surplus_line[1:] - surplus_line[large_bounds[large_table]] +
+                              deficit_line[small_bounds[large_table]], deficit_line[small_bounds[large_table + 1]])
+
+    j = local.astype(np.int32)
+    q = np.ones(len(probs))
+
+    # a small entry keeps its own probability and takes the rest from the large entry covering its start
+    donor = np.clip(np.searchsorted(surplus_ends, deficit_starts, side='right'),
+                    large_bounds[small_table], large_bounds[small_table + 1] - 1)
+    q[small] = scaled[small]
+    j[small] = local[large[donor]]
+
+    # a large entry keeps all but its overshoot, the part of the small entry covering the end of its surplus that is
+    # past that end, and takes the overshoot from the next large entry of its table
+    if len(small):
+        covering = np.clip(np.searchsorted(deficit_ends, surplus_ends, side='left'),
+                           small_bounds[large_table], np.maximum(small_bounds[large_table + 1] - 1, 0))
+        covering = np.minimum(covering, len(small) - 1)
+        covered = (small_bounds[large_table + 1] > small_bounds[large_table]) & \
+            (deficit_starts[covering] < surplus_ends)
+        q[large] = np.clip(1 - np.where(covered, deficit_ends[covering] - surplus_ends, 0), 0, 1)
+    next_large = np.arange(1, len(large) + 1)
+    last = next_large == large_bounds[large_table + 1]
+    j[large] = np.where(last, local[large], local[large[np.minimum(next_large, len(large) - 1)]])
+
+    return AliasTables(offsets, j, q.astype(np.float32))
+
+
+class AliasTableMap(Mapping):
+    """Read-only map from the nodes or edges of a graph to their (j, q) alias tables, backed by AliasTables.
+
+    The keys are node indices for the tables of nodes, and (source, destination) pairs of node indices for the
+    tables of edges, whose table index is the position of the edge in edge_to.
+
+    Attributes:
+        tables: The AliasTables, or None if there are none.
+        graph: The CSFGraph of the tables.
+        edges: True if the tables are indexed by edge, False if they are indexed by node.
+    """
+
+    def __init__(self, tables, graph, edges: bool = False):
+        self.tables = tables
+        self.graph = graph
+        self.edges = edges
+
+    def __getitem__(self, key) -> Tuple[np.ndarray, np.ndarray]:
+        if self.tables is None:
+            raise KeyError(key)
+        if self.edges:
+            i = self.graph.edge_index(*key)
+            if i is None:
+                raise KeyError(key)
+        else:
+            i = key
+            if not 0 <= i < len(self.tables):
+                raise KeyError(key)
+
+        return self.tables.table(i)
+
+    def __len__(self) -> int:
+        return 0 if self.tables is None else len(self.tables)
+
+    def __iter__(self) -> Iterator:
+        if self.tables is None:
+            return iter(())
+        if self.edges:
+            return iter(self.graph.edges_as_ints())
+
+        return iter(range(len(self.tables)))
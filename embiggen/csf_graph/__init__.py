@@ -1,3 +1,7 @@
 from .csf_graph import CSFGraph
+from .edge_list import EdgeList
+from .edge_splitter import EdgeSplit, split_edges
+from .graph_loader import load_graphs
+from .graph_report import graph_report, write_graph_report
 
-__all__ = ["CSFGraph"]
+__all__ = ["CSFGraph", "EdgeList", "EdgeSplit", "split_edges", "load_graphs", "graph_report", "write_graph_report"]
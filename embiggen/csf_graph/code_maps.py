@@ -0,0 +1,53 @@
+import numpy as np  # type: ignore
+from collections.abc import Mapping
+from typing import Iterator, List, Sequence
+
+
+class IndexToLabelMap(Mapping):
+    """Read-only map from an integer index to a label, backed by an array of label codes. No entry is stored per
+    index; labels are looked up when they are accessed.
+
+    Attributes:
+        codes: A numpy array where the item at each index is the code of the label of that index.
+        labels: A sequence of labels, indexed by code.
+    """
+
+    def __init__(self, codes: np.ndarray, labels: Sequence[str]):
+        self.codes = codes
+        self.labels = labels
+
+    def __getitem__(self, index: int) -> str:
+        if not 0 <= index < len(self.codes):
+            raise KeyError(index)
+
+        return self.labels[self.codes[index]]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self.codes)))
+
+
+class LabelToIndicesMap(Mapping):
+    """Read-only map from a label to the list of indices with that label, backed by an array of label codes. The
+    list of indices of a label is computed when it is accessed.
+
+    Attributes:
+        codes: A numpy array where the item at each index is the code of the label of that index.
+        labels: A sequence of labels, indexed by code.
+    """
+
+    def __init__(self, codes: np.ndarray, labels: Sequence[str]):
+        self.codes = codes
+        self.labels = labels
+        self._label_to_code = {label: code for code, label in enumerate(labels)}
+
+    def __getitem__(self, label: str) -> List[int]:
+        return np.flatnonzero(self.codes == self._label_to_code[label]).tolist()
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.labels)
@@ -1,10 +1,19 @@
+import json
 import logging
 import os.path
+from itertools import islice
 import numpy as np  # type: ignore
 from collections import defaultdict
-from typing import Optional, Any, Union, Set, Dict, List, Tuple
+from collections.abc import Mapping
+from typing import Optional, Union, Dict, Iterable, Iterator, List, Sequence, Tuple
 
-from embiggen.csf_graph.edge import Edge
+from embiggen.csf_graph.code_maps import IndexToLabelMap, LabelToIndicesMap
+from embiggen.csf_graph.components import connected_components
+from embiggen.csf_graph.node_order import bfs_order, degree_order
+from embiggen.csf_graph.node_vocabulary import IndexToNodeMap, NodeVocabulary
+from embiggen.csf_graph.csr_builder import build_csr, build_symmetric_csr, code_dtype, encode_by_first_occurrence, \
+    merge_duplicate_edges, sort_vocabulary
+from embiggen.utils.file_utils import open_text
 
 
 class CSFGraphNoSubjectColumnError(Exception):
@@ -15,6 +24,10 @@ class CSFGraphNoObjectColumnError(Exception):
     pass
 
 
+class CSFGraphDuplicateEdgeError(Exception):
+    pass
+
+
 class CSFGraph:
     """Class converts data in to a compressed storage format graph.
 
@@ -31,34 +44,159 @@ class CSFGraph:
             the keys are strings which represent a node type (i.e. a string that is comprised of the first character
             of a node) and values are integers, which represent the count of the node type. For example:
                 {'d': 3, 'g': 4, 'p': 4}
-        node_to_index_map: A dictionary where keys contain node labels and values contain the integer index of each
-            node from the sorted list of unique nodes in the graph.
-        index_to_node_map: A dictionary where keys contain the integer index of each node from the sorted list of
-            unique nodes in the graph and values contain node labels.
-        nodetype_to_index_map: A dictionary where keys contain node type and values contain the integer index of each
-            node from the sorted list of unique nodes in the graph.
-        index_to_nodetype_map: A dictionary where keys contain the integer index of each node from the sorted list of
-            unique nodes in the graph and values contain node types.
+        node_vocabulary: A NodeVocabulary holding the node labels in a numpy array, indexed by the integer index of
+            each node from the sorted list of unique nodes in the graph. Nodes added later by add_edges get the
+            indices after the existing nodes, and reorder_nodes renumbers the nodes in another order.
+        node_to_index_map: A read-only mapping where keys contain node labels and values contain the integer index of
+            each node. It is node_vocabulary itself, so looking up a missing node raises a KeyError.
+        index_to_node_map: A read-only mapping where keys contain the integer index of each node and values contain
+            node labels. It is computed from node_vocabulary.
+        node_types: A list of the node types in the graph, in the order in which they are first assigned to a node.
+        node_type_codes: A numpy array with length the number of unique nodes. The value stored at each node's index
+            is the index of the node's type in node_types, using the smallest unsigned integer type that fits.
+        edge_types: A list of the edge types in the graph, in the order in which they first occur in edge_to.
+        edge_type_codes: A numpy array with length the number of edges, aligned with edge_to. Each value is the index
+            of the edge's type in edge_types.
+        nodetype_to_index_map: A read-only mapping where keys contain node type and values contain the integer index
+            of each node from the sorted list of unique nodes in the graph. It is computed from node_type_codes.
+        index_to_nodetype_map: A read-only mapping where keys contain the integer index of each node from the sorted
+            list of unique nodes in the graph and values contain node types. It is computed from node_type_codes.
+        edgetype_to_index_map: A read-only mapping where keys contain edge type and values contain the integer index
+            of each edge with that type. It is computed from edge_type_codes.
+        index_to_edgetype_map: A read-only mapping where keys contain the integer index of each edge and values
+            contain edge types. It is computed from edge_type_codes.
         edge_to: A numpy array with length the number of edges. Each index in the array contains the index of an edge,
             such that it can be used to look up the destination nodes that an edge in a given index points to.
         edge_weight: A numpy array with length the number of edges. Each item in the array represents an edge's index
-            and each value in the array contains an edge weight.
+            and each value in the array contains an edge weight. It is None if the graph was read with
+            weight_dtype='unweighted', in which case every edge has weight 1.
         offset_to_edge_: A numpy array with length the number of unique nodes +1. Each index in the array represents a
             node and the value stored at each node's index is the total number of edges coming out of that node.
+        degrees: A read-only numpy int32 array with the degree of each node, computed from offset_to_edge_ when it is
+            first used.
+        duplicate_edge_count: The number of rows of the edge file that repeat an edge of an earlier row (in either
+            direction), which are merged into that edge following duplicate_policy. It is None for a graph that is not
+            read from an edge file, such as a subgraph.
+        self_loop_count: The number of rows of the edge file with the same source and destination node, which are
+            dropped from the graph unless keep_self_loops is True. It is None for a graph that is not read from an
+            edge file.
+        node_file_only_count: The number of nodes of the node file that have no edge in the edge file, and are
+            therefore not in the graph. It is None if the graph was read without a node file.
+        missing_node_type_count: The number of nodes of the graph that are not in the node file, and get
+            default_node_type. It is None if the graph was read without a node file.
+        directed: False if every edge is stored together with its inverse, True if only the direction given in the
+            edge file is stored. In a directed graph, neighbors are out-neighbors and degrees are out-degrees, and
+            in_neighbors_view and in_degrees give the other direction from a reverse compressed storage format graph
+            that is built the first time it is needed.
+
+    Args:
+        edge_file: The path of the file with the edges of the graph. The file may be compressed with gzip, bz2, xz
+            or zstd, in which case it is decompressed while it is read.
+        node_file: The path of an optional file with the node types of the nodes of the graph, which may also be
+            compressed.
+        default_weight: The weight assigned to edges if the edge file has no weight column.
+        chunk_size: The number of rows of the edge file that are parsed at once.
+        weight_dtype: The numpy type in which edge weights are stored ('float64', 'float32' or 'float16'), or
+            'unweighted' to ignore the weights and not store edge_weight at all.
+        duplicate_policy: What to do with rows that repeat an edge of an earlier row (in either direction): 'first'
+            keeps the weight and edge type of the first row, 'sum' adds up the weights of all rows, 'max' keeps the
+            largest weight and 'error' raises a CSFGraphDuplicateEdgeError. The edge type of the first row is kept.
+        keep_self_loops: If False, rows with the same source and destination node are dropped.
+        directed: If True, only the given direction of each edge is stored, and the rows (a, b) and (b, a) are
+            different edges. Use it for graphs where direction matters, or for edge files that already list both
+            directions of every edge.
 
     Raises:
+        - ValueError: If weight_dtype or duplicate_policy is not supported.
+        - CSFGraphDuplicateEdgeError: If duplicate_policy is 'error' and a row repeats an edge of an earlier row.
         - TypeError: If the filepath attribute is empty.
         - TypeError: If the filepath attribute must be type str.
         - ValueError: If the file referenced by filepath cannot be found.
     """
 
-    def __init__(self, edge_file: str, node_file: str = None, default_weight=1):
+    WEIGHT_DTYPES = ('float64', 'float32', 'float16', 'unweighted')
+    DUPLICATE_POLICIES = ('first', 'sum', 'max', 'error')
+    ORDERS = ('degree', 'bfs', 'rcm')
+
+    def __init__(self, edge_file: str, node_file: str = None, default_weight=1, chunk_size: int = 100000,
+                 weight_dtype: str = 'float32', duplicate_policy: str = 'first', keep_self_loops: bool = True,
+                 directed: bool = False):
         if not os.path.exists(edge_file):
             raise ValueError('Could not find edge file {}'.format(edge_file))
+        if weight_dtype not in self.WEIGHT_DTYPES:
+            raise ValueError('weight_dtype must be one of {}, not {}'.format(', '.join(self.WEIGHT_DTYPES),
+                                                                             weight_dtype))
+        if duplicate_policy not in self.DUPLICATE_POLICIES:
+            raise ValueError('duplicate_policy must be one of {}, not {}'.format(', '.join(self.DUPLICATE_POLICIES),
+                                                                                 duplicate_policy))
+
+        self._init_attributes()
+        self.directed = directed
+        weighted = weight_dtype != 'unweighted'
+
+        # read in and process edge data in chunks, interning node ids and edge types as integer codes
+        header_info = self.parse_header(edge_file)
+        node_labels, source_codes, dest_codes, weights, edge_type_labels, edge_type_codes = \
+            self.read_edge_columns(edge_file, header_info, default_weight, chunk_size, parse_weights=weighted)
+
+        self_loops = source_codes == dest_codes
+        self.self_loop_count = int(np.count_nonzero(self_loops))
+        if not keep_self_loops and self.self_loop_count:
+            source_codes, dest_codes = source_codes[~self_loops], dest_codes[~self_loops]
+            edge_type_codes = edge_type_codes[~self_loops]
+            weights = None if weights is None else weights[~self_loops]
+
+        # add the count of each edge type to dictionary, in the order in which edge types occur in the file
+        edge_type_counts = np.bincount(edge_type_codes, minlength=len(edge_type_labels))
+        for edge_type, count in zip(edge_type_labels, edge_type_counts.tolist()):
+            self.edgetype2count_dictionary[edge_type] += count
+
+        # re-index node ids by the alphabetically-sorted list of unique nodes
+        node_list, node_rank = sort_vocabulary(node_labels)
+        source_codes, dest_codes = node_rank[source_codes], node_rank[dest_codes]
+        edge_type_list, edge_type_rank = sort_vocabulary(edge_type_labels)
+        edge_type_codes = edge_type_rank[edge_type_codes]
+        total_vertex_count = len(node_list)
+
+        # merge the rows that repeat the edge of an earlier row into the first row of the edge
+        rows, weights = merge_duplicate_edges(source_codes, dest_codes, total_vertex_count, weights,
+                                              policy=duplicate_policy, directed=directed)
+        self.duplicate_edge_count = len(source_codes) - len(rows)
+        if self.duplicate_edge_count and duplicate_policy == 'error':
+            duplicate = np.flatnonzero(~np.isin(np.arange(len(source_codes)), rows))[0]
+            raise CSFGraphDuplicateEdgeError('Edge file {} has {} rows that repeat an earlier edge, the first one '
+                                             'is {} - {}'.format(edge_file, self.duplicate_edge_count,
+                                                                 node_list[source_codes[duplicate]],
+                                                                 node_list[dest_codes[duplicate]]))
+        source_codes, dest_codes, edge_type_codes = source_codes[rows], dest_codes[rows], edge_type_codes[rows]
+        logging.info('Merged {} duplicate rows into earlier edges ({}) and {} {} self-loop rows'.format(
+            self.duplicate_edge_count, duplicate_policy, 'kept' if keep_self_loops else 'dropped',
+            self.self_loop_count))
+
+        # create node vocabulary and assign the node types of the node file (in category col by default)
+        self.node_vocabulary = NodeVocabulary(node_list)
+        if node_file:
+            self._assign_node_types(node_file, *self.read_node_columns(node_file, chunk_size=chunk_size))
+        else:
+            self.node_types, self.node_type_codes = encode_by_first_occurrence(
+                np.zeros(total_vertex_count, dtype=np.int64), [self.default_node_type])
+        self._count_node_types()
+
+        # create the graph - unless it is directed, every edge is stored together with its inverse, sorted on source
+        # and destination
+        build = build_csr if directed else build_symmetric_csr
+        if weighted:
+            self.offset_to_edge_, self.edge_to, edge_type_codes, edge_weight = build(
+                source_codes, dest_codes, total_vertex_count, edge_type_codes, weights)
+            self.edge_weight = edge_weight.astype(weight_dtype)
+        else:
+            self.offset_to_edge_, self.edge_to, edge_type_codes = build(
+                source_codes, dest_codes, total_vertex_count, edge_type_codes)
+        self.edge_types, self.edge_type_codes = encode_by_first_occurrence(edge_type_codes, edge_type_list)
+        self._set_read_only()
 
-        # create variables to store node and edge information
-        nodes: Set[Union[int, str]] = set()
-        edges: Set[Edge] = set()
+    def _init_attributes(self) -> None:
+        """Sets the column names, default types and empty dictionaries of the graph."""
 
         self.subject_column_name = 'subject'
         self.object_column_name = 'object'
@@ -71,129 +209,536 @@ class CSFGraph:
 
         self.edgetype2count_dictionary: Dict[str, int] = defaultdict(int)
         self.nodetype2count_dictionary: Dict[str, int] = defaultdict(int)
-        self.node_to_index_map:  Dict[str, int] = defaultdict(int)
-        self.index_to_node_map:  Dict[int, str] = defaultdict(str)
-        self.nodetype_to_index_map:  Dict[str, list] = defaultdict(list)
-        self.index_to_nodetype_map:  Dict[int, str] = defaultdict(str)
-        self.edgetype_to_index_map:  Dict[str, list] = defaultdict(list)
-        self.index_to_edgetype_map:  Dict[int, str] = defaultdict(str)
-
-        # read in and process edge data, creating a dictionary that stores edge information
-        header_info = self.parse_header(edge_file)
-        with open(edge_file) as f:
-            if not header_info['is_legacy']:  # legacy edge files don't have headers
-                _ = f.readline()  # throw away header
+        self.node_vocabulary = NodeVocabulary()
+        self.node_types: List[str] = []
+        self.node_type_codes: np.ndarray = np.zeros(0, dtype=np.uint8)
+        self.edge_types: List[str] = []
+        self.edge_type_codes: np.ndarray = np.zeros(0, dtype=np.uint8)
+        self.edge_weight: Optional[np.ndarray] = None
+        self.directed = False
+        self._added_edges: List[Tuple[str, str, float, str]] = []
+        self._removed_edges: List[Tuple[str, str]] = []
+        self._new_node_types: Dict[str, str] = {}
+        self._degrees: Optional[np.ndarray] = None
+        self._reverse_csr: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self.duplicate_edge_count: Optional[int] = None
+        self.self_loop_count: Optional[int] = None
+        self.node_file_only_count: Optional[int] = None
+        self.missing_node_type_count: Optional[int] = None
+
+    def _set_read_only(self) -> None:
+        """Marks the graph arrays as read-only, so that slices of them can be handed out as views."""
+
+        for array in (self.offset_to_edge_, self.edge_to, self.edge_weight, self.edge_type_codes):
+            if array is not None:
+                array.flags.writeable = False
+
+    @property
+    def degrees(self) -> np.ndarray:
+        """A read-only numpy int32 array with the degree (number of neighbors) of each node, indexed by node index.
+        For a directed graph, this is the out-degree. It is computed from offset_to_edge_ the first time it is used."""
+
+        if self._degrees is None:
+            self._degrees = np.diff(self.offset_to_edge_).astype(np.int32)
+            self._degrees.flags.writeable = False
+
+        return self._degrees
+
+    @property
+    def in_degrees(self) -> np.ndarray:
+        """A read-only numpy int32 array with the number of edges to each node, indexed by node index. For an
+        undirected graph, this is degrees."""
+
+        if not self.directed:
+            return self.degrees
+
+        in_degrees = np.diff(self._get_reverse_csr()[0]).astype(np.int32)
+        in_degrees.flags.writeable = False
+
+        return in_degrees
+
+    def _get_reverse_csr(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the offsets and the sorted source nodes of the edges to each node, building them from the graph
+        arrays the first time they are needed."""
+
+        if self._reverse_csr is None:
+            # the edges are sorted on source, so a stable sort on destination keeps the sources of each node sorted
+            order = np.argsort(self.edge_to, kind='stable')
+            reverse_offsets = np.zeros(self.node_count() + 1, dtype=self.offset_to_edge_.dtype)
+            np.cumsum(np.bincount(self.edge_to, minlength=self.node_count()), out=reverse_offsets[1:])
+            reverse_sources = self._edge_sources()[order].astype(self.edge_to.dtype)
+            for array in (reverse_offsets, reverse_sources):
+                array.flags.writeable = False
+            self._reverse_csr = reverse_offsets, reverse_sources
+
+        return self._reverse_csr
+
+    def _edge_sources(self) -> np.ndarray:
+        """Returns a numpy int64 array with the source node of each edge in edge_to."""
+
+        return np.repeat(np.arange(self.node_count(), dtype=np.int64), self.degrees)
+
+    def weighted_degrees(self) -> np.ndarray:
+        """Computes the weighted degree (sum of the weights of the edges) of each node.
 
-            for line in f:
-                fields = line.rstrip('\n').split()
-                items = dict(zip(header_info['header_items'], fields))
-                node_a = items[self.subject_column_name]
-                node_b = items[self.object_column_name]
-                if self.edge_label_column_name in items:
-                    edge_type = items[self.edge_label_column_name]
-                else:
-                    edge_type = self.default_edge_type
+        Returns:
+            A numpy float64 array with the weighted degree of each node, indexed by node index. For an unweighted
+            graph, this is the degree of each node.
+        """
 
-                if self.weight_column_name not in items:
-                    # no weight provided. Assign a default value
-                    weight = default_weight
-                else:
-                    try:
-                        weight = float(items[self.weight_column_name])
-                    except ValueError as e:
-                        logging.error(" Could not parse weight field " +
-                                      "(must be an integer): {}".format(
-                                          items[self.weight_column_name]))
-                # add nodes
-                nodes.add(node_a)
-                nodes.add(node_b)
-
-                # process edges y initializing instances of each edge and it's inverse
-                edge = Edge(node_a, node_b, weight, edge_type)
-                inverse_edge = Edge(node_b, node_a, weight, edge_type)
-                edges.add(edge)
-                edges.add(inverse_edge)
-
-                # add the string representation of the edge to dictionary
-                self.edgetype2count_dictionary[edge_type] += 1
-
-        # convert node sets to numpy arrays, sorted alphabetically on on their source element
-        node_list: List = sorted(nodes)
-
-        # read in nodes tsv with node type info (in category col by default)
-        id_to_nodetype: Optional[Dict[str, str]] = \
-            self.read_nodetype_from_node_tsv(node_file=node_file,
-                                             id_col=self.node_id_col_name,
-                                             cat_col=self.node_type_col_name)
-
-        # create node data dictionaries
-        for i in range(len(node_list)):
-            # assign node type
-            self.assign_node_type(i, node_list[i], id_to_nodetype)
-
-            self.node_to_index_map[node_list[i]] = i
-            self.index_to_node_map[i] = node_list[i]
-
-        # initialize edge arrays - convert edge sets to numpy arrays, sorted alphabetically on on their source element
-        edge_list: List = sorted(edges)
-        total_edge_count = len(edge_list)
-        total_vertex_count = len(node_list)
+        if not self.is_weighted():
+            return self.degrees.astype(np.float64)
 
-        # create edge type dictionaries
-        for i in range(len(edge_list)):  # type: ignore
-            this_type = edge_list[i].edge_type  # type: ignore
-            if this_type not in self.edgetype_to_index_map:
-                self.edgetype_to_index_map[this_type] = []
-            self.edgetype_to_index_map[this_type].append(i)  # type: ignore
-            self.index_to_edgetype_map[i] = this_type  # type: ignore
-
-        self.edge_to: np.ndarray = np.zeros(total_edge_count, dtype=np.int32)
-        self.edge_weight: np.ndarray = np.zeros(
-            total_edge_count, dtype=np.int32)
-        # self.proportion_of_different_neighbors = np.zeros(total_vertex_count, dtype=np.float32)
-        self.offset_to_edge_: np.ndarray = np.zeros(
-            total_vertex_count + 1, dtype=np.int32)
-
-        # create the graph - this done in three steps
-        # step 1: count # of edges emanating from each source id
-        index2edge_count: Dict[int, int] = defaultdict(int)
-
-        for edge in edge_list:
-            source_index = self.node_to_index_map[edge.node_a]
-            index2edge_count[source_index] += 1
-
-        # step 2: set the offset_to_edge_ according to the number of edges emanating from each source ids
-        self.offset_to_edge_[0], offset, i = 0, 0, 0
-
-        for n in node_list:
-            node_type = self.index_to_nodetype_map[self.node_to_index_map[n]]
-            self.nodetype2count_dictionary[node_type] += 1
-            source_index = self.node_to_index_map[n]
-            # n_edges can be zero here
-            n_edges = index2edge_count[source_index]
-            i += 1
-            offset += n_edges
-            self.offset_to_edge_[i] = offset
-
-        # step 3: add the actual edges
-        current_source_index = -1
-        j, offset = 0, 0
-
-        # use the offset variable to keep track of how many edges we have already entered for a given source index
-        for edge in edge_list:
-            source_index = self.node_to_index_map[edge.node_a]
-            dest_index = self.node_to_index_map[edge.node_b]
-
-            if source_index != current_source_index:
-                current_source_index = source_index
-                offset = 0  # start a new block
-            else:
-                # go to next index (for a new destination of the previous source)
-                offset += 1
+        return np.bincount(self._edge_sources(), weights=self.edge_weight, minlength=self.node_count())
+
+    def edge_type_degrees(self) -> np.ndarray:
+        """Counts the edges of each edge type of each node.
+
+        Returns:
+            A numpy int32 array with shape (number of nodes, number of edge types), where item [i, j] is the number of
+            edges of node i with edge type edge_types[j].
+        """
+
+        return self._count_by_type(self.edge_type_codes, len(self.edge_types))
+
+    def node_type_degrees(self) -> np.ndarray:
+        """Counts the neighbors of each node type of each node.
+
+        Returns:
+            A numpy int32 array with shape (number of nodes, number of node types), where item [i, j] is the number of
+            neighbors of node i with node type node_types[j].
+        """
+
+        return self._count_by_type(self.node_type_codes[self.edge_to], len(self.node_types))
+
+    def _count_by_type(self, type_codes: np.ndarray, type_count: int) -> np.ndarray:
+        """Counts the edges of each node by a type code of each edge."""
+
+        keys = self._edge_sources() * type_count + type_codes
+        counts = np.bincount(keys, minlength=self.node_count() * type_count)
+
+        return counts.reshape(self.node_count(), type_count).astype(np.int32)
+
+    def is_weighted(self) -> bool:
+        """Returns True if the graph stores edge weights, and False if every edge has weight 1."""
+
+        return self.edge_weight is not None
+
+    def _count_node_types(self) -> None:
+        """Counts the nodes of each node type into nodetype2count_dictionary."""
+
+        counts = np.bincount(self.node_type_codes, minlength=len(self.node_types))
+        self.nodetype2count_dictionary.clear()
+        self.nodetype2count_dictionary.update(zip(self.node_types, counts.tolist()))
+
+    def _count_edge_types(self) -> None:
+        """Counts the edges of each edge type into edgetype2count_dictionary, where an undirected edge is counted once,
+        from its smaller endpoint."""
+
+        forward = self.directed | (self._edge_sources() <= self.edge_to)
+        counts = np.bincount(self.edge_type_codes[forward], minlength=len(self.edge_types))
+        self.edgetype2count_dictionary.clear()
+        self.edgetype2count_dictionary.update(zip(self.edge_types, counts.tolist()))
+
+    @property
+    def node_to_index_map(self) -> NodeVocabulary:
+        """A read-only map from the id of each node to its index, which is the node vocabulary."""
+
+        return self.node_vocabulary
+
+    @property
+    def index_to_node_map(self) -> Mapping:
+        """A read-only map from the index of each node to its id, backed by the node vocabulary."""
+
+        return IndexToNodeMap(self.node_vocabulary)
+
+    @property
+    def index_to_nodetype_map(self) -> Mapping:
+        """A read-only map from the index of each node to its node type, backed by node_type_codes."""
+
+        return IndexToLabelMap(self.node_type_codes, self.node_types)
+
+    @property
+    def nodetype_to_index_map(self) -> Mapping:
+        """A read-only map from each node type to the list of indices of the nodes of that type, backed by
+        node_type_codes."""
+
+        return LabelToIndicesMap(self.node_type_codes, self.node_types)
+
+    @property
+    def index_to_edgetype_map(self) -> Mapping:
+        """A read-only map from the index of each edge to its edge type, backed by edge_type_codes."""
+
+        return IndexToLabelMap(self.edge_type_codes, self.edge_types)
+
+    @property
+    def edgetype_to_index_map(self) -> Mapping:
+        """A read-only map from each edge type to the list of indices of the edges of that type, backed by
+        edge_type_codes."""
+
+        return LabelToIndicesMap(self.edge_type_codes, self.edge_types)
+
+    def save(self, path: str) -> None:
+        """Writes the graph to a directory of .npy files, which can be read back with CSFGraph.load.
+
+        The directory contains one file for each of offset_to_edge_, edge_to and edge_weight (unless the graph is
+        unweighted), the node ids (node_ids.npy), the node type code of each node (node_type_codes.npy) and the edge
+        type code of each edge (edge_type_codes.npy). The node type and edge type vocabularies and the edge type counts
+        are written to graph.json.
+
+        Args:
+            path: The path of the directory to write to. It is created if it does not exist.
+        """
+
+        os.makedirs(path, exist_ok=True)
+
+        arrays = {
+            'offset_to_edge_': self.offset_to_edge_,
+            'edge_to': self.edge_to,
+            'node_ids': self.node_vocabulary.ids,
+            'node_type_codes': self.node_type_codes,
+            'edge_type_codes': self.edge_type_codes,
+        }
+        if self.is_weighted():
+            arrays['edge_weight'] = self.edge_weight
+        for name, array in arrays.items():
+            np.save(os.path.join(path, name + '.npy'), array)
+
+        with open(os.path.join(path, 'graph.json'), 'w') as fh:
+            json.dump({'node_types': self.node_types,
+                       'edge_types': self.edge_types,
+                       'edgetype2count_dictionary': self.edgetype2count_dictionary,
+                       'duplicate_edge_count': self.duplicate_edge_count,
+                       'self_loop_count': self.self_loop_count,
+                       'node_file_only_count': self.node_file_only_count,
+                       'missing_node_type_count': self.missing_node_type_count,
+                       'directed': self.directed}, fh)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'CSFGraph':
+        """Reads a graph written by CSFGraph.save.
+
+        Args:
+            path: The path of the directory written by CSFGraph.save.
+            mmap: If True, the arrays are memory-mapped read-only instead of read into memory, so that processes
+                loading the same graph share one copy of the arrays.
+
+        Returns:
+            The CSFGraph stored in the directory.
+
+        Raises:
+            ValueError: If the directory cannot be found.
+        """
+
+        if not os.path.isdir(path):
+            raise ValueError('Could not find graph directory {}'.format(path))
+
+        def load_array(name: str) -> np.ndarray:
+            return np.load(os.path.join(path, name + '.npy'), mmap_mode='r' if mmap else None)
 
-            self.edge_to[j] = dest_index
-            self.edge_weight[j] = edge.weight
-            j += 1
+        with open(os.path.join(path, 'graph.json')) as fh:
+            metadata = json.load(fh)
+
+        graph = cls.__new__(cls)
+        graph._init_attributes()
+        graph.edgetype2count_dictionary.update(metadata['edgetype2count_dictionary'])
+        graph.duplicate_edge_count = metadata.get('duplicate_edge_count')
+        graph.self_loop_count = metadata.get('self_loop_count')
+        graph.node_file_only_count = metadata.get('node_file_only_count')
+        graph.missing_node_type_count = metadata.get('missing_node_type_count')
+        graph.directed = metadata.get('directed', False)
+
+        graph.offset_to_edge_ = load_array('offset_to_edge_')
+        graph.edge_to = load_array('edge_to')
+        if os.path.exists(os.path.join(path, 'edge_weight.npy')):
+            graph.edge_weight = load_array('edge_weight')
+        graph.edge_types = metadata['edge_types']
+        graph.edge_type_codes = load_array('edge_type_codes')
+        graph._set_read_only()
+
+        graph.node_types = metadata['node_types']
+        graph.node_type_codes = load_array('node_type_codes')
+        graph._count_node_types()
+        graph.node_vocabulary = NodeVocabulary(load_array('node_ids'))
+
+        return graph
+
+    def add_edges(self, edges: Iterable[Tuple[str, str]], weights: Optional[Sequence[float]] = None,
+                  edge_types: Optional[Sequence[str]] = None, node_types: Optional[Dict[str, str]] = None) -> None:
+        """Buffers edges to be added to the graph by the next call of compact.
+
+        Edges between nodes that are not in the graph add these nodes to the graph. New nodes get the indices after
+        the existing nodes, so the indices of the existing nodes do not change.
+
+        Args:
+            edges: The (source, destination) node ids of the edges to add. Unless the graph is directed, the inverse
+                of each edge is added too.
+            weights: The weight of each edge. Defaults to a weight of 1 for every edge. Ignored if the graph is
+                unweighted.
+            edge_types: The edge type of each edge. Defaults to the default edge type for every edge.
+            node_types: A map of node ids to node types for the nodes that are added to the graph. New nodes that are
+                not in it get the default node type.
+        """
+
+        edges = list(edges)
+        weights = [1.0] * len(edges) if weights is None else list(weights)
+        edge_types = [self.default_edge_type] * len(edges) if edge_types is None else list(edge_types)
+        if not len(edges) == len(weights) == len(edge_types):
+            raise ValueError('edges, weights and edge_types must have the same length')
+
+        self._added_edges.extend((src, dst, weight, edge_type)
+                                 for (src, dst), weight, edge_type in zip(edges, weights, edge_types))
+        self._new_node_types.update(node_types or {})
+
+    def remove_edges(self, edges: Iterable[Tuple[str, str]]) -> None:
+        """Buffers edges to be removed from the graph by the next call of compact.
+
+        Nodes are never removed, so a node whose edges are all removed keeps its index.
+
+        Args:
+            edges: The (source, destination) node ids of the edges to remove. Unless the graph is directed, the
+                inverse of each edge is removed too. Edges that are not in the graph are ignored.
+        """
+
+        self._removed_edges.extend(edges)
+
+    def has_pending_updates(self) -> bool:
+        """Returns True if there are edges buffered by add_edges or remove_edges that are not yet compacted."""
+
+        return bool(self._added_edges or self._removed_edges)
+
+    def compact(self) -> None:
+        """Merges the edges buffered by add_edges and remove_edges into the graph arrays in one vectorized pass.
+
+        The buffered removals are applied to the edges of the graph before the buffered additions are merged in.
+        Adding an edge that is already in the graph keeps the edge in the graph; to change the weight or type of an
+        edge, remove it and add it again.
+        """
+
+        if not self.has_pending_updates():
+            return
+
+        # index the new nodes after the existing nodes, finding them with one lookup of all added endpoints
+        old_node_count = self.node_count()
+        endpoints = np.array([(src, dst) for src, dst, _, _ in self._added_edges], dtype=str).reshape(-1)
+        new_nodes = list(dict.fromkeys(endpoints[self.node_vocabulary.encode(endpoints, missing=-1) < 0].tolist()))
+        self.node_type_codes = np.concatenate([self.node_type_codes,
+                                               np.zeros(len(new_nodes), dtype=self.node_type_codes.dtype)])
+        for i, node in enumerate(new_nodes, start=old_node_count):
+            self.assign_node_type(i, node, self._new_node_types)
+        self.node_vocabulary.extend(new_nodes)
+        self._count_node_types()
+        node_count = self.node_count()
+
+        # existing edges, as (source, destination) index arrays
+        sources = np.repeat(np.arange(old_node_count, dtype=np.int64), np.diff(self.offset_to_edge_))
+        self._degrees = None
+        self._reverse_csr = None
+        destinations = np.asarray(self.edge_to, dtype=np.int64)
+        edge_type_codes = np.asarray(self.edge_type_codes, dtype=np.int64)
+
+        # drop the removed edges and, unless the graph is directed, their inverses
+        removed = self.node_vocabulary.encode(np.array(self._removed_edges, dtype=str).reshape(-1), missing=-1)
+        removed = removed.reshape(-1, 2)[np.all(removed.reshape(-1, 2) >= 0, axis=1)]
+        removed_keys = removed[:, 0] * node_count + removed[:, 1]
+        if not self.directed:
+            removed_keys = np.concatenate([removed_keys, removed[:, 1] * node_count + removed[:, 0]])
+        kept = ~np.isin(sources * node_count + destinations, removed_keys)
+
+        # the added edges go after the kept edges, so that edges which are already in the graph are kept
+        edge_types = list(self.edge_types)
+        edge_type_ids = {edge_type: code for code, edge_type in enumerate(edge_types)}
+        added_types = [edge_type_ids.setdefault(edge_type, len(edge_type_ids)) for _, _, _, edge_type in
+                       self._added_edges]
+        edge_types.extend(list(edge_type_ids)[len(edge_types):])
+
+        added = self.node_vocabulary.encode(endpoints).reshape(-1, 2)
+        all_sources = np.concatenate([sources[kept], added[:, 0]])
+        all_destinations = np.concatenate([destinations[kept], added[:, 1]])
+        all_types = np.concatenate([edge_type_codes[kept], added_types]).astype(np.int64)
+        edge_data = [all_types]
+        if self.is_weighted():
+            edge_data.append(np.concatenate([self.edge_weight[kept], [weight for _, _, weight, _ in
+                                                                      self._added_edges]]))
+
+        # every kept edge of an undirected graph is stored together with its inverse already, so rebuilding the CSR
+        # from the directed edges only drops the inverses that are generated a second time
+        build = build_csr if self.directed else build_symmetric_csr
+        csr = build(all_sources, all_destinations, node_count, *edge_data)
+        self.offset_to_edge_, self.edge_to = csr[0], csr[1]
+        self.edge_types, self.edge_type_codes = encode_by_first_occurrence(csr[2], edge_types)
+        if self.is_weighted():
+            self.edge_weight = csr[3].astype(self.edge_weight.dtype)
+        self._set_read_only()
+
+        # the counts are taken from the merged edges, so added edges that were already in the graph or were added
+        # twice are not counted again
+        self._count_edge_types()
+
+        logging.info('Compacted {} added and {} removed edges into the graph ({} new nodes)'.format(
+            len(self._added_edges), len(self._removed_edges), len(new_nodes)))
+        self._added_edges = []
+        self._removed_edges = []
+        self._new_node_types = {}
+
+    def components(self) -> np.ndarray:
+        """Finds the connected components of the graph. For a directed graph, these are the weakly connected
+        components, which ignore the direction of the edges.
+
+        Returns:
+            A numpy int32 array with the component of each node, indexed by node index. Components are numbered from
+            0 in the order of their smallest node index.
+        """
+
+        return connected_components(self.offset_to_edge_, self.edge_to, directed=self.directed)
+
+    def largest_component(self) -> 'CSFGraph':
+        """Extracts the connected component with the most nodes (the first one, if several are the largest).
+
+        Returns:
+            A CSFGraph with the nodes of the largest component and the edges between them, built by subgraph.
+        """
+
+        components = self.components()
+        largest = np.argmax(np.bincount(components)) if len(components) else 0
+
+        return self.subgraph(components == largest)
+
+    def subgraph(self, nodes: Union[Sequence[str], np.ndarray]) -> 'CSFGraph':
+        """Extracts the subgraph induced by a set of nodes: these nodes and all edges of the graph between them.
+
+        The subgraph is built by masking the graph arrays and renumbering the kept nodes, so no file is read. The
+        kept nodes keep their relative order, so node i comes before node j in the subgraph if it does in the graph.
+        Node types, edge types and weights are carried over. Edges buffered by add_edges or remove_edges that are not
+        yet compacted are not part of the subgraph.
+
+        Args:
+            nodes: The nodes of the subgraph, as a sequence of node ids, a numpy array of node indices, or a boolean
+                numpy array with length the number of nodes that is True for the nodes to keep.
+
+        Returns:
+            A new CSFGraph. Its duplicate_edge_count and self_loop_count are None, as it is not read from an edge
+            file.
+
+        Raises:
+            KeyError: If a node id is not in the graph.
+            ValueError: If a boolean array of nodes does not have length the number of nodes.
+        """
+
+        nodes = np.asarray(nodes)
+        if nodes.dtype == bool:
+            if len(nodes) != self.node_count():
+                raise ValueError('A node mask must have length {}, not {}'.format(self.node_count(), len(nodes)))
+            keep = nodes
+        else:
+            indices = nodes.astype(np.int64) if nodes.dtype.kind in 'iu' else self.node_vocabulary.encode(nodes)
+            keep = np.zeros(self.node_count(), dtype=bool)
+            keep[indices] = True
+
+        sources = self._edge_sources()
+
+        return self._masked_graph(keep, keep[sources] & keep[self.edge_to])
+
+    def _masked_graph(self, keep: np.ndarray, kept_edges: np.ndarray) -> 'CSFGraph':
+        """Builds a new graph from the nodes and edges of the graph selected by two boolean masks.
+
+        Args:
+            keep: A boolean numpy array that is True for the nodes to keep.
+            kept_edges: A boolean numpy array aligned with edge_to that is True for the edges to keep. Kept edges must
+                be between kept nodes, and in an undirected graph the inverse of every kept edge must be kept too.
+
+        Returns:
+            A new CSFGraph.
+        """
+
+        # the kept nodes are renumbered in order, so the edges stay sorted on source and destination
+        new_index = np.cumsum(keep) - 1
+        sources = new_index[self._edge_sources()[kept_edges]]
+        node_count = int(np.count_nonzero(keep))
+
+        graph = CSFGraph.__new__(CSFGraph)
+        graph._init_attributes()
+        graph.directed = self.directed
+        graph.node_vocabulary = NodeVocabulary(self.node_vocabulary.ids[keep])
+        graph.node_types, graph.node_type_codes = encode_by_first_occurrence(self.node_type_codes[keep],
+                                                                             self.node_types)
+        graph._count_node_types()
+
+        offsets = np.zeros(node_count + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(sources, minlength=node_count))
+        graph.offset_to_edge_ = offsets.astype(self.offset_to_edge_.dtype)
+        graph.edge_to = new_index[self.edge_to[kept_edges]].astype(self.edge_to.dtype)
+        if self.is_weighted():
+            graph.edge_weight = np.array(self.edge_weight[kept_edges])
+        graph.edge_types, graph.edge_type_codes = encode_by_first_occurrence(self.edge_type_codes[kept_edges],
+                                                                             self.edge_types)
+        graph._set_read_only()
+        graph._count_edge_types()
+
+        return graph
+
+    def reorder_nodes(self, order: Union[str, np.ndarray] = 'rcm') -> 'CSFGraph':
+        """Renumbers the nodes of the graph, so that nodes that are visited together are stored close together.
+
+        Nodes are numbered in the order of their ids when the graph is read, which scatters the neighbors of a node
+        over edge_to and over the rows of an embedding. A new order permutes the node vocabulary, the node types and
+        the compressed storage format graph consistently, and the neighbors of every node stay sorted on their new
+        index. The orders are:
+            - 'degree': nodes by decreasing degree, so the hubs that most steps of a walk visit are stored together.
+            - 'bfs': a breadth-first search of each connected component, from its node with the largest degree.
+            - 'rcm': the reverse Cuthill-McKee order, which keeps the edges close to the diagonal of the adjacency
+              matrix, so the neighbors of a node have nearby indices.
+
+        Args:
+            order: One of ORDERS, or a numpy integer array with the current index of the node at each new index.
+
+        Returns:
+            A new CSFGraph with the same nodes, edges, types and weights. Node ids map to the new node indices, and
+            duplicate_edge_count, self_loop_count and the node file counts are carried over.
+
+        Raises:
+            ValueError: If order is not one of ORDERS, or not a permutation of the node indices.
+        """
+
+        if isinstance(order, str):
+            if order not in self.ORDERS:
+                raise ValueError('order must be one of {} or a permutation of the node indices, not {}'.format(
+                    ', '.join(self.ORDERS), order))
+            if order == 'degree':
+                permutation = degree_order(self.degrees)
+            else:
+                permutation = bfs_order(self.offset_to_edge_, self.edge_to, reverse_cuthill_mckee=order == 'rcm')
+        else:
+            permutation = np.asarray(order, dtype=np.int64)
+            if not np.array_equal(np.sort(permutation), np.arange(self.node_count())):
+                raise ValueError('order is not a permutation of the {} node indices'.format(self.node_count()))
+
+        new_index = np.empty(self.node_count(), dtype=np.int64)
+        new_index[permutation] = np.arange(self.node_count())
+
+        graph = CSFGraph.__new__(CSFGraph)
+        graph._init_attributes()
+        graph.directed = self.directed
+        graph.duplicate_edge_count = self.duplicate_edge_count
+        graph.self_loop_count = self.self_loop_count
+        graph.node_file_only_count = self.node_file_only_count
+        graph.missing_node_type_count = self.missing_node_type_count
+        graph.node_vocabulary = NodeVocabulary(self.node_vocabulary.ids[permutation])
+        graph.node_types, graph.node_type_codes = encode_by_first_occurrence(self.node_type_codes[permutation],
+                                                                             self.node_types)
+        graph._count_node_types()
+
+        # the edges are distinct, so build_csr only sorts them on their new source and destination
+        edge_data = [self.edge_type_codes] + ([self.edge_weight] if self.is_weighted() else [])
+        csr = build_csr(new_index[self._edge_sources()], new_index[self.edge_to], self.node_count(), *edge_data)
+        graph.offset_to_edge_, graph.edge_to = csr[0], csr[1]
+        graph.edge_types, graph.edge_type_codes = encode_by_first_occurrence(csr[2], self.edge_types)
+        if self.is_weighted():
+            graph.edge_weight = csr[3]
+        graph._set_read_only()
+        graph.edgetype2count_dictionary.update(self.edgetype2count_dictionary)
+
+        return graph
 
     def assign_node_type(self, i: int, node_id: str,
                          id_to_nodetype: Optional[Dict[str, str]]) -> None:
@@ -206,11 +751,16 @@ class CSFGraph:
         :return: None
         """
         if not id_to_nodetype or node_id not in id_to_nodetype:
-            self.index_to_nodetype_map[i] = self.default_node_type
-            self.nodetype_to_index_map[self.default_node_type].append(i)
+            node_type = self.default_node_type
         else:
-            self.index_to_nodetype_map[i] = id_to_nodetype[node_id]
-            self.nodetype_to_index_map[id_to_nodetype[node_id]].append(i)
+            node_type = id_to_nodetype[node_id]
+
+        if node_type not in self.node_types:
+            self.node_types.append(node_type)
+            if len(self.node_types) > np.iinfo(self.node_type_codes.dtype).max + 1:
+                self.node_type_codes = self.node_type_codes.astype(code_dtype(len(self.node_types)))
+
+        self.node_type_codes[i] = self.node_types.index(node_type)
 
     def read_nodetype_from_node_tsv(self,
                                     node_file: Optional[str],
@@ -219,18 +769,187 @@ class CSFGraph:
         if not node_file:
             return None  # no node file - assign all nodes the default node type elsewhere
 
-        node_type_info: dict = defaultdict(str)
-        with open(node_file, 'r') as fh:
-            header = fh.readline()
-            header_items: list = header.rstrip('\n').split()
-            for line in fh:
-                fields = line.rstrip('\n').split()
-                items = dict(zip(header_items, fields))
-                node_type_info[items[id_col]] = items[cat_col]
-        return node_type_info
+        node_ids, node_type_labels, node_type_codes = self.read_node_columns(node_file, id_col=id_col,
+                                                                             cat_col=cat_col)
+        return dict(zip(node_ids.tolist(), np.array(node_type_labels, dtype=str)[node_type_codes].tolist()))
+
+    def read_node_columns(self, node_file: str, chunk_size: int = 100000, id_col: Optional[str] = None,
+                          cat_col: Optional[str] = None) -> Tuple[np.ndarray, List[str], np.ndarray]:
+        """Reads the id and category columns of a node file in chunks of chunk_size rows into column arrays.
+
+        Only the two columns are kept from each row, and categories are interned as integer codes in the order in
+        which they first occur in the file. Blank lines and rows without an id and a category are skipped.
+
+        Args:
+            node_file: The path to the node file, which has a header line with the column names.
+            chunk_size: The number of rows to parse at a time.
+            id_col: The name of the column with the node ids. Defaults to node_id_col_name.
+            cat_col: The name of the column with the node types. Defaults to node_type_col_name.
+
+        Returns:
+            node_ids: A numpy string array with the id of each row.
+            node_type_labels: A list of node types, where the position of each node type is its code.
+            node_type_codes: A numpy int32 array with the code of the node type of each row.
+
+        Raises:
+            ValueError: If the header of the node file has no id or no category column.
+        """
+
+        id_col = id_col or self.node_id_col_name
+        cat_col = cat_col or self.node_type_col_name
+        node_type_ids: Dict[str, int] = {}
+        id_chunks, code_chunks = [], []
+
+        with open_text(node_file) as fh:
+            header_items = fh.readline().rstrip('\n').split()
+            for column in (id_col, cat_col):
+                if column not in header_items:
+                    raise ValueError('Node file {} has no {} column'.format(node_file, column))
+            id_index, cat_index = header_items.index(id_col), header_items.index(cat_col)
+            min_fields = max(id_index, cat_index) + 1
+
+            for lines in iter(lambda: list(islice(fh, chunk_size)), []):
+                # the columns after the id and category columns are left unsplit
+                rows = [fields for fields in (line.split(None, min_fields) for line in lines)
+                        if len(fields) >= min_fields]
+                id_chunks.append(np.array([row[id_index] for row in rows], dtype=str))
+                code_chunks.append(np.fromiter(
+                    (node_type_ids.setdefault(row[cat_index], len(node_type_ids)) for row in rows),
+                    dtype=np.int32, count=len(rows)))
+
+        node_ids = np.concatenate(id_chunks) if id_chunks else np.zeros(0, dtype=str)
+        node_type_codes = np.concatenate(code_chunks) if code_chunks else np.zeros(0, dtype=np.int32)
+
+        return node_ids, list(node_type_ids), node_type_codes
+
+    def _assign_node_types(self, node_file: str, node_ids: np.ndarray, node_type_labels: List[str],
+                           node_type_codes: np.ndarray) -> None:
+        """Joins the columns of a node file, as returned by read_node_columns, to the node vocabulary, sets
+        node_types and node_type_codes, and reports the nodes of the node file without edges and the nodes of the
+        graph without a node type.
+
+        Nodes that are not in the node file get default_node_type. If a node occurs in several rows of the node file,
+        the last row sets its type.
+        """
+
+        node_count = len(self.node_vocabulary)
+        labels = list(node_type_labels)
+        if self.default_node_type not in labels:
+            labels.append(self.default_node_type)
+
+        rows = self.node_vocabulary.encode(node_ids, missing=-1)
+        found = np.flatnonzero(rows >= 0)
+
+        # the last row of every node, found with a stable sort of the rows on node index
+        order = found[np.argsort(rows[found], kind='stable')]
+        last = order[np.append(rows[order][1:] != rows[order][:-1], True)] if len(order) else order
+        codes = np.full(node_count, labels.index(self.default_node_type), dtype=np.int64)
+        codes[rows[last]] = node_type_codes[last]
+        self.node_types, self.node_type_codes = encode_by_first_occurrence(codes, labels)
+
+        self.node_file_only_count = len(rows) - len(found)
+        self.missing_node_type_count = node_count - len(last)
+        if self.node_file_only_count:
+            logging.warning('{} nodes of node file {} have no edges and are not in the graph, e.g. {}'.format(
+                self.node_file_only_count, node_file, ', '.join(node_ids[rows < 0][:5].tolist())))
+        if self.missing_node_type_count:
+            typed = np.zeros(node_count, dtype=bool)
+            typed[rows[last]] = True
+            logging.warning('{} nodes of the graph are not in node file {} and get node type {}, e.g. {}'.format(
+                self.missing_node_type_count, node_file, self.default_node_type,
+                ', '.join(self.node_vocabulary.decode(np.flatnonzero(~typed)[:5]).tolist())))
+
+    def read_edge_columns(self, edge_file: str, header_info: dict, default_weight: float = 1,
+                          chunk_size: int = 100000, parse_weights: bool = True
+                          ) -> Tuple[List[str], np.ndarray, np.ndarray, Optional[np.ndarray], List[str], np.ndarray]:
+        """Reads an edge file in chunks of chunk_size rows into column arrays.
+
+        Node ids and edge types are interned as integer codes in the order in which they first occur in the file,
+        so that only the rows of the current chunk are held as strings and the memory needed is proportional to the
+        final arrays.
+
+        Args:
+            edge_file: The path to the edge file.
+            header_info: The header information of the edge file, as returned by self.parse_header.
+            default_weight: The weight assigned to edges if the file has no weight column.
+            chunk_size: The number of rows to parse at a time.
+            parse_weights: If False, the weight column is skipped and no weights are returned.
+
+        Returns:
+            node_labels: A list of node ids, where the position of each node id is its code.
+            source_codes: A numpy int32 array with the code of the subject of each row.
+            dest_codes: A numpy int32 array with the code of the object of each row.
+            weights: A numpy float64 array with the weight of each row, or None if parse_weights is False.
+            edge_type_labels: A list of edge types, where the position of each edge type is its code.
+            edge_type_codes: A numpy int32 array with the code of the edge type of each row.
+        """
+
+        header_items = header_info['header_items']
+        subject_col = header_items.index(self.subject_column_name)
+        object_col = header_items.index(self.object_column_name)
+        weight_col = header_items.index(self.weight_column_name) \
+            if self.weight_column_name in header_items else None
+        edge_label_col = header_items.index(self.edge_label_column_name) \
+            if self.edge_label_column_name in header_items else None
+
+        node_ids: Dict[str, int] = {}
+        edge_type_ids: Dict[str, int] = {self.default_edge_type: 0} if edge_label_col is None else {}
+        source_chunks, dest_chunks, weight_chunks, edge_type_chunks = [], [], [], []
+
+        with open_text(edge_file) as f:
+            if not header_info['is_legacy']:  # legacy edge files don't have headers
+                _ = f.readline()  # throw away header
+
+            for lines in iter(lambda: list(islice(f, chunk_size)), []):
+                rows = [fields for fields in (line.split() for line in lines) if fields]
+                source_chunks.append(np.fromiter(
+                    (node_ids.setdefault(row[subject_col], len(node_ids)) for row in rows),
+                    dtype=np.int32, count=len(rows)))
+                dest_chunks.append(np.fromiter(
+                    (node_ids.setdefault(row[object_col], len(node_ids)) for row in rows),
+                    dtype=np.int32, count=len(rows)))
+
+                if edge_label_col is None:
+                    edge_type_chunks.append(np.zeros(len(rows), dtype=np.int32))
+                else:
+                    edge_type_chunks.append(np.fromiter(
+                        (edge_type_ids.setdefault(row[edge_label_col], len(edge_type_ids)) for row in rows),
+                        dtype=np.int32, count=len(rows)))
+
+                if not parse_weights:
+                    continue
+                elif weight_col is None:
+                    # no weight provided. Assign a default value
+                    weight_chunks.append(np.full(len(rows), default_weight, dtype=np.float64))
+                else:
+                    weight_chunks.append(self._parse_weights([row[weight_col] for row in rows], default_weight))
+
+        def concatenate(chunks: List[np.ndarray], dtype) -> np.ndarray:
+            return np.concatenate(chunks) if chunks else np.zeros(0, dtype=dtype)
+
+        weights = concatenate(weight_chunks, np.float64) if parse_weights else None
+
+        return list(node_ids), concatenate(source_chunks, np.int32), concatenate(dest_chunks, np.int32), weights, \
+            list(edge_type_ids), concatenate(edge_type_chunks, np.int32)
+
+    @staticmethod
+    def _parse_weights(fields: List[str], default_weight: float) -> np.ndarray:
+        """Parses a chunk of weight fields, assigning the default weight to fields that are not numbers."""
+
+        try:
+            return np.asarray(fields, dtype=np.float64)
+        except ValueError:
+            weights = np.full(len(fields), default_weight, dtype=np.float64)
+            for i, field in enumerate(fields):
+                try:
+                    weights[i] = float(field)
+                except ValueError:
+                    logging.error(" Could not parse weight field " +
+                                  "(must be an integer): {}".format(field))
+            return weights
 
     def parse_header(self, edge_file: str) -> dict:
-        with open(edge_file, 'r') as fh:
+        with open_text(edge_file) as fh:
             header_info: Dict[str, Union[list, bool]] = {}
             header_info['is_legacy'] = False
 
@@ -264,20 +983,21 @@ class CSFGraph:
 
     def nodes(self) -> List[str]:
         """Returns a list of graph nodes."""
-        return list(self.node_to_index_map.keys())
+        return list(self.node_vocabulary)
 
     def nodes_as_integers(self) -> List[int]:
         """Returns a list of integers representing the location of each node from the alphabetically-sorted list."""
 
-        return list(self.index_to_node_map.keys())
+        return list(range(self.node_count()))
 
     def node_count(self) -> int:
         """Returns an integer that contains the total number of unique nodes in the graph"""
 
-        return len(self.node_to_index_map)
+        return len(self.node_vocabulary)
 
     def edge_count(self) -> int:
-        """Returns an integer that contains the total number of unique edges in the graph"""
+        """Returns an integer that contains the total number of unique edges in the graph, counting each edge and its
+        inverse unless the graph is directed"""
 
         return len(self.edge_to)
 
@@ -300,14 +1020,7 @@ class CSFGraph:
         source_idx = self.node_to_index_map[source]
         dest_idx = self.node_to_index_map[dest]
 
-        # get edge weights for nodes
-        for i in range(self.offset_to_edge_[source_idx], self.offset_to_edge_[source_idx + 1]):
-            if dest_idx == self.edge_to[i]:
-                return self.edge_weight[i]
-            else:
-                pass
-
-        return None
+        return self.weight_from_ints(source_idx, dest_idx)
 
     def weight_from_ints(self, source_idx: int, dest_idx: int) -> Optional[Union[int, float]]:
         """Takes user provided integers, representing indices for a source and destination node, and returns
@@ -324,16 +1037,101 @@ class CSFGraph:
             The weight of the edge that exists between the source and destination nodes.
         """
 
-        for i in range(self.offset_to_edge_[source_idx], self.offset_to_edge_[source_idx + 1]):
-            if dest_idx == self.edge_to[i]:
-                return self.edge_weight[i]
-            else:
-                pass
+        i = self.edge_index(source_idx, dest_idx)
+
+        if i is None:
+            return None
+
+        return self.edge_weight[i] if self.is_weighted() else 1
+
+    def edge_index(self, source_idx: int, dest_idx: int) -> Optional[int]:
+        """Finds the position in edge_to of the edge between two nodes, using a binary search over the sorted
+        neighbors of the source node.
+
+        Args:
+            source_idx: The index of a source node.
+            dest_idx: The index of a destination node.
+
+        Returns:
+            The index of the edge in edge_to and edge_weight, or None if there is no edge between the nodes.
+        """
+
+        start, end = self.offset_to_edge_[source_idx], self.offset_to_edge_[source_idx + 1]
+        i = start + np.searchsorted(self.edge_to[start:end], dest_idx)
+
+        if i < end and self.edge_to[i] == dest_idx:
+            return int(i)
 
         return None
 
+    def edge_indices(self, source_indices: np.ndarray, dest_indices: np.ndarray) -> np.ndarray:
+        """Finds the positions in edge_to of the edges between many pairs of nodes at once. Each pair is located with
+        a binary search over the sorted neighbors of its source node, and all searches advance together.
+
+        Args:
+            source_indices: An array with the index of the source node of each pair.
+            dest_indices: An array with the index of the destination node of each pair.
+
+        Returns:
+            A numpy int64 array with the index of the edge of each pair in edge_to and edge_weight, or -1 for pairs
+            without an edge.
+        """
+
+        source_indices = np.asarray(source_indices, dtype=np.int64)
+        dest_indices = np.asarray(dest_indices, dtype=np.int64)
+
+        # find the first position in [lo, hi) whose destination is not smaller than the requested one
+        lo = self.offset_to_edge_[source_indices].astype(np.int64)
+        hi = self.offset_to_edge_[source_indices + 1].astype(np.int64)
+        end = hi.copy()
+        active = np.flatnonzero(lo < hi)
+
+        while len(active) > 0:
+            mid = (lo[active] + hi[active]) // 2
+            right = self.edge_to[mid] < dest_indices[active]
+            lo[active[right]] = mid[right] + 1
+            hi[active[~right]] = mid[~right]
+            active = active[lo[active] < hi[active]]
+
+        found = lo < end
+        found[found] = self.edge_to[lo[found]] == dest_indices[found]
+
+        return np.where(found, lo, -1)
+
+    def weights_from_ints(self, source_indices: np.ndarray, dest_indices: np.ndarray) -> np.ndarray:
+        """Batched version of weight_from_ints.
+
+        Args:
+            source_indices: An array with the index of the source node of each pair.
+            dest_indices: An array with the index of the destination node of each pair.
+
+        Returns:
+            A numpy float64 array with the weight of the edge between each pair of nodes, or nan for pairs without
+            an edge.
+        """
+
+        indices = self.edge_indices(source_indices, dest_indices)
+        weights = np.full(len(indices), np.nan)
+        weights[indices >= 0] = self.edge_weight[indices[indices >= 0]] if self.is_weighted() else 1
+
+        return weights
+
+    def has_edges(self, source_indices: np.ndarray, dest_indices: np.ndarray) -> np.ndarray:
+        """Batched version of has_edge, which takes node indices instead of node names.
+
+        Args:
+            source_indices: An array with the index of the source node of each pair.
+            dest_indices: An array with the index of the destination node of each pair.
+
+        Returns:
+            A boolean numpy array, where True means an edge exists between the pair of nodes.
+        """
+
+        return self.edge_indices(source_indices, dest_indices) >= 0
+
     def neighbors(self, source: str) -> List[str]:
-        """Gets a list of node names, which are the neighbors of the user-provided source node.
+        """Gets a list of node names, which are the neighbors of the user-provided source node. For a directed graph,
+        these are the nodes that the source node has an edge to.
 
         Args:
             source: The name of a source node.
@@ -342,14 +1140,9 @@ class CSFGraph:
             neighbors: A list of neighbors (i.e. strings representing node names) for a source node.
         """
 
-        neighbors = []
         source_idx = self.node_to_index_map[source]
 
-        for i in range(self.offset_to_edge_[source_idx], self.offset_to_edge_[source_idx + 1]):
-            nbr = self.index_to_node_map[self.edge_to[i]]
-            neighbors.append(nbr)
-
-        return neighbors
+        return self.node_vocabulary.decode(self.neighbors_view(source_idx)).tolist()
 
     def neighbors_as_ints(self, source_idx: int) -> List[int]:
         """Gets a list of node indices, which are the neighbors of the user-provided source node.
@@ -361,10 +1154,57 @@ class CSFGraph:
             neighbors_ints: A list of indices of neighbors for a source node.
         """
 
-        return [
-            self.edge_to[i]
-            for i in range(self.offset_to_edge_[source_idx], self.offset_to_edge_[source_idx + 1])
-        ]
+        return self.neighbors_view(source_idx).tolist()
+
+    def neighbors_view(self, source_idx: int) -> np.ndarray:
+        """Gets the indices of the neighbors of the user-provided source node as a read-only view of edge_to, without
+        copying them.
+
+        Args:
+            source_idx: The index of a source node.
+
+        Returns:
+            A read-only numpy array with the sorted indices of the neighbors of the source node.
+        """
+
+        return self.edge_to[self.offset_to_edge_[source_idx]:self.offset_to_edge_[source_idx + 1]]
+
+    def in_neighbors_view(self, dest_idx: int) -> np.ndarray:
+        """Gets the indices of the nodes with an edge to the user-provided node as a read-only view, without copying
+        them. For an undirected graph these are the neighbors; for a directed graph they are read from the reverse
+        compressed storage format graph, which is built the first time this method is called.
+
+        Args:
+            dest_idx: The index of a destination node.
+
+        Returns:
+            A read-only numpy array with the sorted indices of the nodes with an edge to the destination node.
+        """
+
+        if not self.directed:
+            return self.neighbors_view(dest_idx)
+
+        reverse_offsets, reverse_sources = self._get_reverse_csr()
+
+        return reverse_sources[reverse_offsets[dest_idx]:reverse_offsets[dest_idx + 1]]
+
+    def neighbor_weights_view(self, source_idx: int) -> np.ndarray:
+        """Gets the weights of the edges of the user-provided source node as a read-only view of edge_weight, without
+        copying them. The weights are aligned with the neighbors returned by neighbors_view.
+
+        Args:
+            source_idx: The index of a source node.
+
+        Returns:
+            A read-only numpy array with the weights of the edges from the source node to each of its neighbors. For
+            an unweighted graph, this is a read-only array of ones that takes no memory per edge.
+        """
+
+        start, end = self.offset_to_edge_[source_idx], self.offset_to_edge_[source_idx + 1]
+        if not self.is_weighted():
+            return np.broadcast_to(np.float32(1), (end - start,))
+
+        return self.edge_weight[start:end]
 
     def has_edge(self, src: str, dest: str) -> bool:
         """Checks if an edge exists between src and dest node.
@@ -380,13 +1220,7 @@ class CSFGraph:
         source_idx = self.node_to_index_map[src]
         dest_idx = self.node_to_index_map[dest]
 
-        for i in range(self.offset_to_edge_[source_idx], self.offset_to_edge_[source_idx + 1]):
-            nbr_idx = self.edge_to[i]
-
-            if nbr_idx == dest_idx:
-                return True
-
-        return False
+        return self.edge_index(source_idx, dest_idx) is not None
 
     @staticmethod
     def same_nodetype(n1: str, n2: str) -> bool:
@@ -415,20 +1249,11 @@ class CSFGraph:
                 represent the name of each node in an edge. For instance, ('gg1', 'gg2').
         """
 
-        edge_list = []
-
-        for source_idx in range(len(self.offset_to_edge_) - 1):
-            src = self.index_to_node_map[source_idx]
+        sources, destinations = self.edges_as_id_array()
 
-            for j in range(self.offset_to_edge_[source_idx], self.offset_to_edge_[source_idx + 1]):
-                nbr_idx = self.edge_to[j]
-                nbr = self.index_to_node_map[nbr_idx]
-                tpl = (src, nbr)
-                edge_list.append(tpl)
+        return list(zip(sources.tolist(), destinations.tolist()))
 
-        return edge_list
-
-    def edges_as_ints(self) -> List[Tuple[int, Any]]:
+    def edges_as_ints(self) -> List[Tuple[int, int]]:
         """Creates an edge list, where nodes are coded by integers, for the graph.
 
         Returns:
@@ -436,18 +1261,66 @@ class CSFGraph:
                 represent each node in an edge. For instance, (2, 3).
         """
 
-        edge_list = []
+        sources, destinations = self.edges_as_array()
+
+        return list(zip(sources.tolist(), destinations.tolist()))
+
+    def edges_as_array(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Creates an array of the edges of the graph, where nodes are coded by integers.
+
+        Args:
+            start: The index in edge_to of the first edge to return.
+            stop: The index in edge_to after the last edge to return. Defaults to the number of edges.
+
+        Returns:
+            A numpy int32 array with shape (2, number of edges), where the first row contains the source node and the
+            second row the destination node of each edge, in the order of edge_to.
+        """
+
+        stop = self.edge_count() if stop is None else stop
+        # the source of the edges in a range of edge_to is found by a binary search over the node offsets
+        first_source = np.searchsorted(self.offset_to_edge_, start, side='right') - 1
+        last_source = np.searchsorted(self.offset_to_edge_, stop, side='left')
+        offsets = np.clip(self.offset_to_edge_[first_source:last_source + 1], start, stop)
+        sources = np.repeat(np.arange(first_source, first_source + len(offsets) - 1, dtype=np.int32),
+                            np.diff(offsets))
+
+        return np.stack([sources, self.edge_to[start:stop]])
+
+    def edges_as_id_array(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Creates an array of the edges of the graph, where nodes are coded by their string names, which are decoded
+        in bulk.
+
+        Args:
+            start: The index in edge_to of the first edge to return.
+            stop: The index in edge_to after the last edge to return. Defaults to the number of edges.
+
+        Returns:
+            A numpy string array with shape (2, number of edges), where the first row contains the source node and
+            the second row the destination node of each edge, in the order of edge_to.
+        """
+
+        return self.node_vocabulary.decode(self.edges_as_array(start, stop))
+
+    def iter_edge_chunks(self, chunk_size: int = 1000000, as_ids: bool = False) -> Iterator[np.ndarray]:
+        """Iterates over the edges of the graph in chunks, so that the edges of a large graph can be streamed without
+        holding them all in memory at once.
 
-        for source_idx in range(len(self.offset_to_edge_) - 1):
-            for j in range(self.offset_to_edge_[source_idx], self.offset_to_edge_[source_idx + 1]):
-                nbr_idx = self.edge_to[j]
-                tpl = (source_idx, nbr_idx)
-                edge_list.append(tpl)
+        Args:
+            chunk_size: The maximum number of edges in a chunk.
+            as_ids: If True, the nodes are coded by their string names instead of by integers.
+
+        Returns:
+            An iterator over numpy arrays with shape (2, number of edges in the chunk), as returned by edges_as_array
+            or, if as_ids is True, by edges_as_id_array.
+        """
 
-        return edge_list
+        for start in range(0, self.edge_count(), chunk_size):
+            stop = min(start + chunk_size, self.edge_count())
+            yield self.edges_as_id_array(start, stop) if as_ids else self.edges_as_array(start, stop)
 
-    def get_node_to_index_map(self) -> Dict[str, int]:
-        """Returns a dictionary of the nodes in the graph and their corresponding integers."""
+    def get_node_to_index_map(self) -> Mapping:
+        """Returns a read-only mapping of the nodes in the graph and their corresponding integers."""
 
         return self.node_to_index_map
 
@@ -470,8 +1343,8 @@ class CSFGraph:
         else:
             return self.node_to_index_map.get(node)
 
-    def get_index_to_node_map(self) -> Dict[int, str]:
-        """Returns a dictionary of the nodes in the graph and their corresponding integers."""
+    def get_index_to_node_map(self) -> Mapping:
+        """Returns a read-only mapping of the integers of the nodes in the graph and their corresponding nodes."""
 
         return self.index_to_node_map
 
@@ -506,4 +1379,4 @@ class CSFGraph:
         :param node
         :return: degree of node
         """
-        return len(self.neighbors(node))
+        return int(self.degrees[self.node_to_index_map[node]])
@@ -0,0 +1,167 @@
+import numpy as np  # type: ignore
+from typing import List, Optional, Sequence, Tuple
+
+
+def sort_vocabulary(labels: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorts a vocabulary of interned string labels and maps the interned codes onto the sorted order.
+
+    Args:
+        labels: A sequence of unique string labels (e.g. node ids), in the order in which they were interned.
+
+    Returns:
+        vocabulary: A numpy array with the alphabetically sorted labels.
+        rank: A numpy int32 array, where rank[code] is the index in vocabulary of the label interned as code.
+    """
+
+    labels = np.asarray(labels, dtype=str)
+    order = np.argsort(labels, kind='stable')
+    rank = np.empty(len(labels), dtype=np.int32)
+    rank[order] = np.arange(len(labels), dtype=np.int32)
+
+    return labels[order], rank
+
+
+def code_dtype(vocabulary_size: int) -> np.dtype:
+    """Returns the smallest unsigned integer type that can hold the codes of a vocabulary of the given size."""
+
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if vocabulary_size <= np.iinfo(dtype).max + 1:
+            return np.dtype(dtype)
+
+    return np.dtype(np.uint64)
+
+
+def encode_by_first_occurrence(codes: np.ndarray, labels: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+    """Renumbers label codes in the order in which the labels first occur, using the smallest integer type that can
+    hold them. Labels that do not occur are dropped.
+
+    Args:
+        codes: An integer numpy array of label codes.
+        labels: A sequence of labels, indexed by the codes in codes.
+
+    Returns:
+        vocabulary: A list of the labels that occur in codes, in the order of their first occurrence.
+        codes: A numpy array with the new code of each item of codes.
+    """
+
+    # a numpy array of labels would hand out numpy strings, so the vocabulary is built from python strings
+    if isinstance(labels, np.ndarray):
+        labels = labels.tolist()
+    used, first_index = np.unique(codes, return_index=True)
+    order = used[np.argsort(first_index)]
+    rank = np.zeros(len(labels), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+
+    return [labels[code] for code in order.tolist()], rank[codes].astype(code_dtype(len(order)))
+
+
+def merge_duplicate_edges(src: np.ndarray, dst: np.ndarray, node_count: int, weights: Optional[np.ndarray] = None,
+                          policy: str = 'first', directed: bool = False) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Finds the first row of every edge in a list of edges, and merges the weights of the rows that repeat the edge
+    into it. Unless directed is True, a row in the other direction repeats the edge too.
+
+    Args:
+        src: A numpy integer array with the source node of each row.
+        dst: A numpy integer array with the destination node of each row.
+        node_count: The number of nodes.
+        weights: A numpy array with the weight of each row, or None.
+        policy: How the weights of the rows of an edge are merged: 'first' keeps the weight of the first row, 'sum'
+            adds them up and 'max' keeps the largest one.
+        directed: If True, the rows (a, b) and (b, a) are different edges.
+
+    Returns:
+        rows: A numpy int64 array with the index of the first row of each edge, in increasing order.
+        weights: A numpy array with the merged weight of each row in rows, or None if weights is None.
+    """
+
+    if directed:
+        keys = np.asarray(src, dtype=np.int64) * node_count + dst
+    else:
+        keys = np.minimum(src, dst).astype(np.int64) * node_count + np.maximum(src, dst)
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    first = np.ones(len(sorted_keys), dtype=bool)
+    first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    starts = np.flatnonzero(first)
+
+    # the sort is stable, so the first row of each run of equal keys is the first row of its edge
+    rows = order[starts]
+    if weights is not None:
+        if policy == 'sum':
+            weights = np.add.reduceat(weights[order], starts) if len(starts) else weights[:0]
+        elif policy == 'max':
+            weights = np.maximum.reduceat(weights[order], starts) if len(starts) else weights[:0]
+        else:
+            weights = weights[rows]
+
+    in_order = np.argsort(rows)
+
+    return rows[in_order], None if weights is None else weights[in_order]
+
+
+def build_symmetric_csr(src: np.ndarray, dst: np.ndarray, node_count: int,
+                        *edge_data: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Builds the arrays of an undirected compressed storage format graph from integer edge endpoints.
+
+    Each edge is stored together with its inverse. The edges are sorted on (1) source and (2) destination index,
+    and when the same directed edge occurs more than once, the first occurrence is kept, where the inverse of an
+    edge counts as occurring right after the edge itself. This mirrors inserting each Edge and its inverse into a
+    set and sorting the set.
+
+    Args:
+        src: An integer array with the source node index of each edge.
+        dst: An integer array with the destination node index of each edge.
+        node_count: The total number of nodes in the graph.
+        edge_data: Any number of arrays aligned with src (e.g. weights or edge type codes), which are reordered
+            together with the edges.
+
+    Returns:
+        A tuple (offset_to_edge_, edge_to, *edge_data), where offset_to_edge_ has length node_count + 1 and all
+        other arrays have length equal to the number of unique directed edges.
+    """
+
+    # interleave every edge with its inverse, so that the insertion order of a set is preserved
+    sources = np.stack([src, dst], axis=1).reshape(-1)
+    destinations = np.stack([dst, src], axis=1).reshape(-1)
+
+    return build_csr(sources, destinations, node_count, *(np.repeat(np.asarray(data), 2) for data in edge_data))
+
+
+def build_csr(src: np.ndarray, dst: np.ndarray, node_count: int, *edge_data: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Builds the arrays of a directed compressed storage format graph from integer edge endpoints.
+
+    Only the given direction of each edge is stored. The edges are sorted on (1) source and (2) destination index,
+    and when the same edge occurs more than once, the first occurrence is kept.
+
+    Args:
+        src: An integer array with the source node index of each edge.
+        dst: An integer array with the destination node index of each edge.
+        node_count: The total number of nodes in the graph.
+        edge_data: Any number of arrays aligned with src (e.g. weights or edge type codes), which are reordered
+            together with the edges.
+
+    Returns:
+        A tuple (offset_to_edge_, edge_to, *edge_data), where offset_to_edge_ has length node_count + 1 and all
+        other arrays have length equal to the number of unique edges.
+    """
+
+    sources = np.asarray(src, dtype=np.int64)
+    destinations = np.asarray(dst, dtype=np.int64)
+
+    keys = sources * node_count + destinations
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+
+    # keep the first occurrence of every (source, destination) pair
+    first = np.ones(len(sorted_keys), dtype=bool)
+    first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    order = order[first]
+
+    edge_to = destinations[order].astype(np.int32)
+    degrees = np.bincount(sources[order], minlength=node_count)
+    offset_to_edge_ = np.zeros(node_count + 1, dtype=np.int32)
+    np.cumsum(degrees, out=offset_to_edge_[1:])
+
+    reordered = tuple(np.asarray(data)[order] for data in edge_data)
+
+    return (offset_to_edge_, edge_to) + reordered
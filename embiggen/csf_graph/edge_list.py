@@ -0,0 +1,166 @@
+import numpy as np  # type: ignore
+from typing import List, Sequence, Tuple, Union
+
+from embiggen.csf_graph.csf_graph import CSFGraph
+from embiggen.csf_graph.csr_builder import build_csr, build_symmetric_csr, sort_vocabulary
+from embiggen.csf_graph.node_vocabulary import NodeVocabulary
+
+
+class EdgeList:
+    """Class holds the edges of an edge file as two integer arrays, without building the compressed storage format
+    graph. This is enough for sets of edges that are only enumerated, such as the negative and held-out sets of a
+    link prediction split.
+
+    As in CSFGraph, every edge is stored together with its inverse (unless the edges are read as directed),
+    duplicate edges are dropped and the edges are sorted on the (alphabetical) source and destination node, so edges()
+    returns the same list as CSFGraph.edges() on the same file.
+
+    Attributes:
+        node_ids: A numpy array of node ids, indexed by the integer codes in sources and destinations. When the edge
+            list was read against the vocabulary of another graph, the first items are that vocabulary, so that the
+            codes of the nodes it shares with the graph are the graph's node indices. Nodes that are not in the
+            vocabulary are appended after it.
+        sources: A read-only numpy int32 array with the code of the source node of each edge.
+        destinations: A read-only numpy int32 array with the code of the destination node of each edge.
+    """
+
+    def __init__(self, node_ids: np.ndarray, sources: np.ndarray, destinations: np.ndarray):
+        self.node_ids = node_ids
+        self.sources = sources
+        self.destinations = destinations
+        for array in (self.sources, self.destinations):
+            array.flags.writeable = False
+
+    @classmethod
+    def from_file(cls, edge_file: str, vocabulary: Union[NodeVocabulary, Sequence[str]] = (),
+                  chunk_size: int = 100000, directed: bool = False) -> 'EdgeList':
+        """Reads an edge file in any of the formats read by CSFGraph.
+
+        Args:
+            edge_file: The path to the edge file.
+            vocabulary: A NodeVocabulary (e.g. CSFGraph.node_vocabulary of the positive training graph) or a sequence
+                of node ids. Nodes in the vocabulary are coded by their index in it.
+            chunk_size: The number of rows of the edge file that are parsed at once.
+            directed: If True, only the given direction of each edge is stored.
+
+        Returns:
+            The EdgeList with the edges of the file.
+        """
+
+        node_labels, sources, destinations = read_edge_pairs(edge_file, chunk_size, directed)
+
+        return cls.from_pairs(node_labels, sources, destinations, vocabulary)
+
+    @classmethod
+    def from_pairs(cls, node_labels: np.ndarray, sources: np.ndarray, destinations: np.ndarray,
+                   vocabulary: Union[NodeVocabulary, Sequence[str]] = ()) -> 'EdgeList':
+        """Codes the edges returned by read_edge_pairs against a vocabulary.
+
+        Args:
+            node_labels: The alphabetically sorted node ids of the edges.
+            sources: A numpy integer array with the index in node_labels of the source node of each edge.
+            destinations: A numpy integer array with the index in node_labels of the destination node of each edge.
+            vocabulary: A NodeVocabulary or a sequence of node ids. Nodes in the vocabulary are coded by their index in
+                it.
+
+        Returns:
+            The EdgeList with the edges.
+        """
+
+        if not isinstance(vocabulary, NodeVocabulary):
+            vocabulary = NodeVocabulary(vocabulary)
+        codes = vocabulary.encode(node_labels, missing=-1).astype(np.int32)
+        known = codes >= 0
+        codes[~known] = len(vocabulary) + np.arange(np.count_nonzero(~known))
+        node_ids = np.concatenate([vocabulary.decode(np.arange(len(vocabulary))), node_labels[~known]])
+
+        return cls(node_ids, codes[sources], codes[destinations])
+
+    def nodes(self) -> List[str]:
+        """Returns an alphabetically sorted list of the nodes that occur in the edges."""
+
+        codes = np.unique(np.concatenate([self.sources, self.destinations]))
+
+        return sorted(self.node_ids[codes].tolist())
+
+    def node_count(self) -> int:
+        """Returns an integer that contains the number of unique nodes that occur in the edges."""
+
+        return len(np.unique(np.concatenate([self.sources, self.destinations])))
+
+    def edge_count(self) -> int:
+        """Returns an integer that contains the total number of unique edges, counting each edge and its inverse
+        unless the edges were read as directed."""
+
+        return len(self.sources)
+
+    def edges(self) -> List[Tuple[str, str]]:
+        """Creates an edge list, where nodes are coded by their string names.
+
+        Returns:
+            edge_list: A list of tuples for all edges, where each tuple contains two strings that represent the name
+                of each node in an edge. For instance, ('gg1', 'gg2').
+        """
+
+        sources, destinations = self.edges_as_id_array()
+
+        return list(zip(sources.tolist(), destinations.tolist()))
+
+    def edges_as_ints(self) -> List[Tuple[int, int]]:
+        """Creates an edge list, where nodes are coded by the integer codes of node_ids.
+
+        Returns:
+            edge_list: A list of tuples for all edges, where each tuple contains two integers that represent each node
+                in an edge. For instance, (2, 3).
+        """
+
+        return list(zip(self.sources.tolist(), self.destinations.tolist()))
+
+    def edges_as_array(self) -> np.ndarray:
+        """Returns a numpy int32 array with shape (2, number of edges), with the codes of the source nodes in the first
+        row and the codes of the destination nodes in the second row."""
+
+        return np.stack([self.sources, self.destinations])
+
+    def edges_as_id_array(self) -> np.ndarray:
+        """Returns a numpy string array with shape (2, number of edges), with the source node ids in the first row and
+        the destination node ids in the second row."""
+
+        return self.node_ids[self.edges_as_array()]
+
+    def __str__(self) -> str:
+        """Prints a string containing the total number of nodes and edges."""
+
+        return 'EdgeList(nodes: {}, edges: {})'.format(self.node_count(), self.edge_count())
+
+
+def read_edge_pairs(edge_file: str, chunk_size: int = 100000,
+                    directed: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Reads the edges of an edge file as integer pairs, without weights, edge types or a CSR.
+
+    Unless directed is True, every edge is returned together with its inverse. Duplicate edges are dropped and the
+    edges are sorted on source and destination node.
+
+    Args:
+        edge_file: The path to the edge file.
+        chunk_size: The number of rows of the edge file that are parsed at once.
+        directed: If True, only the given direction of each edge is returned.
+
+    Returns:
+        node_labels: A numpy array with the alphabetically sorted node ids of the edges.
+        sources: A numpy int32 array with the index in node_labels of the source node of each edge.
+        destinations: A numpy int32 array with the index in node_labels of the destination node of each edge.
+    """
+
+    reader = CSFGraph.__new__(CSFGraph)
+    reader._init_attributes()
+    header_info = reader.parse_header(edge_file)
+    node_labels, source_codes, dest_codes, _, _, _ = \
+        reader.read_edge_columns(edge_file, header_info, chunk_size=chunk_size, parse_weights=False)
+
+    node_labels, node_rank = sort_vocabulary(node_labels)
+    build = build_csr if directed else build_symmetric_csr
+    offset_to_edge_, edge_to = build(node_rank[source_codes], node_rank[dest_codes], len(node_labels))
+    sources = np.repeat(np.arange(len(node_labels), dtype=np.int32), np.diff(offset_to_edge_))
+
+    return node_labels, sources, edge_to
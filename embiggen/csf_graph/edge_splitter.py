@@ -0,0 +1,226 @@
+import logging
+import os.path
+import numpy as np  # type: ignore
+from typing import List, Optional, Sequence, Tuple, Union
+
+from embiggen.csf_graph.components import random_spanning_forest
+from embiggen.csf_graph.csf_graph import CSFGraph
+from embiggen.csf_graph.edge_list import EdgeList
+
+
+class EdgeSplit:
+    """The positive and negative training, validation and test edges of a link prediction split of a graph.
+
+    All edge sets are coded against the node vocabulary of the graph that was split, which the training graph keeps
+    in full, so the same node has the same index in every set. The edge lists of a directed graph only hold the given
+    direction of each edge.
+
+    Attributes:
+        pos_train_graph: A CSFGraph with the edges of the graph that are not held out.
+        pos_validation_graph: An EdgeList with the held-out validation edges.
+        pos_test_graph: An EdgeList with the held-out test edges.
+        neg_train_graph: An EdgeList with node pairs without an edge in the graph, for training.
+        neg_validation_graph: An EdgeList with node pairs without an edge in the graph, for validation.
+        neg_test_graph: An EdgeList with node pairs without an edge in the graph, for testing.
+    """
+
+    FILE_NAMES = ('pos_train_edges', 'pos_validation_edges', 'pos_test_edges',
+                  'neg_train_edges', 'neg_validation_edges', 'neg_test_edges')
+
+    def __init__(self, pos_train_graph: CSFGraph, pos_validation_graph: EdgeList, pos_test_graph: EdgeList,
+                 neg_train_graph: EdgeList, neg_validation_graph: EdgeList, neg_test_graph: EdgeList):
+        self.pos_train_graph = pos_train_graph
+        self.pos_validation_graph = pos_validation_graph
+        self.pos_test_graph = pos_test_graph
+        self.neg_train_graph = neg_train_graph
+        self.neg_validation_graph = neg_validation_graph
+        self.neg_test_graph = neg_test_graph
+
+    def graphs(self) -> List[Union[CSFGraph, EdgeList]]:
+        """Returns the six edge sets in the order of the arguments of LinkPrediction: positive training, validation
+        and test, then negative training, validation and test."""
+
+        return [self.pos_train_graph, self.pos_validation_graph, self.pos_test_graph,
+                self.neg_train_graph, self.neg_validation_graph, self.neg_test_graph]
+
+    def save(self, path: str) -> List[str]:
+        """Writes the six edge sets to tab-separated edge files in a directory, which CSFGraph and EdgeList can read.
+
+        Each edge is written once, in one direction if the graph is undirected. The training edges are written with
+        their edge type, and with their weight if the graph is weighted.
+
+        Args:
+            path: The path of the directory, which is created if it does not exist.
+
+        Returns:
+            The paths of the six files, in the order of graphs().
+        """
+
+        os.makedirs(path, exist_ok=True)
+        paths = [os.path.join(path, name) for name in self.FILE_NAMES]
+
+        train = self.pos_train_graph
+        sources, destinations = train.edges_as_array()
+        forward = train.directed | (sources <= destinations)
+        columns = [train.node_vocabulary.decode(sources[forward]),
+                   np.array(train.edge_types, dtype=str)[train.edge_type_codes[forward]],
+                   train.node_vocabulary.decode(destinations[forward])]
+        header = [train.subject_column_name, train.edge_label_column_name, train.object_column_name]
+        if train.is_weighted():
+            columns.append(train.edge_weight[forward].astype(str))
+            header.append(train.weight_column_name)
+        _write_columns(paths[0], header, columns)
+
+        for edge_path, edge_list in zip(paths[1:], self.graphs()[1:]):
+            forward = train.directed | (edge_list.sources <= edge_list.destinations)
+            _write_columns(edge_path, [train.subject_column_name, train.object_column_name],
+                           [edge_list.node_ids[edge_list.sources[forward]],
+                            edge_list.node_ids[edge_list.destinations[forward]]])
+
+        return paths
+
+
+def split_edges(graph: CSFGraph, validation_fraction: float = 0.1, test_fraction: float = 0.1,
+                negative_ratio: float = 1.0, keep_connected: bool = True,
+                random_state: Optional[int] = None) -> EdgeSplit:
+    """Splits the edges of a graph into the positive and negative training, validation and test sets of link
+    prediction.
+
+    The held-out positive edges are drawn at random from the edges of the graph. With keep_connected, the edges of a
+    random spanning forest of the graph are never held out, so the training graph has the same (for a directed graph,
+    weakly) connected components as the graph and no node loses all of its edges. The negative edges are drawn
+    uniformly from the node pairs without an edge in the graph, in vectorized batches that are checked against the
+    sorted keys of the edges. The negative sets do not share any node pair. Self-loops always stay in the training
+    graph.
+
+    Args:
+        graph: The graph to split.
+        validation_fraction: The fraction of the edges of the graph held out for validation, where an edge and its
+            inverse count as one edge in an undirected graph.
+        test_fraction: The fraction of the edges of the graph held out for testing.
+        negative_ratio: The number of negative edges of each set per positive edge of that set.
+        keep_connected: If True, the training graph keeps a spanning forest of the graph.
+        random_state: The seed of the split.
+
+    Returns:
+        An EdgeSplit with the six edge sets.
+
+    Raises:
+        ValueError: If there are not enough edges that can be held out, or not enough node pairs without an edge.
+    """
+
+    rng = np.random.RandomState(random_state)
+    node_count = graph.node_count()
+    node_ids = graph.node_vocabulary.decode(np.arange(node_count))
+
+    # the edges, each undirected edge once
+    sources, destinations = graph.edges_as_array().astype(np.int64)
+    forward = (sources != destinations) if graph.directed else (sources < destinations)
+    edge_sources, edge_destinations = sources[forward], destinations[forward]
+    edge_count = len(edge_sources)
+    validation_count = int(round(validation_fraction * edge_count))
+    test_count = int(round(test_fraction * edge_count))
+
+    candidates = np.arange(edge_count)
+    if keep_connected:
+        forest = random_spanning_forest(node_count, edge_sources, edge_destinations,
+                                        random_state=rng.randint(2 ** 31))
+        candidates = candidates[~forest]
+    if validation_count + test_count > len(candidates):
+        raise ValueError('Cannot hold out {} edges, only {} of the {} edges can be held out{}'.format(
+            validation_count + test_count, len(candidates), edge_count,
+            ' without disconnecting the graph' if keep_connected else ''))
+
+    held_out = rng.choice(candidates, size=validation_count + test_count, replace=False)
+    validation, test = held_out[:validation_count], held_out[validation_count:]
+
+    # drop the held-out edges and, unless the graph is directed, their inverses from the training graph
+    kept_edges = np.ones(len(sources), dtype=bool)
+    kept_edges[np.flatnonzero(forward)[held_out]] = False
+    if not graph.directed:
+        kept_edges[graph.edge_indices(edge_destinations[held_out], edge_sources[held_out])] = False
+    pos_train_graph = graph._masked_graph(np.ones(node_count, dtype=bool), kept_edges)
+
+    train_count = edge_count - len(held_out)
+    negative_counts = [int(round(negative_ratio * count)) for count in (train_count, validation_count, test_count)]
+    negative_sources, negative_destinations = _sample_negative_edges(
+        edge_sources * node_count + edge_destinations, node_count, sum(negative_counts), rng, graph.directed)
+    bounds = np.cumsum([0] + negative_counts)
+
+    logging.info('Split {} edges into {} training, {} validation and {} test edges, with {} negative edges'.format(
+        edge_count, train_count, validation_count, test_count, sum(negative_counts)))
+
+    return EdgeSplit(pos_train_graph,
+                     _edge_list(node_ids, edge_sources[validation], edge_destinations[validation], graph.directed),
+                     _edge_list(node_ids, edge_sources[test], edge_destinations[test], graph.directed),
+                     *[_edge_list(node_ids, negative_sources[start:stop], negative_destinations[start:stop],
+                                  graph.directed)
+                       for start, stop in zip(bounds[:-1], bounds[1:])])
+
+
+def _sample_negative_edges(edge_keys: np.ndarray, node_count: int, count: int, rng: np.random.RandomState,
+                           directed: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """Draws distinct node pairs without an edge, in random order.
+
+    Args:
+        edge_keys: A sorted numpy int64 array with the key source * node_count + destination of every edge of the
+            graph, except self-loops and, for an undirected graph, the edges with source > destination.
+        node_count: The number of nodes of the graph.
+        count: The number of node pairs to draw.
+        rng: The random number generator.
+        directed: If True, (a, b) and (b, a) are different pairs. Otherwise, the smaller node of each pair is first.
+
+    Returns:
+        Two numpy int64 arrays with the first and the second node of each pair.
+    """
+
+    pair_count = node_count * (node_count - 1) // (1 if directed else 2)
+    free_count = pair_count - len(edge_keys)
+    if count > free_count:
+        raise ValueError('Cannot draw {} negative edges, the graph has only {} node pairs without an edge'.format(
+            count, free_count))
+
+    keys = np.zeros(0, dtype=np.int64)
+    while len(keys) < count:
+        # draw enough pairs that most batches are the last one
+        batch_size = int((count - len(keys)) * 1.1 * pair_count / free_count) + 16
+        u, v = rng.randint(node_count, size=batch_size), rng.randint(node_count, size=batch_size)
+        u, v = u[u != v], v[u != v]
+        if not directed:
+            u, v = np.minimum(u, v), np.maximum(u, v)
+        keys = np.sort(np.concatenate([keys, u * node_count + v]))
+        keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+
+        # both key arrays are sorted, so the binary searches walk through edge_keys in order
+        positions = np.minimum(np.searchsorted(edge_keys, keys), max(len(edge_keys) - 1, 0))
+        if len(edge_keys):
+            keys = keys[edge_keys[positions] != keys]
+
+    # the distinct pairs are a uniform random set, which a random permutation puts in random order
+    keys = rng.permutation(keys)[:count]
+
+    return keys // node_count, keys % node_count
+
+
+def _edge_list(node_ids: np.ndarray, sources: np.ndarray, destinations: np.ndarray, directed: bool) -> EdgeList:
+    """Builds an EdgeList with distinct edges, and their inverses unless directed is True, sorted on source and
+    destination."""
+
+    node_count = len(node_ids)
+    keys = sources * node_count + destinations
+    if not directed:
+        keys = np.concatenate([keys, destinations * node_count + sources])
+    keys = np.sort(keys)
+
+    return EdgeList(node_ids, (keys // node_count).astype(np.int32), (keys % node_count).astype(np.int32))
+
+
+def _write_columns(path: str, header: Sequence[str], columns: Sequence[np.ndarray],
+                   chunk_size: int = 1000000) -> None:
+    """Writes string columns to a tab-separated file with a header line."""
+
+    with open(path, 'w') as fh:
+        fh.write('\t'.join(header) + '\n')
+        for start in range(0, len(columns[0]), chunk_size):
+            rows = zip(*[column[start:start + chunk_size].tolist() for column in columns])
+            fh.writelines('\t'.join(row) + '\n' for row in rows)
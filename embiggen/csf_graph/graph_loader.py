@@ -0,0 +1,70 @@
+import numpy as np  # type: ignore
+from multiprocessing import Pool, cpu_count
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from embiggen.csf_graph.csf_graph import CSFGraph
+from embiggen.csf_graph.edge_list import EdgeList, read_edge_pairs
+
+
+def _read_graph(args: Tuple[str, Dict[str, Any]]) -> CSFGraph:
+    edge_file, graph_args = args
+    return CSFGraph(edge_file, **graph_args)
+
+
+def _read_edge_pairs(args: Tuple[str, int, bool]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    edge_file, chunk_size, directed = args
+    return read_edge_pairs(edge_file, chunk_size, directed)
+
+
+def load_graphs(edge_files: Sequence[str], edge_list_only: bool = False, processes: Optional[int] = None,
+                first_graph: Optional[CSFGraph] = None, **graph_args: Any) -> List[Union[CSFGraph, EdgeList]]:
+    """Reads several edge files concurrently, such as the positive and negative train, validation and test sets of a
+    link prediction split.
+
+    The first edge file (e.g. the positive training edges) is always read into a CSFGraph, in the calling process.
+    The other files are parsed at the same time by a pool of worker processes.
+
+    Args:
+        edge_files: The paths of the edge files. The first one is read into a CSFGraph.
+        edge_list_only: If True, the files after the first one are read into EdgeList objects keyed to the
+            vocabulary of the first graph, instead of into CSFGraph objects.
+        processes: The number of worker processes. Defaults to one process per file after the first one, up to the
+            number of CPUs.
+        first_graph: The CSFGraph of the first edge file, e.g. loaded with CSFGraph.load, which is used instead of
+            reading the first edge file again.
+        graph_args: Keyword arguments passed on to CSFGraph, e.g. node_file or weight_dtype. Only chunk_size and
+            directed are passed on when reading EdgeList objects.
+
+    Returns:
+        A list with a CSFGraph or EdgeList for each edge file, in the order of edge_files.
+    """
+
+    if not edge_files:
+        return []
+
+    other_files = list(edge_files[1:])
+    if not other_files:
+        return [first_graph if first_graph is not None else CSFGraph(edge_files[0], **graph_args)]
+
+    processes = processes or min(len(other_files), cpu_count())
+    with Pool(processes=processes) as pool:
+        if edge_list_only:
+            chunk_size, directed = graph_args.get('chunk_size', 100000), graph_args.get('directed', False)
+            results = pool.map_async(_read_edge_pairs, [(edge_file, chunk_size, directed) for edge_file in other_files])
+        else:
+            results = pool.map_async(_read_graph, [(edge_file, graph_args) for edge_file in other_files])
+
+        # read the first graph while the workers parse the other files
+        graph = first_graph if first_graph is not None else CSFGraph(edge_files[0], **graph_args)
+        others = results.get()
+        pool.close()
+        pool.join()
+
+    if edge_list_only:
+        return [graph] + [EdgeList.from_pairs(*pairs, vocabulary=graph.node_vocabulary) for pairs in others]
+
+    for other in others:
+        # the writeable flags of the arrays are not pickled
+        other._set_read_only()
+
+    return [graph] + others
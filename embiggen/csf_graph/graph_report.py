@@ -0,0 +1,195 @@
+import json
+import time
+import numpy as np  # type: ignore
+from typing import Any, Dict, Optional
+
+from embiggen.csf_graph.csf_graph import CSFGraph
+
+
+def _distribution(values: np.ndarray) -> Dict[str, Any]:
+    """Summarizes a numeric array with its range, moments and percentiles."""
+
+    if len(values) == 0:
+        return {'min': None, 'max': None, 'mean': None, 'median': None, 'std': None, 'percentiles': {}}
+
+    percentiles = np.percentile(values, [1, 10, 25, 75, 90, 99])
+
+    return {
+        'min': values.min().item(),
+        'max': values.max().item(),
+        'mean': float(values.mean()),
+        'median': float(np.median(values)),
+        'std': float(values.std()),
+        'percentiles': {str(p): float(v) for p, v in zip([1, 10, 25, 75, 90, 99], percentiles)},
+    }
+
+
+def _log2_histogram(values: np.ndarray) -> Dict[str, int]:
+    """Counts non-negative integers in the bins 0, 1, 2-3, 4-7, 8-15, ..."""
+
+    bins = np.zeros(len(values), dtype=np.int64)
+    positive = values > 0
+    bins[positive] = np.floor(np.log2(values[positive])).astype(np.int64) + 1
+    counts = np.bincount(bins)
+
+    histogram = {}
+    for b, count in enumerate(counts.tolist()):
+        if count:
+            low, high = (0, 0) if b == 0 else (2 ** (b - 1), 2 ** b - 1)
+            histogram[str(low) if low == high else '{}-{}'.format(low, high)] = count
+
+    return histogram
+
+
+def estimate_alias_tables(graph: CSFGraph, p: float = 1, q: float = 1, sample_size: int = 1000,
+                          random_state: Optional[int] = 42) -> Dict[str, Any]:
+    """Estimates the memory and time N2vGraph needs to build the alias tables of a graph, without building them.
+
+    The alias tables are packed into AliasTables, so their size is exact: one entry per edge for the alias nodes
+    and, for the alias edges, the degree of the destination of every edge, each with a 4-byte alias and a 4-byte
+    probability, plus an 8-byte offset per table. The seconds per entry are measured by building the alias tables
+    of a random sample of nodes and edges in one batch with N2vGraph, and extrapolated to the whole graph.
+
+    Args:
+        graph: The graph.
+        p: The return parameter of the walks.
+        q: The in-out parameter of the walks.
+        sample_size: The number of nodes and the number of edges whose alias tables are built.
+        random_state: The seed of the sample.
+
+    Returns:
+        A dictionary with the number of alias tables and entries, and the bytes and estimated single-process seconds
+        for the alias nodes, the alias edges and in total.
+    """
+
+    from embiggen.random_walk_generator import build_edge_alias_tables, build_node_alias_tables, sorted_in_edge_keys
+
+    degrees = graph.degrees.astype(np.int64)
+    rng = np.random.RandomState(random_state)
+    uniform_nodes = not graph.is_weighted()
+    uniform_edges = uniform_nodes and p == 1 and q == 1
+    entry_bytes = np.dtype(np.int32).itemsize + np.dtype(np.float32).itemsize
+    offset_bytes = np.dtype(np.int64).itemsize
+
+    def measure(build, items: np.ndarray, entries: np.ndarray, total_tables: int, total_entries: int,
+                skipped: bool) -> Dict[str, Any]:
+        if skipped or total_tables == 0:
+            return {'tables': 0, 'entries': 0, 'bytes': 0, 'seconds': 0.0}
+
+        sample = rng.choice(len(items), size=min(sample_size, len(items)), replace=False)
+        start = time.perf_counter()
+        build(items[sample])
+        seconds = time.perf_counter() - start
+
+        return {
+            'tables': total_tables,
+            'entries': total_entries,
+            'bytes': total_entries * entry_bytes + (total_tables + 1) * offset_bytes,
+            'seconds': seconds * total_entries / max(int(entries[sample].sum()), 1),
+        }
+
+    alias_nodes = measure(lambda nodes: build_node_alias_tables(graph, nodes), np.arange(graph.node_count()), degrees,
+                          graph.node_count(), int(degrees.sum()), uniform_nodes)
+    in_edge_keys = None if uniform_edges else sorted_in_edge_keys(graph)
+    alias_edges = measure(lambda positions: build_edge_alias_tables(graph, p, q, positions, in_edge_keys),
+                          np.arange(graph.edge_count()), degrees[graph.edge_to],
+                          graph.edge_count(), int(degrees[graph.edge_to].sum()), uniform_edges)
+
+    return {
+        'p': p,
+        'q': q,
+        'alias_nodes': alias_nodes,
+        'alias_edges': alias_edges,
+        'total_bytes': alias_nodes['bytes'] + alias_edges['bytes'],
+        'total_seconds': alias_nodes['seconds'] + alias_edges['seconds'],
+    }
+
+
+def graph_report(graph: CSFGraph, p: float = 1, q: float = 1, sample_size: int = 1000) -> Dict[str, Any]:
+    """Computes statistics of a graph from its arrays: size, degree and weight distributions, self-loops, duplicate
+    edges, nodes missing from the node or edge file, connected components, the mixing of node and edge types, and an
+    estimate of the cost of its alias tables.
+
+    For an undirected graph, undirected_edges and the edge type and node type mixing counts count each edge and its
+    inverse once. For a directed graph, they count every edge, the degrees are out-degrees, in_degree is added and the
+    components are weakly connected components.
+
+    Args:
+        graph: The graph.
+        p: The return parameter of the walks, used for the alias table estimate.
+        q: The in-out parameter of the walks, used for the alias table estimate.
+        sample_size: The number of nodes and edges sampled for the alias table estimate.
+
+    Returns:
+        A dictionary of statistics, which can be written as JSON.
+    """
+
+    degrees = graph.degrees
+    sources, destinations = graph.edges_as_array()
+    self_loops = int(np.count_nonzero(sources == destinations))
+
+    components = graph.components()
+    component_sizes = np.bincount(components)
+
+    # node type mixing, counting every undirected edge once
+    forward = np.ones(len(sources), dtype=bool) if graph.directed else sources <= destinations
+    type_count = len(graph.node_types)
+    source_types = graph.node_type_codes[sources[forward]].astype(np.int64)
+    dest_types = graph.node_type_codes[destinations[forward]].astype(np.int64)
+    mixing = np.bincount(np.minimum(source_types, dest_types) * type_count + np.maximum(source_types, dest_types),
+                         minlength=type_count * type_count).reshape(type_count, type_count)
+    undirected_edge_count = int(np.count_nonzero(forward))
+
+    report = {
+        'nodes': graph.node_count(),
+        'edges': graph.edge_count(),
+        'undirected_edges': undirected_edge_count,
+        'self_loops': self_loops,
+        'duplicate_edges': graph.duplicate_edge_count,
+        'self_loop_rows': graph.self_loop_count,
+        'node_file_only_nodes': graph.node_file_only_count,
+        'missing_node_type_nodes': graph.missing_node_type_count,
+        'isolated_nodes': int(np.count_nonzero(degrees == 0)),
+        'weighted': graph.is_weighted(),
+        'directed': graph.directed,
+        'degree': dict(_distribution(degrees), histogram=_log2_histogram(degrees)),
+        'components': {
+            'count': len(component_sizes),
+            'largest': int(component_sizes.max()) if len(component_sizes) else 0,
+            'largest_fraction': float(component_sizes.max() / graph.node_count()) if len(component_sizes) else 0.0,
+            'size_histogram': _log2_histogram(component_sizes),
+        },
+        'node_types': dict(graph.nodetype2count_dictionary),
+        'edge_types': dict(zip(graph.edge_types, (np.bincount(graph.edge_type_codes[forward],
+                                                              minlength=len(graph.edge_types))).tolist())),
+        'node_type_mixing': {'{} -- {}'.format(graph.node_types[i], graph.node_types[j]): int(mixing[i, j])
+                             for i in range(type_count) for j in range(i, type_count) if mixing[i, j]},
+        'same_node_type_fraction': float(np.trace(mixing) / undirected_edge_count) if undirected_edge_count else None,
+    }
+    if graph.directed:
+        report['in_degree'] = dict(_distribution(graph.in_degrees), histogram=_log2_histogram(graph.in_degrees))
+    if graph.is_weighted():
+        report['weight'] = _distribution(np.asarray(graph.edge_weight[forward], dtype=np.float64))
+        report['weighted_degree'] = _distribution(graph.weighted_degrees())
+    report['alias_tables'] = estimate_alias_tables(graph, p=p, q=q, sample_size=sample_size)
+
+    return report
+
+
+def write_graph_report(graph: CSFGraph, path: str, **report_args: Any) -> Dict[str, Any]:
+    """Computes the report of a graph with graph_report and writes it to a JSON file.
+
+    Args:
+        graph: The graph.
+        path: The path of the JSON file.
+        report_args: Keyword arguments passed on to graph_report.
+
+    Returns:
+        The report.
+    """
+
+    report = graph_report(graph, **report_args)
+    with open(path, 'w') as fh:
+        json.dump(report, fh, indent=2)
+
+    return report
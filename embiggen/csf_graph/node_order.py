@@ -0,0 +1,85 @@
+import numpy as np  # type: ignore
+
+from embiggen.csf_graph.components import union_find
+
+
+def degree_order(degrees: np.ndarray) -> np.ndarray:
+    """Orders nodes by decreasing degree, so that the nodes that walks visit most often are stored together.
+
+    Args:
+        degrees: An integer array with the degree of each node.
+
+    Returns:
+        A numpy int64 array with the node at each position of the new order. Nodes with the same degree keep their
+        relative order.
+    """
+
+    return np.argsort(-np.asarray(degrees, dtype=np.int64), kind='stable')
+
+
+def bfs_order(offset_to_edge_: np.ndarray, edge_to: np.ndarray, reverse_cuthill_mckee: bool = False) -> np.ndarray:
+    """Orders nodes by a breadth-first search of each connected component, so that neighbors get nearby indices.
+
+    The searches of all components run together, one vectorized step per level: the unvisited neighbors of the nodes
+    of a level form the next level, in the order of the first node of the level that reaches them. Each component is
+    then placed after the components with smaller nodes. Plain breadth-first searches start from the node with the
+    largest degree of each component and visit the neighbors of a node in index order. With reverse_cuthill_mckee,
+    they start from the node with the smallest degree, visit the neighbors of a node by increasing degree and the
+    order is reversed at the end, which gives the reverse Cuthill-McKee order that keeps the edges of the compressed
+    storage format graph close to its diagonal.
+
+    Nodes that the searches do not reach, which happens in a directed graph whose components are only weakly
+    connected, start further searches, until every node is visited.
+
+    Args:
+        offset_to_edge_: The node offsets of the graph, with length the number of nodes + 1.
+        edge_to: The destination node of each edge of the graph.
+        reverse_cuthill_mckee: If True, the reverse Cuthill-McKee order is returned instead of the breadth-first order.
+
+    Returns:
+        A numpy int64 array with the node at each position of the new order.
+    """
+
+    node_count = len(offset_to_edge_) - 1
+    offsets = np.asarray(offset_to_edge_, dtype=np.int64)
+    degrees = np.diff(offsets)
+    sources = np.repeat(np.arange(node_count, dtype=np.int64), degrees)
+    component = union_find(node_count, sources, edge_to)
+
+    # the start node of a search is the first node of its component by this priority
+    priority = degrees if reverse_cuthill_mckee else -degrees
+    visited = np.zeros(node_count, dtype=bool)
+    levels = []
+    while not np.all(visited):
+        unvisited = np.flatnonzero(~visited)
+        by_priority = unvisited[np.lexsort((priority[unvisited], component[unvisited]))]
+        starts = by_priority[np.append(True, component[by_priority][1:] != component[by_priority][:-1])]
+        frontier = starts
+        visited[frontier] = True
+        while len(frontier):
+            levels.append(frontier)
+
+            # the neighbors of the frontier, grouped by the position of their parent in the frontier
+            counts = degrees[frontier]
+            parents = np.repeat(np.arange(len(frontier)), counts)
+            positions = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + \
+                np.repeat(offsets[frontier], counts)
+            neighbors = np.asarray(edge_to[positions], dtype=np.int64)
+            if reverse_cuthill_mckee:
+                by_degree = np.lexsort((degrees[neighbors], parents))
+                neighbors = neighbors[by_degree]
+            neighbors = neighbors[~visited[neighbors]]
+
+            # the first occurrence of every neighbor, in the order of the occurrences
+            by_node = np.argsort(neighbors, kind='stable')
+            first = by_node[np.append(True, neighbors[by_node][1:] != neighbors[by_node][:-1])] \
+                if len(neighbors) else by_node
+            frontier = neighbors[np.sort(first)]
+            visited[frontier] = True
+
+    order = np.concatenate(levels) if levels else np.zeros(0, dtype=np.int64)
+
+    # the levels of all searches are interleaved, and a stable sort on the component puts each component together
+    order = order[np.argsort(component[order], kind='stable')]
+
+    return order[::-1].copy() if reverse_cuthill_mckee else order
@@ -0,0 +1,140 @@
+import numpy as np  # type: ignore
+from collections.abc import Mapping
+from typing import Iterator, Optional, Sequence
+
+
+def _to_bytes(ids: Sequence[str]) -> np.ndarray:
+    """Returns node ids as a numpy bytes array of their UTF-8 encodings, leaving a bytes array as it is."""
+
+    ids = np.asarray(ids)
+    if ids.dtype.kind == 'S':
+        return ids
+
+    return np.char.encode(ids.astype(str), 'utf-8')
+
+
+class NodeVocabulary(Mapping):
+    """Read-only map from node ids to node indices, stored as a single numpy bytes array.
+
+    The node id of each index is stored at that index of ids. Node ids are looked up by a binary search over the
+    ids in sorted order, so apart from the ids themselves the vocabulary only stores a sort permutation, and not even
+    that when the ids are already sorted, which they are for a graph read from a file. Looking up a node id that is
+    not in the vocabulary raises a KeyError.
+
+    The ids are stored UTF-8 encoded, which takes a byte per character of an ASCII id instead of the four of a numpy
+    string array, and sorts them in the same order. The methods take and return python strings.
+
+    Attributes:
+        ids: A numpy bytes array with the UTF-8 encoded id of each node, indexed by node index.
+    """
+
+    def __init__(self, ids: Sequence[str] = ()):
+        self.ids = _to_bytes(ids)
+        self._update_order()
+
+    def _update_order(self) -> None:
+        """Stores the permutation that sorts ids, or None if ids is already sorted."""
+
+        if np.all(self.ids[1:] > self.ids[:-1]):
+            self._order: Optional[np.ndarray] = None
+        else:
+            self._order = np.argsort(self.ids, kind='stable')
+
+    def extend(self, ids: Sequence[str]) -> None:
+        """Appends node ids to the vocabulary. They get the indices after the existing nodes.
+
+        Only the new ids are sorted, and merged into the sort permutation of the existing ones.
+
+        Args:
+            ids: The node ids to add, which must not be in the vocabulary yet.
+        """
+
+        if not len(ids):
+            return
+
+        new_ids = _to_bytes(ids)
+        new_order = np.argsort(new_ids, kind='stable')
+        positions = np.searchsorted(self.ids, new_ids[new_order], sorter=self._order)
+        old_order = np.arange(len(self.ids)) if self._order is None else self._order
+        order = np.insert(old_order, positions, new_order + len(self.ids))
+        self.ids = np.concatenate([self.ids, new_ids])
+        self._order = None if np.array_equal(order, np.arange(len(order))) else order
+
+    def encode(self, ids: Sequence[str], missing: Optional[int] = None) -> np.ndarray:
+        """Looks up the indices of an array of node ids.
+
+        Args:
+            ids: A sequence or numpy array of node ids.
+            missing: The index returned for node ids that are not in the vocabulary. If None, a KeyError is raised
+                for them instead.
+
+        Returns:
+            A numpy int64 array with the index of each node id.
+
+        Raises:
+            KeyError: If missing is None and a node id is not in the vocabulary.
+        """
+
+        ids = _to_bytes(ids)
+        if len(self.ids) == 0:
+            positions = np.zeros(len(ids), dtype=np.int64)
+            found = np.zeros(len(ids), dtype=bool)
+        else:
+            positions = np.minimum(np.searchsorted(self.ids, ids, sorter=self._order), len(self.ids) - 1)
+            if self._order is not None:
+                positions = self._order[positions]
+            found = self.ids[positions] == ids
+
+        if missing is None:
+            if not np.all(found):
+                raise KeyError(ids[~found][0].decode('utf-8'))
+            return positions.astype(np.int64)
+
+        return np.where(found, positions, missing).astype(np.int64)
+
+    def decode(self, indices: Sequence[int]) -> np.ndarray:
+        """Looks up the node ids of an array of node indices.
+
+        Args:
+            indices: A sequence or numpy array of node indices.
+
+        Returns:
+            A numpy string array with the id of each node.
+        """
+
+        return np.char.decode(self.ids[np.asarray(indices, dtype=np.int64)], 'utf-8')
+
+    def __getitem__(self, node_id: str) -> int:
+        return int(self.encode([node_id])[0])
+
+    def __contains__(self, node_id) -> bool:
+        return isinstance(node_id, str) and self.encode([node_id], missing=-1)[0] >= 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.decode(np.arange(len(self.ids))).tolist())
+
+
+class IndexToNodeMap(Mapping):
+    """Read-only map from node indices to node ids, backed by the ids of a NodeVocabulary.
+
+    Attributes:
+        vocabulary: The NodeVocabulary with the node ids.
+    """
+
+    def __init__(self, vocabulary: NodeVocabulary):
+        self.vocabulary = vocabulary
+
+    def __getitem__(self, index: int) -> str:
+        if not 0 <= index < len(self.vocabulary):
+            raise KeyError(index)
+
+        return self.vocabulary.ids[index].decode('utf-8')
+
+    def __len__(self) -> int:
+        return len(self.vocabulary)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self.vocabulary)))
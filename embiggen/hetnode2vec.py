@@ -28,11 +28,10 @@ class N2vGraph:
     """A class to represent perform random walks on a graph in order to derive the data
     needed for the node2vec algorithm.
 
-    Assumptions: That the CSF graph is always undirected.
-
     Attributes:
-        csf_graph: An undirected Compressed Storage Format graph object. Graph stores
-        two directed edges to represent each undirected edge.
+        csf_graph: A Compressed Storage Format graph object. An undirected graph stores
+        two directed edges to represent each undirected edge, a directed graph stores
+        each edge in its given direction only and the walks follow that direction.
         p:
         q:
         gamma:
@@ -67,7 +66,7 @@ class N2vGraph:
 
         while len(walk) < walk_length:
             cur = walk[-1]
-            cur_nbrs = g.neighbors_as_ints(cur)  # g returns a sorted list of neighbors
+            cur_nbrs = g.neighbors_view(cur)  # g returns a sorted array of neighbors
 
             if len(cur_nbrs) > 0:
                 if len(walk) == 1:
@@ -126,17 +125,15 @@ class N2vGraph:
         g = self.g
         p = self.p
         q = self.q
-        unnormalized_probs = []
 
-        for dst_nbr in g.neighbors_as_ints(dst):
-            # log.info("neighbour of destination node:{}".format(dst_nbr))
-            edge_weight = g.weight_from_ints(dst, dst_nbr)
-            if dst_nbr == src:
-                unnormalized_probs.append(edge_weight / p)
-            elif g.has_edge(dst_nbr, src):
-                unnormalized_probs.append(edge_weight)
-            else:
-                unnormalized_probs.append(edge_weight / q)
+        dst_nbrs = g.neighbors_view(dst)
+        edge_weights = g.neighbor_weights_view(dst)
+        # the neighbors of dst with an edge to src, which a directed graph reads from its reverse edges
+        src_linked = np.isin(dst_nbrs, g.in_neighbors_view(src), assume_unique=True)
+        unnormalized_probs = np.where(
+            dst_nbrs == src,
+            edge_weights / p,
+            np.where(src_linked, edge_weights, edge_weights / q))
 
         norm_const = sum(unnormalized_probs)
         normalized_probs = [float(u_prob) / norm_const for u_prob in unnormalized_probs]
@@ -154,8 +151,7 @@ class N2vGraph:
         """
 
         g = self.g
-        unnormalized_probs = [g.weight_from_ints(node, nbr)
-                              for nbr in g.neighbors_as_ints(node)]
+        unnormalized_probs = g.neighbor_weights_view(node)
         norm_const = sum(unnormalized_probs)
         normalized_probs = [float(u_prob) / norm_const
                             for u_prob in unnormalized_probs]
@@ -188,13 +184,15 @@ class N2vGraph:
         alias_edges = {}
 
         # Note that g.edges returns two directed edges to represent an undirected edge
-        # between any two nodes.  We do not need to create any additional edges for the
-        # random walk as in the Stanford implementation
-        num_edges = len(g.edges())  # for progress updates
+        # between any two nodes, and only the given direction for a directed graph.  We do
+        # not need to create any additional edges for the random walk as in the Stanford
+        # implementation
+        num_edges = g.edge_count()  # for progress updates
 
         with Pool(processes=num_processes) as pool:
             for i, [orig_edge, alias_edge] in enumerate(
-                    pool.imap_unordered(self.get_alias_edge, g.edges_as_ints())):
+                    pool.imap_unordered(self.get_alias_edge, (
+                        edge for chunk in g.iter_edge_chunks() for edge in zip(*chunk.tolist())))):
                 alias_edges[orig_edge] = alias_edge
                 sys.stderr.write('\rmaking alias edges ({:03.1f}% done)'.
                                  format(100 * i / num_edges))
@@ -379,7 +377,7 @@ class N2vGraph:
         """
         k = len(probs)
         q = np.zeros(k)
-        j = np.zeros(k, dtype=np.int)
+        j = np.zeros(k, dtype=np.int64)
         smaller = []
         larger = []
 
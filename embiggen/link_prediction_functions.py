@@ -29,17 +29,14 @@ def CommonNeighbors(graph, node_1, node_2):
     :return: Common Neighbors score of the nodes
     '''
 
-    node_1_neighbors = set(graph.neighbors(node_1))
-    node_2_neighbors = set(graph.neighbors(node_2))
+    node_1_neighbors = graph.neighbors_view(graph.node_to_index_map[node_1])
+    node_2_neighbors = graph.neighbors_view(graph.node_to_index_map[node_2])
 
     if len(node_1_neighbors) == 0 or len(node_2_neighbors) == 0:
         score = 0.0
 
-    elif len(node_1_neighbors.intersection(node_2_neighbors)) == 0:
-        score = 0.0
-
     else:
-        n_intersection = node_1_neighbors.intersection(node_2_neighbors)
+        n_intersection = np.intersect1d(node_1_neighbors, node_2_neighbors, assume_unique=True)
         score = float(len(n_intersection))
 
     return score
@@ -53,19 +50,16 @@ def Jaccard(graph, node_1, node_2):
     :return: The Jaccad score of two nodes
     '''
 
-    node_1_neighbors = set(graph.neighbors(node_1))
-    node_2_neighbors = set(graph.neighbors(node_2))
+    node_1_neighbors = graph.neighbors_view(graph.node_to_index_map[node_1])
+    node_2_neighbors = graph.neighbors_view(graph.node_to_index_map[node_2])
 
     if len(node_1_neighbors) == 0 or len(node_2_neighbors) == 0:
         score = 0.0
 
-    elif len(node_1_neighbors.intersection(node_2_neighbors)) == 0:
-        score = 0.0
-
     else:
-        n_intersection = set(node_1_neighbors.intersection(node_2_neighbors))
-        n_union = set(node_1_neighbors.union(node_2_neighbors))
-        score = float(len(n_intersection))/len(n_union)
+        n_intersection = len(np.intersect1d(node_1_neighbors, node_2_neighbors, assume_unique=True))
+        n_union = len(node_1_neighbors) + len(node_2_neighbors) - n_intersection
+        score = float(n_intersection)/n_union
 
     return score
 
@@ -79,21 +73,17 @@ def AdamicAdar(graph, node_1, node_2):
     :return: AdamicAdar score of the nodes
     '''
 
-    node_1_neighbors = set(graph.neighbors(node_1))
-    node_2_neighbors = set(graph.neighbors(node_2))
+    node_1_neighbors = graph.neighbors_view(graph.node_to_index_map[node_1])
+    node_2_neighbors = graph.neighbors_view(graph.node_to_index_map[node_2])
 
     if len(node_1_neighbors) == 0 or len(node_2_neighbors) == 0:
         score = 0.0
 
-    elif len(node_1_neighbors.intersection(node_2_neighbors)) == 0:
-        score = 0.0
-
     else:
-        score = 0.0
-        n_intersection = node_1_neighbors.intersection(node_2_neighbors)
+        n_intersection = np.intersect1d(node_1_neighbors, node_2_neighbors, assume_unique=True)
+        degrees = graph.degrees[n_intersection]
+        score = float(np.sum(1 / np.log(degrees)))
 
-        for c in n_intersection:
-            score += 1/np.log(graph.node_degree(c))
     return score
 
 
@@ -1,15 +1,19 @@
+import importlib
+import json
 import logging.handlers
 import logging
 import numpy as np    # type: ignore
 import os
 import sys
+import tempfile
 import tensorflow as tf  # type: ignore
 
 from multiprocessing import Pool, cpu_count
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple
 import time
 
-from tqdm import tqdm  # type: ignore
+from embiggen.alias_tables import AliasTableMap, AliasTables, build_alias_tables
+from embiggen.csf_graph.csf_graph import CSFGraph
 
 log = logging.getLogger("embiggen.log")
 
@@ -24,275 +28,487 @@ log.addHandler(handler)
 log.addHandler(logging.StreamHandler())
 
 
+def build_node_alias_tables(graph: CSFGraph, nodes: np.ndarray) -> AliasTables:
+    """Builds the alias tables of many nodes at once, each over the weights of the edges of its node. These are the
+    alias nodes of N2vGraph.
+
+    Args:
+        graph: The graph.
+        nodes: An integer array with the index of each node.
+
+    Returns:
+        AliasTables with a table per node, in the order of nodes.
+    """
+
+    nodes = np.asarray(nodes, dtype=np.int64)
+    sizes = graph.degrees[nodes].astype(np.int64)
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    entries = np.arange(offsets[-1]) + np.repeat(graph.offset_to_edge_[nodes].astype(np.int64) - offsets[:-1], sizes)
+    weights = graph.edge_weight[entries].astype(np.float64) if graph.is_weighted() else np.ones(len(entries))
+
+    return build_alias_tables(offsets, weights)
+
+
+def build_edge_alias_tables(graph: CSFGraph, p: float, q: float, positions: np.ndarray,
+                            in_edge_keys: Optional[np.ndarray] = None) -> AliasTables:
+    """Builds the alias tables of many edges at once, each over the neighbors of the destination of its edge. These
+    are the alias edges of N2vGraph.
+
+    The unnormalized probability of a step from the destination dst of an edge (src, dst) to a neighbor x is
+    the weight of (dst, x), divided by p if x is src, and by q unless x has an edge to src. That test is a binary
+    search of the pairs (src, x) of all tables in the sorted keys of the edges to every node.
+
+    Args:
+        graph: The graph.
+        p: The return parameter of the walks.
+        q: The in-out parameter of the walks.
+        positions: An integer array with the position in edge_to of each edge.
+        in_edge_keys: The result of sorted_in_edge_keys for the graph, which is computed if it is not given. Pass it
+            when building the tables of a graph in several batches.
+
+    Returns:
+        AliasTables with a table per edge, in the order of positions.
+    """
+
+    if in_edge_keys is None:
+        in_edge_keys = sorted_in_edge_keys(graph)
+    offset_to_edge = graph.offset_to_edge_.astype(np.int64)
+    positions = np.asarray(positions, dtype=np.int64)
+    sources = np.searchsorted(offset_to_edge, positions, side='right') - 1
+    destinations = graph.edge_to[positions].astype(np.int64)
+    sizes = graph.degrees[destinations].astype(np.int64)
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+
+    # the neighbors x of the destination of every edge, with the source src of their edge
+    entries = np.arange(offsets[-1]) + np.repeat(offset_to_edge[destinations] - offsets[:-1], sizes)
+    neighbors = graph.edge_to[entries].astype(np.int64)
+    src = np.repeat(sources, sizes)
+    keys = src * graph.node_count() + neighbors
+    found = np.minimum(np.searchsorted(in_edge_keys, keys), max(len(in_edge_keys) - 1, 0))
+    src_linked = in_edge_keys[found] == keys if len(in_edge_keys) else np.zeros(len(keys), dtype=bool)
+
+    weights = graph.edge_weight[entries].astype(np.float64) if graph.is_weighted() else np.ones(len(entries))
+    unnormalized_probs = np.where(neighbors == src, weights / p, np.where(src_linked, weights, weights / q))
+
+    return build_alias_tables(offsets, unnormalized_probs)
+
+
+def sorted_in_edge_keys(graph: CSFGraph) -> np.ndarray:
+    """Returns a sorted numpy int64 array with the key node * node_count + in-neighbor of every edge of a graph, where
+    the in-neighbors of a node are the nodes with an edge to it, which a directed graph reads from its reverse
+    edges."""
+
+    if graph.directed:
+        offsets, in_neighbors = graph._get_reverse_csr()
+    else:
+        offsets, in_neighbors = graph.offset_to_edge_, graph.edge_to
+
+    return np.repeat(np.arange(graph.node_count(), dtype=np.int64), np.diff(offsets)) * graph.node_count() + \
+        in_neighbors.astype(np.int64)
+
+
 class N2vGraph:
     """A class to represent perform random walks on a graph in order to derive the data
     needed for the node2vec algorithm.
 
-    Assumptions: That the CSF graph is always undirected.
-
     Attributes:
-        csf_graph: An undirected Compressed Storage Format graph object. Graph stores
-        two directed edges to represent each undirected edge.
+        csf_graph: A Compressed Storage Format graph object. An undirected graph stores
+        two directed edges to represent each undirected edge, a directed graph stores
+        each edge in its given direction only and the walks follow that direction.
         p: return parameter
         q: in-out parameter
-        num_processes:
+        num_processes: The number of processes that simulate_walks runs, each for at least MIN_WALKS_PER_PROCESS
+        walks.
+        uniform_nodes: True if the graph is unweighted, in which case the first step of a walk is drawn uniformly
+        from the neighbors of the start node and no alias nodes are made.
+        uniform_edges: True if the graph is unweighted and p and q are 1, in which case every step of a walk is
+        drawn uniformly from the neighbors of the current node and no alias edges are made.
+        alias_nodes: AliasTables with a table per node over its neighbors, so table i starts at offset_to_edge_[i]
+        of the graph, or None if uniform_nodes is True.
+        alias_edges: AliasTables with a table per edge over the neighbors of its destination, indexed by the position
+        of the edge in edge_to, or None if uniform_edges or lazy is True.
+        lazy: True if no alias edges are made, in which case every step after the first draws a neighbor of the
+        current node from its alias node, or uniformly, and accepts it with probability its p/q factor divided by
+        max(1/p, 1, 1/q), until a neighbor is accepted. The walks follow the same distribution, and the tables take
+        memory in the number of edges instead of the sum of the squared degrees.
+
+    Args:
+        alias_tables: The path of a directory written by save_alias_tables, whose tables are memory-mapped instead
+        of being computed. They must have been computed for the same graph, p and q.
+        lazy: If True, the second-order steps are drawn by rejection sampling instead of from alias edges.
     """
 
-    def __init__(self, csf_graph, p, q, num_processes: int = -1) -> None:
+    MIN_WALKS_PER_PROCESS = 10000
+
+    def __init__(self, csf_graph, p, q, num_processes: int = -1, alias_tables: Optional[str] = None,
+                 lazy: bool = False) -> None:
 
         self.g = csf_graph
         self.p = p
         self.q = q
         self.random_walks_map: Dict[Tuple, tf.RaggedTensor] = {}
         self.num_processes = num_processes if num_processes != -1 else cpu_count()
-        self.__preprocess_transition_probs()
+        self.uniform_nodes = not csf_graph.is_weighted()
+        self.uniform_edges = self.uniform_nodes and p == 1 and q == 1
+        self.lazy = lazy
+        if alias_tables is None:
+            self.__preprocess_transition_probs()
+        else:
+            self.load_alias_tables(alias_tables)
 
     def node2vec_walk(self, walk_length: int, start_node) -> list:
         """ Simulate a random walk starting from start node.
         Args:
             walk_length: number of nodes to walk
-            start_node:
+            start_node: the index of the node to start from
         Returns:
             walk: A list of nodes, where each list constitutes a random walk.
         """
-        g = self.g
-        nodes = self.alias_nodes
-        edges = self.alias_edges
 
+        walks, lengths = self.walk_batch(np.array([start_node]), walk_length)
 
-        walk = [
-            start_node, # Initial node
-        ]
+        return walks[0, :lengths[0]].tolist()
 
-        # First iteration
-        cur_nbrs = g.neighbors_as_ints(start_node)
+    def walk_batch(self, start_nodes: np.ndarray, walk_length: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Simulates a batch of random walks, advancing all of them together one step at a time.
 
-        if len(cur_nbrs)>0:
-            current = cur_nbrs[self.alias_draw(*nodes[start_node])]
-            previous = start_node
-            walk.append(current)
-        else:
-            return walk
+        The state of the walks is a few arrays over the walks that are still going: the current node, the node before
+        it and the position in edge_to of the edge just walked, which is the index of its alias edge. Each step draws
+        the random numbers of all walks at once and writes the next nodes into one column of the walk matrix. A walk
+        stops early at a node without neighbors.
 
-        while len(walk) < walk_length:
-            # g returns a sorted list of neighbors
-            cur_nbrs = g.neighbors_as_ints(current)
+        Args:
+            start_nodes: An integer array with the index of the start node of each walk.
+            walk_length: The number of nodes of a walk that does not stop early.
 
-            if len(cur_nbrs) > 0:
-                new_current = cur_nbrs[self.alias_draw(*edges[(previous, current)])]
-                previous = current
-                current = new_current
-                walk.append(current)
-                continue
+        Returns:
+            A numpy int32 array with shape (number of walks, walk_length) with the nodes of each walk, and a numpy
+            int32 array with the number of nodes of each walk. The entries of a walk past its length are zero.
+        """
+
+        g = self.g
+        offsets = g.offset_to_edge_.astype(np.int64)
+        degrees = g.degrees
+        current = np.asarray(start_nodes, dtype=np.int64)
+        walks = np.zeros((len(current), walk_length), dtype=np.int32)
+        lengths = np.zeros(len(current), dtype=np.int32)
+        if walk_length == 0:
+            return walks, lengths
+        walks[:, 0] = current
+        lengths[:] = 1
+
+        walking = np.arange(len(current))
+        previous = edge = current
+        for step in range(1, walk_length):
+            going = degrees[current] > 0
+            walking, current, previous, edge = walking[going], current[going], previous[going], edge[going]
+            if len(walking) == 0:
+                break
+
+            if (self.uniform_nodes if step == 1 else self.uniform_edges):
+                k = (np.random.rand(len(current)) * degrees[current]).astype(np.int64)
+            elif step == 1:
+                k = self.alias_nodes.draw_batch(current)
+            elif self.alias_edges is None:
+                k = self._draw_by_rejection(previous, current)
+            else:
+                k = self.alias_edges.draw_batch(edge)
+
+            edge = offsets[current] + k
+            previous, current = current, g.edge_to[edge].astype(np.int64)
+            walks[walking, step] = current
+            lengths[walking] = step + 1
+
+        return walks, lengths
+
+    def _draw_by_rejection(self, previous: np.ndarray, current: np.ndarray) -> np.ndarray:
+        """Draws the next step of many walks from previous to current without alias edges.
 
-            break
+        A neighbor x of current is drawn from the alias node of current, or uniformly if the graph is unweighted,
+        and accepted with probability f(x) / max(1/p, 1, 1/q), where f(x) is 1/p if x is previous, 1 if x has an
+        edge to previous and 1/q otherwise. The walks whose neighbor is rejected draw again, until every walk has
+        accepted one. Accepted neighbors follow the distribution of the alias edge of (previous, current), and the
+        expected number of draws is at most max(1/p, 1, 1/q) / min(1/p, 1, 1/q).
 
-        return walk
+        Args:
+            previous: An integer array with the index of the node before current in each walk.
+            current: An integer array with the index of the node each walk is at, which has at least one neighbor.
+
+        Returns:
+            A numpy int64 array with the position of the drawn neighbor among the neighbors of current.
+        """
+
+        g = self.g
+        previous = np.asarray(previous, dtype=np.int64)
+        current = np.asarray(current, dtype=np.int64)
+        return_factor, out_factor = 1 / self.p, 1 / self.q
+        upper_bound = max(return_factor, 1, out_factor)
+        k = np.zeros(len(current), dtype=np.int64)
+        pending = np.arange(len(current))
+        while len(pending):
+            cur, prev = current[pending], previous[pending]
+            if self.uniform_nodes:
+                draws = (np.random.rand(len(pending)) * g.degrees[cur]).astype(np.int64)
+            else:
+                draws = self.alias_nodes.draw_batch(cur)
+            nbrs = g.edge_to[g.offset_to_edge_[cur] + draws]
+            factors = np.where(nbrs == prev, return_factor, np.where(g.has_edges(nbrs, prev), 1, out_factor))
+            accepted = np.random.rand(len(pending)) * upper_bound < factors
+            k[pending[accepted]] = draws[accepted]
+            pending = pending[~accepted]
 
-    def _multiproc_node2vec_walk(self, args):
-        nodes, walk_length = args
-        return [
-            self.node2vec_walk(walk_length, node)
-            for node in np.random.permutation(nodes)
-        ]
+        return k
 
     def simulate_walks(self, num_walks: int, walk_length: int, use_cache=False) -> tf.RaggedTensor:
         """Repeatedly simulate random walks from each node.
+
+        The walks from every node, in a random order of the nodes for each of the num_walks rounds, are simulated
+        together by walk_batch. With more than one process, the graph and alias table arrays are copied once into
+        shared memory, which the workers attach to when they start, and each worker simulates chunks of the walks and
+        writes them straight into a shared walk matrix, so that neither the N2vGraph nor the walks are pickled.
+
         Args:
             num_walks: number of individual walks to take
             walk_length: length of one walk (number of nodes)
             use_cache: whether or not to use random walks that are cached for the given num_walks and walk_length
         Returns:
-            walks: A list of nodes, where each list constitutes a random walk.
+            walks: A tf.RaggedTensor of int32 node indices, with a row per walk.
         """
         key = (num_walks, walk_length)
         if use_cache and key in self.random_walks_map:
             walks_tensor = self.random_walks_map[key]
         else:
-            nodes = self.g.nodes_as_integers()
-            with Pool(min(self.num_processes, num_walks)) as pool:
-                walks_tensor = tf.ragged.constant(sum(tqdm(
-                    pool.imap_unordered(
-                        self._multiproc_node2vec_walk,
-                        (
-                            (nodes, walk_length)
-                            for _ in range(num_walks)
-                        )
-                    ),
-                    total=num_walks,
-                    desc='Performing walks'
-                ), []))
-                pool.close()
-                pool.join()
-                self.random_walks_map[key] = walks_tensor
+            start = time.time()
+            node_count = self.g.node_count()
+            start_nodes = np.concatenate([np.random.permutation(node_count) for _ in range(num_walks)]) \
+                if num_walks > 0 else np.zeros(0, dtype=np.int64)
+            processes = min(self.num_processes, len(start_nodes) // self.MIN_WALKS_PER_PROCESS)
+            if processes > 1:
+                walks, lengths = self._walk_in_pool(start_nodes, walk_length, processes)
+            else:
+                walks, lengths = self.walk_batch(start_nodes, walk_length)
+            walks_tensor = tf.RaggedTensor.from_tensor(walks, lengths=lengths)
+            self.random_walks_map[key] = walks_tensor
+            end = time.time()
+            logging.info("performing {} walks: {} seconds".format(len(start_nodes), end - start))
 
         return walks_tensor
 
+    def _walk_in_pool(self, start_nodes: np.ndarray, walk_length: int, processes: int,
+                      chunks_per_process: int = 4) -> Tuple[np.ndarray, np.ndarray]:
+        """Runs walk_batch in a pool of processes that share the arrays of the walker and of the walks.
+
+        The arrays are shared through multiprocessing.shared_memory, or through memory-mapped temporary files on
+        Python versions before 3.8, which do not have it. Every chunk of the walks is simulated with its own seed,
+        drawn from the random state of this process, so that the walks do not depend on which worker runs which chunk.
+
+        Args:
+            start_nodes: An integer array with the index of the start node of each walk.
+            walk_length: The number of nodes of a walk that does not stop early.
+            processes: The number of worker processes.
+            chunks_per_process: The number of chunks of walks per process, to balance the load of the workers.
+
+        Returns:
+            The walk matrix and the walk lengths, as returned by walk_batch.
+        """
+
+        arrays = {
+            'offset_to_edge_': self.g.offset_to_edge_,
+            'edge_to': self.g.edge_to,
+            'start_nodes': np.asarray(start_nodes, dtype=np.int64),
+            'walks': np.zeros((len(start_nodes), walk_length), dtype=np.int32),
+            'lengths': np.zeros(len(start_nodes), dtype=np.int32),
+        }
+        for name, tables in (('alias_nodes', self.alias_nodes), ('alias_edges', self.alias_edges)):
+            if tables is not None:
+                arrays.update({name + '.offsets': tables.offsets, name + '.j': tables.j, name + '.q': tables.q})
+        config = {'p': self.p, 'q': self.q, 'uniform_nodes': self.uniform_nodes, 'uniform_edges': self.uniform_edges,
+                  'lazy': self.lazy, 'directed': self.g.directed}
+
+        bounds = np.linspace(0, len(start_nodes), processes * chunks_per_process + 1).astype(np.int64)
+        seeds = np.random.randint(2 ** 31, size=len(bounds) - 1)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            blocks, shared, specs = _share_arrays(arrays, tmp_dir if _shared_memory() is None else None)
+            try:
+                with Pool(processes, initializer=_attach_walker, initargs=(specs, config)) as pool:
+                    for _ in pool.imap_unordered(_walk_shared_chunk, zip(bounds[:-1], bounds[1:], seeds)):
+                        pass
+                    pool.close()
+                    pool.join()
+                walks, lengths = np.array(shared['walks']), np.array(shared['lengths'])
+            finally:
+                del shared
+                _release_blocks(blocks, unlink=True)
+
+        return walks, lengths
+
     def get_alias_edge(self, edge):
         """Get the alias edge setup lists for a given edge.
 
         Args:
-            edge: The edge to be aliased.
+            edge: The edge to be aliased, as a (source, destination) pair of node indices.
 
         Returns:
             [original_edge, [j, q]]
         """
 
-        src = edge[0]
-        dst = edge[1]
-        g = self.g
-        p = self.p
-        q = self.q
-        unnormalized_probs = []
-
-        for dst_nbr in g.neighbors_as_ints(dst):
-            # log.info("neighbour of destination node:{}".format(dst_nbr))
-            edge_weight = g.weight_from_ints(dst, dst_nbr)
-            if dst_nbr == src:
-                unnormalized_probs.append(edge_weight / p)
-            elif g.has_edge(dst_nbr, src):
-                unnormalized_probs.append(edge_weight)
-            else:
-                unnormalized_probs.append(edge_weight / q)
+        position = self.g.edge_index(*edge)
+        if position is None:
+            raise KeyError(edge)
 
-        norm_const = sum(unnormalized_probs)
-        normalized_probs = [
-            float(u_prob) / norm_const for u_prob in unnormalized_probs]
-
-        return [edge, self.__alias_setup(normalized_probs)]
+        return [edge, list(build_edge_alias_tables(self.g, self.p, self.q, np.array([position])).table(0))]
 
     def _get_alias_node(self, node):
-        """
+        """Get the alias node setup lists for a given node.
 
         Args:
-            node:
+            node: The index of the node.
 
         Returns:
-
+            [original_node, [j, q]]
         """
 
-        g = self.g
-        unnormalized_probs = [g.weight_from_ints(node, nbr)
-                              for nbr in g.neighbors_as_ints(node)]
-        norm_const = sum(unnormalized_probs)
-        normalized_probs = [float(u_prob) / norm_const
-                            for u_prob in unnormalized_probs]
+        return [node, list(build_node_alias_tables(self.g, np.array([node])).table(0))]
 
-        return [node, self.__alias_setup(normalized_probs)]
-
-    def __preprocess_transition_probs(self) -> None:
+    def __preprocess_transition_probs(self, batch_entries: int = 1 << 22) -> None:
         """Preprocessing of transition probabilities for guiding the random walks.
 
+        The alias tables are packed into AliasTables, which are indexed by node and by position in edge_to, so that
+        no dictionary entry or array is kept per node or edge. They are built with vectorized numpy operations, in
+        batches of nodes or edges whose tables have about batch_entries entries in total.
+
         Args:
-            num_processes: The number of processes to run.
+            batch_entries: The number of table entries built at once, which bounds the memory of the temporary arrays.
 
         Returns:
             None.
         """
         g = self.g
 
-        alias_nodes = {}
-        num_nodes = len(g.nodes_as_integers())  # for progress updates
-        start = time.time()
-        with Pool(processes=self.num_processes) as pool:
-            for i, [orig_node, alias_node] in enumerate(
-                    pool.imap_unordered(self._get_alias_node, g.nodes_as_integers())):
-                alias_nodes[orig_node] = alias_node
-                sys.stderr.write('\rmaking alias nodes ({:03.1f}% done)'.
-                                 format(100 * i / num_nodes))
-            pool.close()
-            pool.join()
-        end = time.time()
-        logging.info("making alias nodes:{} seconds".format(end-start))
-
-        sys.stderr.write("\rDone making alias nodes.\n")
+        self.alias_nodes = None
+        self.alias_edges = None
 
-        alias_edges = {}
+        if self.uniform_nodes:
+            logging.info("unweighted graph: skipping alias nodes")
+        else:
+            start = time.time()
+            self.alias_nodes = self._build_in_batches(
+                g.degrees.astype(np.int64), lambda nodes: build_node_alias_tables(g, nodes), batch_entries,
+                'alias nodes')
+            end = time.time()
+            logging.info("making alias nodes:{} seconds".format(end-start))
+
+        if self.uniform_edges:
+            logging.info("unweighted graph with p = q = 1: skipping alias edges")
+            return None
+        if self.lazy:
+            logging.info("lazy mode: skipping alias edges, steps are drawn by rejection sampling")
+            return None
 
         # Note that g.edges returns two directed edges to represent an undirected edge
-        # between any two nodes.  We do not need to create any additional edges for the
-        # random walk as in the Stanford implementation
-        num_edges = len(g.edges())  # for progress updates
+        # between any two nodes, and only the given direction for a directed graph.  We do
+        # not need to create any additional edges for the random walk as in the Stanford
+        # implementation. The table of an edge is over the neighbors of its destination.
         start = time.time()
-        with Pool(processes=self.num_processes) as pool:
-            for i, [orig_edge, alias_edge] in enumerate(
-                    pool.imap_unordered(self.get_alias_edge, g.edges_as_ints())):
-                alias_edges[orig_edge] = alias_edge
-                sys.stderr.write('\rmaking alias edges ({:03.1f}% done)'.
-                                 format(100 * i / num_edges))
-            pool.close()
-            pool.join()
-        sys.stderr.write("\rDone making alias edges.\n")
+        in_edge_keys = sorted_in_edge_keys(g)
+        self.alias_edges = self._build_in_batches(
+            g.degrees[g.edge_to].astype(np.int64),
+            lambda positions: build_edge_alias_tables(g, self.p, self.q, positions, in_edge_keys),
+            batch_entries, 'alias edges')
         end = time.time()
         logging.info("making alias edges:{} seconds".format(end-start))
-        self.alias_nodes = alias_nodes
-        self.alias_edges = alias_edges
 
         return None
 
-    def retrieve_alias_nodes(self):
-        """Returns alias_edges"""
+    @staticmethod
+    def _build_in_batches(table_sizes: np.ndarray, build, batch_entries: int, name: str) -> AliasTables:
+        """Builds AliasTables by batches of consecutive tables, which are copied into the preallocated flat arrays.
 
-        return self.alias_nodes
+        Args:
+            table_sizes: A numpy int64 array with the number of entries of each table.
+            build: A function from an array of table indices to their AliasTables.
+            batch_entries: The number of entries of a batch, which is exceeded only by a batch with a single table.
+            name: The name of the tables for progress updates.
 
-    def retrieve_alias_edges(self):
-        """Returns alias_edges"""
+        Returns:
+            AliasTables with a table per entry of table_sizes.
+        """
 
-        return self.alias_edges
+        tables = AliasTables.empty(np.concatenate([[0], np.cumsum(table_sizes)]))
+        table_count = len(table_sizes)
+        start = 0
+        while start < table_count:
+            stop = max(int(np.searchsorted(tables.offsets, tables.offsets[start] + batch_entries, side='right')) - 1,
+                       start + 1)
+            stop = min(stop, table_count)
+            batch = build(np.arange(start, stop))
+            tables.j[tables.offsets[start]:tables.offsets[stop]] = batch.j
+            tables.q[tables.offsets[start]:tables.offsets[stop]] = batch.q
+            sys.stderr.write('\rmaking {} ({:03.1f}% done)'.format(name, 100 * stop / table_count))
+            start = stop
+        sys.stderr.write("\rDone making {}.\n".format(name))
+
+        return tables
+
+    def save_alias_tables(self, path: str) -> None:
+        """Writes the alias tables to a directory, from which N2vGraph(..., alias_tables=path) memory-maps them
+        instead of computing them again.
 
-    @staticmethod
-    def __alias_setup(probs):
-        """Compute utility lists for non-uniform sampling from discrete distributions.
-        Refer to:
-        https://lips.cs.princeton.edu/the-alias-method-efficient-sampling-with-many-discrete-outcomes/
+        Args:
+            path: The path of the directory, which is created if it does not exist.
+        """
+
+        os.makedirs(path, exist_ok=True)
+        for name, tables in (('alias_nodes', self.alias_nodes), ('alias_edges', self.alias_edges)):
+            if tables is not None:
+                tables.save(os.path.join(path, name))
+        with open(os.path.join(path, 'alias_tables.json'), 'w') as fh:
+            json.dump({'p': self.p, 'q': self.q, 'node_count': self.g.node_count(),
+                       'edge_count': self.g.edge_count()}, fh)
 
-        The alias method allows sampling from a discrete distribution in O(1) time.
-        This is used here to perform biased random walks more efficiently.
+    def load_alias_tables(self, path: str, mmap: bool = True) -> None:
+        """Reads alias tables written by save_alias_tables. In lazy mode, the alias edges are not read, so tables
+        saved by a lazy N2vGraph can be read.
 
         Args:
-            probs: The normalized probabilities, e.g., [0.4 0.28 0.32], for
-            transition to each neighbor.
+            path: The path of the directory written by save_alias_tables.
+            mmap: If True, the tables are memory-mapped read-only, so that processes share one copy.
 
-        Returns:
-            :param j: numpy array J for sampling from non-uniform distribution, to be
-            used in alias_draw()
-            :param q: numpy array q for sampling from non-uniform distribution, to be
-            used in alias_draw()
+        Raises:
+            ValueError: If the directory cannot be found, or its tables were computed for another graph, p or q.
         """
-        k = len(probs)
-        q = np.zeros(k)
-        j = np.zeros(k, dtype=np.int)
-        smaller = []
-        larger = []
-
-        for kk, prob in enumerate(probs):
-            q[kk] = k * prob
-            if q[kk] < 1.0:
-                smaller.append(kk)
-            else:
-                larger.append(kk)
 
-        while len(smaller) > 0 and len(larger) > 0:
-            small = smaller.pop()
-            large = larger.pop()
+        if not os.path.isdir(path):
+            raise ValueError('Could not find alias table directory {}'.format(path))
+        with open(os.path.join(path, 'alias_tables.json')) as fh:
+            metadata = json.load(fh)
+        expected = {'p': self.p, 'q': self.q, 'node_count': self.g.node_count(), 'edge_count': self.g.edge_count()}
+        if metadata != expected:
+            raise ValueError('The alias tables in {} are for {}, not {}'.format(path, metadata, expected))
 
-            j[small] = large
-            q[large] = q[large] + q[small] - 1.0
+        self.alias_nodes = None if self.uniform_nodes else \
+            AliasTables.load(os.path.join(path, 'alias_nodes'), mmap=mmap)
+        self.alias_edges = None if self.uniform_edges or self.lazy else \
+            AliasTables.load(os.path.join(path, 'alias_edges'), mmap=mmap)
 
-            if q[large] < 1.0:
-                smaller.append(large)
-            else:
-                larger.append(large)
-        return j, q
+    def retrieve_alias_nodes(self) -> AliasTableMap:
+        """Returns the alias tables of the nodes, as a read-only map from node index to (j, q)."""
+
+        return AliasTableMap(self.alias_nodes, self.g)
+
+    def retrieve_alias_edges(self) -> AliasTableMap:
+        """Returns the alias tables of the edges, as a read-only map from (source, destination) to (j, q)."""
+
+        return AliasTableMap(self.alias_edges, self.g, edges=True)
 
     @staticmethod
     def alias_draw(j, q) -> int:
         """Draw sample from a non-uniform discrete distribution using alias sampling.
-        (See :func:`~embiggen.N2vGraph.__alias_setup`)
+        (See :func:`~embiggen.alias_tables.build_alias_tables`)
 
         Args:
-        :param j: numpy array for J generated by __alias_setup
-        :param q: numpy array for q generated by __alias_setup
+        :param j: numpy array for J of an alias table
+        :param q: numpy array for q of an alias table
 
         Returns:
         :param q: index of random sample from non-uniform discrete distribution
@@ -315,3 +531,111 @@ class N2vGraph:
         """
 
         return 'Graph'
+
+
+# the walker and the shared walk arrays of a worker process of N2vGraph._walk_in_pool
+_shared_walker: Dict[str, object] = {}
+
+
+def _shared_memory():
+    """Returns the multiprocessing.shared_memory module, or None on Python versions before 3.8, which do not have
+    it."""
+
+    try:
+        return importlib.import_module('multiprocessing.shared_memory')
+    except ImportError:
+        return None
+
+
+def _share_arrays(arrays: Dict[str, np.ndarray],
+                  directory: Optional[str] = None) -> Tuple[List, Dict[str, np.ndarray], Dict[str, Tuple]]:
+    """Copies arrays into new blocks of shared memory, or into memory-mapped files if a directory is given.
+
+    Args:
+        arrays: The arrays to share, by name.
+        directory: The directory of the memory-mapped files, or None to use multiprocessing.shared_memory.
+
+    Returns:
+        The blocks of shared memory, which the caller must release with _release_blocks, the shared copy of each
+        array and the (block name or file path, shape, dtype) of each array, by name, which _attach_array reads.
+    """
+
+    blocks: List = []
+    shared = {}
+    specs = {}
+    try:
+        for name, array in arrays.items():
+            if directory is None:
+                blocks.append(_shared_memory().SharedMemory(create=True, size=max(array.nbytes, 1)))
+                location = blocks[-1].name
+            else:
+                location = os.path.join(directory, name + '.npy')
+                np.lib.format.open_memmap(location, mode='w+', dtype=array.dtype, shape=array.shape)
+            specs[name] = (directory is None, location, array.shape, array.dtype.str)
+            shared[name] = _attach_array(specs[name], blocks[-1] if directory is None else None)
+            shared[name][...] = array
+    except BaseException:
+        shared.clear()
+        _release_blocks(blocks, unlink=True)
+        raise
+
+    return blocks, shared, specs
+
+
+def _attach_array(spec: Tuple, block=None) -> np.ndarray:
+    """Returns the numpy array described by a spec of _share_arrays, backed by the given block of shared memory or
+    by its memory-mapped file."""
+
+    in_shared_memory, location, shape, dtype = spec
+    if not in_shared_memory:
+        return np.load(location, mmap_mode='r+')
+
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+
+def _release_blocks(blocks: List, unlink: bool = False) -> None:
+    """Closes blocks of shared memory and, if unlink is True, frees them."""
+
+    for block in blocks:
+        block.close()
+        if unlink:
+            block.unlink()
+
+
+def _attach_walker(specs: Dict[str, Tuple], config: Dict[str, object]) -> None:
+    """Initializes a worker process of N2vGraph._walk_in_pool, by attaching to the shared arrays once and building a
+    walker on them."""
+
+    blocks: List = []
+    arrays = {}
+    for name, spec in specs.items():
+        if spec[0]:
+            blocks.append(_shared_memory().SharedMemory(name=spec[1]))
+        arrays[name] = _attach_array(spec, blocks[-1] if spec[0] else None)
+
+    graph = CSFGraph.__new__(CSFGraph)
+    graph._init_attributes()
+    graph.directed = config['directed']
+    graph.offset_to_edge_, graph.edge_to = arrays['offset_to_edge_'], arrays['edge_to']
+
+    walker = N2vGraph.__new__(N2vGraph)
+    walker.g, walker.p, walker.q = graph, config['p'], config['q']
+    walker.uniform_nodes, walker.uniform_edges, walker.lazy = \
+        config['uniform_nodes'], config['uniform_edges'], config['lazy']
+    for name in ('alias_nodes', 'alias_edges'):
+        setattr(walker, name, AliasTables(arrays[name + '.offsets'], arrays[name + '.j'], arrays[name + '.q'])
+                if name + '.offsets' in arrays else None)
+
+    _shared_walker.update(walker=walker, blocks=blocks, start_nodes=arrays['start_nodes'], walks=arrays['walks'],
+                          lengths=arrays['lengths'])
+
+
+def _walk_shared_chunk(args: Tuple[int, int, int]) -> None:
+    """Simulates the walks start:stop of N2vGraph._walk_in_pool with the given seed, in a worker process."""
+
+    start, stop, seed = args
+    np.random.seed(seed)
+    walks, lengths = _shared_walker['walker'].walk_batch(_shared_walker['start_nodes'][start:stop],
+                                                         _shared_walker['walks'].shape[1])
+    _shared_walker['walks'][start:stop] = walks
+    _shared_walker['lengths'][start:stop] = lengths
@@ -10,6 +10,8 @@ from pandas.core.common import flatten  # type: ignore
 from tensorflow.keras.preprocessing.text import Tokenizer  # type: ignore  # pylint: disable=import-error
 from typing import Dict, List, Optional, Tuple, Union
 
+from embiggen.utils.file_utils import open_text
+
 
 class TextEncoder:
     """This class takes as input a file containing text that we want to encode as integers for Word2Vec. It cleanses the
@@ -131,7 +133,7 @@ class TextEncoder:
         print('Reading {file} and processing it as {data_type}'.format(file=self.filename, data_type=self.data_type))
 
         if self.data_type == 'words':
-            with open(self.filename, 'r') as input_file:
+            with open_text(self.filename) as input_file:
                 word_data = input_file.read()
             input_file.close()
             return self.clean_text(word_data).split()
@@ -140,7 +142,7 @@ class TextEncoder:
                 data = pd.read_csv(self.filename, sep=self.delimiter, header=self.header)
                 sentence_data = list(data[list(data).index(self.payload_index)])
             else:
-                with open(self.filename, 'r') as input_file:
+                with open_text(self.filename) as input_file:
                     sentence_data = input_file.readlines()
                 input_file.close()
             return [self.clean_text(sent) for sent in sentence_data]
@@ -0,0 +1,148 @@
+import bz2
+import gzip
+import io
+import lzma
+import queue
+import threading
+from typing import BinaryIO, Callable, Dict, Optional, TextIO
+
+# the first bytes of the files written by each supported compressor
+MAGIC_NUMBERS: Dict[str, bytes] = {
+    'gzip': b'\x1f\x8b',
+    'bz2': b'BZh',
+    'xz': b'\xfd7zXZ\x00',
+    'zstd': b'\x28\xb5\x2f\xfd',
+}
+
+
+def _open_zstd(path: str) -> BinaryIO:
+    try:
+        import zstandard  # type: ignore
+    except ImportError:
+        raise ImportError('Reading zstd-compressed file {} requires the zstandard package '
+                          '(pip install zstandard)'.format(path))
+
+    return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+
+
+OPENERS: Dict[str, Callable[[str], BinaryIO]] = {
+    'gzip': lambda path: gzip.open(path, 'rb'),
+    'bz2': lambda path: bz2.open(path, 'rb'),
+    'xz': lambda path: lzma.open(path, 'rb'),
+    'zstd': _open_zstd,
+}
+
+
+def detect_compression(path: str) -> Optional[str]:
+    """Detects the compression of a file from its first bytes.
+
+    Args:
+        path: The path to the file.
+
+    Returns:
+        The name of the compression ('gzip', 'bz2', 'xz' or 'zstd'), or None if the file is not compressed with any
+        of them.
+    """
+
+    with open(path, 'rb') as fh:
+        head = fh.read(max(len(magic) for magic in MAGIC_NUMBERS.values()))
+
+    for compression, magic in MAGIC_NUMBERS.items():
+        if head.startswith(magic):
+            return compression
+
+    return None
+
+
+class ThreadedDecompressor(io.RawIOBase):
+    """Read-only binary stream that decompresses a file in a background thread.
+
+    The thread reads blocks of decompressed bytes ahead of the reader into a bounded queue, so decompression overlaps
+    with the parsing of the previous blocks and at most max_blocks blocks are held in memory.
+
+    Attributes:
+        block_size: The number of decompressed bytes read by the thread at a time.
+    """
+
+    def __init__(self, stream: BinaryIO, block_size: int = 1 << 20, max_blocks: int = 8):
+        super().__init__()
+        self.block_size = block_size
+        self._stream = stream
+        self._blocks: queue.Queue = queue.Queue(maxsize=max_blocks)
+        self._buffer = memoryview(b'')
+        self._done = False
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._decompress, daemon=True)
+        self._thread.start()
+
+    def _decompress(self) -> None:
+        try:
+            while not self._stopped.is_set():
+                block = self._stream.read(self.block_size)
+                self._put(block)
+                if not block:
+                    break
+        except Exception as e:
+            self._put(e)
+        finally:
+            self._stream.close()
+
+    def _put(self, item) -> None:
+        # wait for room in the queue, but give up if the reader was closed
+        while not self._stopped.is_set():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer and not self._done:
+            block = self._blocks.get()
+            if isinstance(block, Exception):
+                self._done = True
+                raise block
+            if not block:
+                self._done = True
+            self._buffer = memoryview(block)
+
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+    def close(self) -> None:
+        if not self.closed:
+            self._stopped.set()
+            self._thread.join()
+        super().close()
+
+
+def open_text(path: str, encoding: str = 'utf-8') -> TextIO:
+    """Opens a text file for reading, transparently decompressing it if it is compressed with gzip, bz2, xz or zstd.
+
+    The compression is detected from the first bytes of the file, not from its extension. Compressed files are
+    streamed: they are decompressed in a background thread while they are read, and never written to disk.
+    zstd-compressed files require the optional zstandard package.
+
+    Args:
+        path: The path to the file.
+        encoding: The encoding of the text.
+
+    Returns:
+        A text stream, to be used like the object returned by open(path, 'r').
+
+    Raises:
+        ImportError: If the file is compressed with zstd and the zstandard package is not installed.
+    """
+
+    compression = detect_compression(path)
+    if compression is None:
+        return open(path, 'r', encoding=encoding)
+
+    raw = ThreadedDecompressor(OPENERS[compression](path))
+
+    return io.TextIOWrapper(io.BufferedReader(raw), encoding=encoding)
@@ -1,3 +1,4 @@
+import json
 import logging
 import sys
 import tempfile
@@ -10,6 +11,8 @@ import embiggen
 from embiggen import CSFGraph
 from embiggen.word2vec import SkipGramWord2Vec
 from embiggen import LinkPrediction
+from embiggen.csf_graph import load_graphs, split_edges
+from embiggen.csf_graph.graph_report import graph_report as csf_graph_report, write_graph_report
 from embiggen.utils import write_embeddings
 
 @click.group()
@@ -112,12 +115,9 @@ def cli():
 def karate_test(pos_train_file, pos_valid_file, pos_test_file, neg_train_file, neg_valid_file, neg_test_file,
                 embed_graph, p, q, walk_length, num_walks,num_epochs, classifier, edge_embed_method,
                 skipValidation, output, embedding_size, learning_rate, context_window):
-    pos_train_graph = CSFGraph(pos_train_file)
-    pos_valid_graph = CSFGraph(pos_valid_file)
-    pos_test_graph = CSFGraph(pos_test_file)
-    neg_train_graph = CSFGraph(neg_train_file)
-    neg_valid_graph = CSFGraph(neg_valid_file)
-    neg_test_graph = CSFGraph(neg_test_file)
+    pos_train_graph, pos_valid_graph, pos_test_graph, neg_train_graph, neg_valid_graph, neg_test_graph = \
+        load_graphs([pos_train_file, pos_valid_file, pos_test_file, neg_train_file, neg_valid_file, neg_test_file],
+                    edge_list_only=True)
     # Graph (node) embeding using SkipGram as the word2vec model, with 2 epochs.
     graph = embiggen.random_walk_generator.N2vGraph(pos_train_graph, p, q)
     walks = graph.simulate_walks(num_walks, walk_length)
@@ -137,6 +137,47 @@ def karate_test(pos_train_file, pos_valid_file, pos_test_file, neg_train_file, n
     lp.predict_links()
     lp.output_classifier_results()
 
+
+@cli.command()
+@click.option("edge_file", "-e", type=click.Path(exists=True), required=True)
+@click.option("node_file", "-n", type=click.Path(exists=True), default=None)
+@click.option("output", "-o", default=None, help="JSON file to write the report to, by default standard output")
+@click.option("p", "-p", type=float, default=1)
+@click.option("q", "-q", type=float, default=1)
+@click.option("weight_dtype", "-weight_dtype", type=click.Choice(CSFGraph.WEIGHT_DTYPES), default='float32')
+@click.option("sample_size", "-sample_size", type=int, default=1000,
+              help="number of nodes and edges whose alias tables are built to estimate the preprocessing cost")
+@click.option("--directed/--undirected", default=False, help="store each edge only in its given direction")
+def graph_report(edge_file, node_file, output, p, q, weight_dtype, sample_size, directed):
+    """Writes statistics of a graph as JSON, including the estimated cost of its node2vec alias tables."""
+    graph = CSFGraph(edge_file, node_file=node_file, weight_dtype=weight_dtype, directed=directed)
+    if output is None:
+        click.echo(json.dumps(csf_graph_report(graph, p=p, q=q, sample_size=sample_size), indent=2))
+    else:
+        write_graph_report(graph, output, p=p, q=q, sample_size=sample_size)
+
+
+@cli.command()
+@click.option("edge_file", "-e", type=click.Path(exists=True), required=True)
+@click.option("node_file", "-n", type=click.Path(exists=True), default=None)
+@click.option("output_dir", "-o", default='split', help="directory to write the six edge files to")
+@click.option("validation_fraction", "-v", type=float, default=0.1)
+@click.option("test_fraction", "-t", type=float, default=0.1)
+@click.option("negative_ratio", "-r", type=float, default=1.0,
+              help="number of negative edges per positive edge of each set")
+@click.option("--keep_connected/--allow_disconnected", default=True)
+@click.option("--directed/--undirected", default=False, help="store each edge only in its given direction")
+@click.option("seed", "-s", type=int, default=None)
+def split_graph(edge_file, node_file, output_dir, validation_fraction, test_fraction, negative_ratio, keep_connected,
+                directed, seed):
+    """Splits a graph into positive and negative training, validation and test edge files for link prediction."""
+    graph = CSFGraph(edge_file, node_file=node_file, directed=directed)
+    split = split_edges(graph, validation_fraction=validation_fraction, test_fraction=test_fraction,
+                        negative_ratio=negative_ratio, keep_connected=keep_connected, random_state=seed)
+    for path in split.save(output_dir):
+        logging.info('Wrote {}'.format(path))
+
+
 @cli.command()
 @click.option("test_url", "-t", default="https://www.gutenberg.org/files/98/98-0.txt")
 @click.option('--algorithm',
@@ -5,8 +5,13 @@ from embiggen.glove import GloVeModel
 from embiggen.word2vec import SkipGramWord2Vec
 from embiggen.word2vec import ContinuousBagOfWordsWord2Vec
 from embiggen import LinkPrediction
+from embiggen.csf_graph import load_graphs
 from embiggen.utils import write_embeddings, serialize, deserialize
+import hashlib
+import json
 import os
+import shutil
+import tempfile
 import logging
 import time
 
@@ -104,6 +109,29 @@ def parse_args():
                         help='Cache the random walks generated from pos_train CsfGraph. \
                         (--random_walks argument must be defined)')
 
+    parser.add_argument('--graph_cache', type=str,
+                        help='Directory in which the pos_train graph is stored in binary format. A graph found there \
+                        is memory-mapped instead of parsing the edge file, otherwise it is parsed and stored there. \
+                        Graphs are keyed on the path, size and modification time of the edge file and on the \
+                        CSFGraph arguments')
+
+    parser.add_argument('--weight_dtype', nargs='?', default='float32',
+                        help="Type in which edge weights are stored: float64, float32, float16 or unweighted. "
+                             "Unweighted graphs take no memory for weights and are walked by uniform sampling when "
+                             "p and q are 1. Default is float32.")
+
+    parser.add_argument('--duplicate_policy', nargs='?', default='first',
+                        help="What to do with rows of an edge file read into a CSFGraph that repeat an earlier edge: "
+                             "first, sum, max or error. Default is first.")
+
+    parser.add_argument('--drop_self_loops', action='store_true',
+                        help='Drop the rows of edge files read into a CSFGraph with the same source and destination '
+                             'node.')
+
+    parser.add_argument('--lazy_walks', action='store_true',
+                        help='Draw the second-order steps of the walks by rejection sampling instead of precomputing '
+                             'alias tables for every edge, which take memory in the sum of the squared degrees.')
+
     parser.add_argument('--use_cached_random_walks', action='store_true',
                         help='Use the cached version of random walks. \
                         (--random_walks argument must be defined)\
@@ -170,19 +198,72 @@ def linkpred(pos_train_graph, pos_valid_graph, pos_test_graph, neg_train_graph,
     #lp.predicted_ppi_links()
     #lp.predicted_ppi_non_links()
 
+def graph_args():
+    """
+    Collects the CSFGraph arguments given on the command line
+    :return: dictionary of keyword arguments for CSFGraph
+    """
+    return {'weight_dtype': args.weight_dtype, 'duplicate_policy': args.duplicate_policy,
+            'keep_self_loops': not args.drop_self_loops}
+
+
+def graph_cache_dir(edge_file):
+    """
+    Names the directory of --graph_cache in which the graph of an edge file is stored. The name ends in a hash of the
+    resolved path, size and modification time of the edge file and of the CSFGraph arguments, so that edge files with
+    the same name in different directories, changed edge files and different arguments get different directories
+    :param edge_file: path to the edge file
+    :return: path of the directory
+    """
+    stat = os.stat(edge_file)
+    key = json.dumps([os.path.realpath(edge_file), stat.st_size, stat.st_mtime_ns, graph_args()], sort_keys=True)
+    return os.path.join(args.graph_cache, '{}-{}'.format(os.path.basename(edge_file),
+                                                         hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]))
+
+
+def read_graph(edge_file):
+    """
+    Reads an edge file with CSFGraph, or loads it from --graph_cache if it was stored there before. A new graph is
+    written to a temporary directory that is renamed into place once it is complete, so that an interrupted run does
+    not leave a partial graph in the cache
+    :param edge_file: path to the edge file
+    :return: graph in CSFGraph format
+    """
+    if not args.graph_cache:
+        return CSFGraph(edge_file, **graph_args())
+
+    graph_dir = graph_cache_dir(edge_file)
+    if os.path.isdir(graph_dir):
+        return CSFGraph.load(graph_dir)
+
+    graph = CSFGraph(edge_file, **graph_args())
+    os.makedirs(args.graph_cache, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=args.graph_cache)
+    try:
+        graph.save(tmp_dir)
+        os.rename(tmp_dir, graph_dir)
+    except OSError:
+        # another run stored the same graph first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.isdir(graph_dir):
+            raise
+    return graph
+
+
 def read_graphs():
     """
-    Reads pos_train, pos_vslid, pos_test, neg_train train_valid and neg_test edges with CSFGraph
-    :return: pos_train, pos_valid, pos_test, neg_train, neg_valid and neg_test graphs in CSFGraph format
+    Reads pos_train, pos_vslid, pos_test, neg_train train_valid and neg_test edges. Only pos_train is read with
+    CSFGraph, or loaded from --graph_cache; the other sets are only enumerated by LinkPrediction, so they are read
+    concurrently into edge lists keyed to the nodes of pos_train
+    :return: pos_train graph in CSFGraph format, and pos_valid, pos_test, neg_train, neg_valid and neg_test edge lists
     """
     start = time.time()
 
-    pos_train_graph = CSFGraph(args.pos_train)
-    pos_valid_graph = CSFGraph(args.pos_valid)
-    pos_test_graph = CSFGraph(args.pos_test)
-    neg_train_graph = CSFGraph(args.neg_train)
-    neg_valid_graph = CSFGraph(args.neg_valid)
-    neg_test_graph = CSFGraph(args.neg_test)
+    edge_files = [args.pos_train, args.pos_valid, args.pos_test, args.neg_train, args.neg_valid, args.neg_test]
+    pos_train_graph = read_graph(args.pos_train) if args.graph_cache else None
+    graphs = load_graphs(edge_files, edge_list_only=True, processes=args.workers, first_graph=pos_train_graph,
+                         **graph_args())
+    pos_train_graph, pos_valid_graph, pos_test_graph, neg_train_graph, neg_valid_graph, neg_test_graph = graphs
     end = time.time()
     logging.info("reading input edge lists files: {} seconds".format(end-start))
 
@@ -216,7 +297,7 @@ def main(args):
 
     else:
         # generate pos_train_g and simulate walks
-        pos_train_g = N2vGraph(pos_train_graph, args.p, args.q)
+        pos_train_g = N2vGraph(pos_train_graph, args.p, args.q, num_processes=args.workers, lazy=args.lazy_walks)
     start = time.time()
     pos_train_g.simulate_walks(args.num_walks, args.walk_length, args.use_cached_random_walks)
     end = time.time()
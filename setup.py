@@ -19,6 +19,7 @@ test_deps = [
 
 extras = {
     'test': test_deps,
+    'zstd': ['zstandard'],
 }
 
 setup(
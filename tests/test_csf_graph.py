@@ -1,8 +1,16 @@
 from unittest import TestCase
 import os.path
+import tempfile
+import bz2
+import gzip
+from collections.abc import Mapping
+import numpy as np  # type: ignore
 from embiggen import CSFGraph
+from embiggen.csf_graph.csr_builder import build_symmetric_csr
+from embiggen.csf_graph.node_order import bfs_order, degree_order
+from embiggen.csf_graph.edge import Edge
 from embiggen.csf_graph.csf_graph import CSFGraphNoSubjectColumnError, \
-    CSFGraphNoObjectColumnError
+    CSFGraphNoObjectColumnError, CSFGraphDuplicateEdgeError
 
 
 class TestCSFGraph(TestCase):
@@ -48,10 +56,10 @@ class TestCSFGraph(TestCase):
 
     # check nodetype to index map
     def test_csfgraph_makes_nodetype_to_index_map(self):
-        self.assertIsInstance(self.g.nodetype_to_index_map, dict)
+        self.assertIsInstance(self.g.nodetype_to_index_map, Mapping)
 
     def test_csfgraph_assigns_default_nodetype_to_nodetype_to_index_map(self):
-        self.assertIsInstance(self.g.nodetype_to_index_map, dict)
+        self.assertIsInstance(self.g.nodetype_to_index_map, Mapping)
         self.assertEqual(self.g.nodetype_to_index_map[self.g.default_node_type],
                          list(range(self.g.node_count())))
 
@@ -61,7 +69,7 @@ class TestCSFGraph(TestCase):
 
     # check index to nodetype map
     def test_csfgraph_makes_index_to_nodetype_map(self):
-        self.assertIsInstance(self.g.index_to_nodetype_map, dict)
+        self.assertIsInstance(self.g.index_to_nodetype_map, Mapping)
 
     def test_csfgraph_populates_index_to_nodetype_map(self):
         het_g = CSFGraph(edge_file=self.edge_file, node_file=self.node_file)
@@ -78,7 +86,7 @@ class TestCSFGraph(TestCase):
 
     # edgetype to index map
     def test_csfgraph_makes_edgetype_to_index_map(self):
-        self.assertIsInstance(self.g.edgetype_to_index_map, dict)
+        self.assertIsInstance(self.g.edgetype_to_index_map, Mapping)
 
     def test_csfgraph_populates_edgetype_to_index_map(self):
         self.assertCountEqual(self.g.edgetype_to_index_map.keys(),
@@ -89,13 +97,18 @@ class TestCSFGraph(TestCase):
 
     # check index to edgetype map
     def test_csfgraph_constructor_makes_index_to_edgetype_map(self):
-        self.assertIsInstance(self.g.index_to_edgetype_map, dict)
+        self.assertIsInstance(self.g.index_to_edgetype_map, Mapping)
 
     def test_csfgraph_populates_index_to_edgetype_map(self):
         self.assertEqual(42, len(self.g.index_to_edgetype_map))
         self.assertEqual(self.g.index_to_edgetype_map[0], 'biolink:interacts_with')
         self.assertEqual(self.g.index_to_edgetype_map[34], 'biolink:molecularly_interacts_with')
         self.assertEqual(self.g.index_to_edgetype_map[40], 'biolink:molecularly_interacts_with')
+        self.assertIs(type(self.g.index_to_edgetype_map[0]), str)
+        self.assertIs(type(self.g.edge_types[0]), str)
+        self.assertIs(type(next(iter(self.g.edgetype_to_index_map))), str)
+        subgraph = self.g.subgraph(['g1', 'g2', 'g3'])
+        self.assertTrue(all(type(edge_type) is str for edge_type in subgraph.edgetype2count_dictionary))
 
     def test_csfgraph_requires_arg(self):
         with self.assertRaises(Exception) as context:
@@ -212,3 +225,519 @@ class TestCSFGraph(TestCase):
         self.assertEqual(4, self.g.node_degree(node_2))
         self.assertEqual(3, self.g.node_degree(node_3))
 
+
+    def test_csr_matches_sorted_edge_set(self):
+        # build the arrays the way the graph used to be built, from a sorted set of Edge objects
+        edges = set()
+        with open(self.edge_file) as f:
+            _ = f.readline()
+            for line in f:
+                node_a, edge_type, node_b, _, weight = line.rstrip('\n').split('\t')
+                edges.add(Edge(node_a, node_b, float(weight), edge_type))
+                edges.add(Edge(node_b, node_a, float(weight), edge_type))
+        edge_list = sorted(edges)
+        node_to_index = self.g.node_to_index_map
+        expected_offsets = [0]
+        for node in sorted(node_to_index, key=node_to_index.get):
+            expected_offsets.append(expected_offsets[-1] + sum(e.node_a == node for e in edge_list))
+        self.assertEqual(expected_offsets, self.g.offset_to_edge_.tolist())
+        self.assertEqual([node_to_index[e.node_b] for e in edge_list], self.g.edge_to.tolist())
+        self.assertEqual([int(e.weight) for e in edge_list], self.g.edge_weight.tolist())
+        self.assertEqual([e.edge_type for e in edge_list],
+                         [self.g.index_to_edgetype_map[i] for i in range(len(edge_list))])
+
+    def test_build_symmetric_csr_keeps_first_duplicate(self):
+        # edges 0-1 (twice, in both directions), a self-loop on 2 and 1-2
+        src = np.array([0, 1, 2, 1])
+        dst = np.array([1, 0, 2, 2])
+        weights = np.array([5, 7, 3, 1])
+        offsets, edge_to, edge_weight = build_symmetric_csr(src, dst, 3, weights)
+        self.assertEqual([0, 1, 3, 5], offsets.tolist())
+        self.assertEqual([1, 0, 2, 1, 2], edge_to.tolist())
+        self.assertEqual([5, 5, 1, 1, 3], edge_weight.tolist())
+
+    def test_chunked_reading_gives_same_graph(self):
+        g = CSFGraph(edge_file=self.edge_file, node_file=self.node_file, chunk_size=4)
+        het_g = CSFGraph(edge_file=self.edge_file, node_file=self.node_file)
+        self.assertEqual(het_g.offset_to_edge_.tolist(), g.offset_to_edge_.tolist())
+        self.assertEqual(het_g.edge_to.tolist(), g.edge_to.tolist())
+        self.assertEqual(het_g.edge_weight.tolist(), g.edge_weight.tolist())
+        self.assertEqual(het_g.index_to_edgetype_map, g.index_to_edgetype_map)
+        self.assertEqual(het_g.edgetype2count_dictionary, g.edgetype2count_dictionary)
+
+    def test_chunked_reading_legacy_edge_file(self):
+        g = CSFGraph(edge_file=self.legacy_edge_file, chunk_size=2)
+        self.assertEqual(3, g.node_count())
+        self.assertEqual(6, g.edge_count())
+        self.assertEqual(10, g.weight('g1', 'g3'))
+
+    def test_save_and_load(self):
+        het_g = CSFGraph(edge_file=self.edge_file, node_file=self.node_file)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            graph_dir = os.path.join(tmp_dir, 'small_graph')
+            het_g.save(graph_dir)
+            for mmap in (True, False):
+                g = CSFGraph.load(graph_dir, mmap=mmap)
+                self.assertEqual(mmap, isinstance(g.edge_to, np.memmap))
+                self.assertEqual(het_g.offset_to_edge_.tolist(), g.offset_to_edge_.tolist())
+                self.assertEqual(het_g.edge_to.tolist(), g.edge_to.tolist())
+                self.assertEqual(het_g.edge_weight.tolist(), g.edge_weight.tolist())
+                self.assertEqual(het_g.node_to_index_map, g.node_to_index_map)
+                self.assertEqual(het_g.index_to_nodetype_map, g.index_to_nodetype_map)
+                self.assertEqual(het_g.nodetype_to_index_map, g.nodetype_to_index_map)
+                self.assertEqual(het_g.nodetype2count_dictionary, g.nodetype2count_dictionary)
+                self.assertEqual(het_g.index_to_edgetype_map, g.index_to_edgetype_map)
+                self.assertEqual(het_g.edgetype_to_index_map, g.edgetype_to_index_map)
+                self.assertEqual(het_g.edgetype2count_dictionary, g.edgetype2count_dictionary)
+                self.assertEqual(het_g.duplicate_edge_count, g.duplicate_edge_count)
+                self.assertEqual(['g4', 'p2', 'p3'], g.neighbors('p4'))
+                del g
+
+    def test_load_requires_directory(self):
+        with self.assertRaises(ValueError):
+            CSFGraph.load(self.edge_file)
+
+    def test_edge_index(self):
+        g1, g2, p4 = (self.g.node_to_index_map[n] for n in ('g1', 'g2', 'p4'))
+        i = self.g.edge_index(g1, g2)
+        self.assertEqual(g2, self.g.edge_to[i])
+        self.assertTrue(self.g.offset_to_edge_[g1] <= i < self.g.offset_to_edge_[g1 + 1])
+        self.assertIsNone(self.g.edge_index(g1, p4))
+        self.assertIsNone(self.g.weight('g1', 'p4'))
+        self.assertTrue(self.g.has_edge('p4', 'g4'))
+        self.assertFalse(self.g.has_edge('p4', 'g1'))
+
+    def test_batched_edge_lookups(self):
+        n = self.g.node_count()
+        sources, dests = np.divmod(np.arange(n * n), n)
+        indices = self.g.edge_indices(sources, dests)
+        weights = self.g.weights_from_ints(sources, dests)
+        has_edges = self.g.has_edges(sources, dests)
+        for src, dst, i, weight, has_edge in zip(sources, dests, indices, weights, has_edges):
+            expected_weight = self.g.weight_from_ints(src, dst)
+            self.assertEqual(self.g.edge_index(src, dst), None if i == -1 else i)
+            self.assertEqual(expected_weight is not None, has_edge)
+            if expected_weight is None:
+                self.assertTrue(np.isnan(weight))
+            else:
+                self.assertEqual(expected_weight, weight)
+
+    def test_neighbors_view(self):
+        p4_idx = self.g.node_to_index_map['p4']
+        nbrs = self.g.neighbors_view(p4_idx)
+        weights = self.g.neighbor_weights_view(p4_idx)
+        self.assertEqual([6, 8, 9], nbrs.tolist())
+        self.assertEqual([10, 10, 8], weights.tolist())
+        # views share memory with the graph arrays and cannot be written to
+        self.assertTrue(np.shares_memory(nbrs, self.g.edge_to))
+        self.assertTrue(np.shares_memory(weights, self.g.edge_weight))
+        with self.assertRaises(ValueError):
+            nbrs[0] = 0
+
+    def test_type_codes(self):
+        het_g = CSFGraph(edge_file=self.edge_file, node_file=self.node_file)
+        self.assertEqual(np.uint8, het_g.node_type_codes.dtype)
+        self.assertEqual(np.uint8, het_g.edge_type_codes.dtype)
+        self.assertEqual(het_g.node_count(), len(het_g.node_type_codes))
+        self.assertEqual(het_g.edge_count(), len(het_g.edge_type_codes))
+        self.assertEqual('biolink:Disease', het_g.node_types[het_g.node_type_codes[0]])
+        self.assertEqual(['biolink:interacts_with', 'biolink:molecularly_interacts_with'], het_g.edge_types)
+        with self.assertRaises(KeyError):
+            het_g.index_to_nodetype_map[het_g.node_count()]
+        with self.assertRaises(KeyError):
+            het_g.nodetype_to_index_map['biolink:NotAType']
+
+    def test_weight_dtype(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            edge_file = os.path.join(tmp_dir, 'fractional_edges.tsv')
+            with open(edge_file, 'w') as fh:
+                fh.write('subject\tobject\tweight\ng1\tg2\t0.25\ng2\tg3\t2.5\n')
+            for weight_dtype in ('float64', 'float32', 'float16'):
+                g = CSFGraph(edge_file=edge_file, weight_dtype=weight_dtype)
+                self.assertEqual(np.dtype(weight_dtype), g.edge_weight.dtype)
+                self.assertTrue(g.is_weighted())
+                self.assertEqual(0.25, g.weight('g1', 'g2'))
+                self.assertEqual(2.5, g.weight('g3', 'g2'))
+        with self.assertRaises(ValueError):
+            CSFGraph(edge_file=self.edge_file, weight_dtype='int32')
+
+    def test_unweighted(self):
+        g = CSFGraph(edge_file=self.edge_file, weight_dtype='unweighted')
+        self.assertFalse(g.is_weighted())
+        self.assertIsNone(g.edge_weight)
+        self.assertEqual(self.g.edge_to.tolist(), g.edge_to.tolist())
+        self.assertEqual(1, g.weight('d1', 'd3'))
+        self.assertIsNone(g.weight('g1', 'p4'))
+        p4_idx = g.node_to_index_map['p4']
+        self.assertEqual([1, 1, 1], g.neighbor_weights_view(p4_idx).tolist())
+        weights = g.weights_from_ints(np.array([p4_idx, p4_idx]), np.array([g.node_to_index_map['g4'], 0]))
+        self.assertEqual(1, weights[0])
+        self.assertTrue(np.isnan(weights[1]))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            graph_dir = os.path.join(tmp_dir, 'small_graph')
+            g.save(graph_dir)
+            self.assertFalse(os.path.exists(os.path.join(graph_dir, 'edge_weight.npy')))
+            self.assertFalse(CSFGraph.load(graph_dir, mmap=False).is_weighted())
+
+    def test_compressed_files(self):
+        het_g = CSFGraph(edge_file=self.edge_file, node_file=self.node_file)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            edge_file = os.path.join(tmp_dir, 'small_graph_edges.tsv.gz')
+            node_file = os.path.join(tmp_dir, 'small_graph_nodes.tsv.bz2')
+            with open(self.edge_file, 'rb') as fh, gzip.open(edge_file, 'wb') as out:
+                out.write(fh.read())
+            with open(self.node_file, 'rb') as fh, bz2.open(node_file, 'wb') as out:
+                out.write(fh.read())
+            g = CSFGraph(edge_file=edge_file, node_file=node_file, chunk_size=5)
+        self.assertEqual(het_g.edge_to.tolist(), g.edge_to.tolist())
+        self.assertEqual(het_g.edge_weight.tolist(), g.edge_weight.tolist())
+        self.assertEqual(het_g.index_to_nodetype_map, g.index_to_nodetype_map)
+        self.assertEqual(het_g.edgetype2count_dictionary, g.edgetype2count_dictionary)
+
+    def test_duplicate_edge_count(self):
+        self.assertEqual(0, CSFGraph(edge_file=self.edge_file).duplicate_edge_count)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            edge_file = os.path.join(tmp_dir, 'duplicate_edges.tsv')
+            with open(self.edge_file) as fh, open(edge_file, 'w') as out:
+                out.write(fh.read())
+                out.write('g1\tbiolink:interacts_with\tg2\tRO:0002616\t10\n')
+                out.write('g3\tbiolink:interacts_with\tg2\tRO:0002616\t10\n')
+            g = CSFGraph(edge_file=edge_file)
+        self.assertEqual(2, g.duplicate_edge_count)
+        self.assertEqual(CSFGraph(edge_file=self.edge_file).edge_count(), g.edge_count())
+
+    def test_duplicate_policy(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            edge_file = os.path.join(tmp_dir, 'duplicate_edges.tsv')
+            with open(self.edge_file) as fh, open(edge_file, 'w') as out:
+                out.write(fh.read())
+                out.write('g2\tbiolink:interacts_with\tg1\tRO:0002616\t5\n')
+                out.write('g1\tbiolink:molecularly_interacts_with\tg2\tRO:0002616\t30\n')
+            graphs = {policy: CSFGraph(edge_file=edge_file, duplicate_policy=policy)
+                      for policy in ('first', 'sum', 'max')}
+            with self.assertRaises(CSFGraphDuplicateEdgeError):
+                CSFGraph(edge_file=edge_file, duplicate_policy='error')
+            with self.assertRaises(ValueError):
+                CSFGraph(edge_file=edge_file, duplicate_policy='mean')
+        for policy, weight in (('first', 10), ('sum', 45), ('max', 30)):
+            g = graphs[policy]
+            self.assertEqual(2, g.duplicate_edge_count)
+            self.assertEqual(weight, g.weight('g1', 'g2'))
+            self.assertEqual(weight, g.weight('g2', 'g1'))
+            self.assertEqual('biolink:interacts_with', g.index_to_edgetype_map[g.edge_index(g.node_to_index_map['g1'],
+                                                                                          g.node_to_index_map['g2'])])
+            self.assertEqual(self.g.edge_count(), g.edge_count())
+        self.assertEqual(self.g.weight('g1', 'g3'), graphs['sum'].weight('g1', 'g3'))
+        CSFGraph(edge_file=self.edge_file, duplicate_policy='error')
+
+    def test_self_loops(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            edge_file = os.path.join(tmp_dir, 'self_loops.tsv')
+            with open(self.edge_file) as fh, open(edge_file, 'w') as out:
+                out.write(fh.read())
+                out.write('g1\tbiolink:interacts_with\tg1\tRO:0002616\t7\n')
+                out.write('g1\tbiolink:interacts_with\tg1\tRO:0002616\t3\n')
+            kept = CSFGraph(edge_file=edge_file, duplicate_policy='sum')
+            dropped = CSFGraph(edge_file=edge_file, keep_self_loops=False)
+        self.assertEqual(2, kept.self_loop_count)
+        self.assertEqual(1, kept.duplicate_edge_count)
+        self.assertEqual(self.g.edge_count() + 1, kept.edge_count())
+        self.assertEqual(1, kept.neighbors('g1').count('g1'))
+        self.assertEqual(10, kept.weight('g1', 'g1'))
+        self.assertEqual(2, dropped.self_loop_count)
+        self.assertEqual(0, dropped.duplicate_edge_count)
+        self.assertEqual(self.g.edges(), dropped.edges())
+        self.assertEqual(self.g.edgetype2count_dictionary, dropped.edgetype2count_dictionary)
+
+    def test_empty_edge_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            edge_file = os.path.join(tmp_dir, 'empty_edges.tsv')
+            with open(self.edge_file) as fh, open(edge_file, 'w') as out:
+                out.write(fh.readline())
+            empty = CSFGraph(edge_file=edge_file)
+            self_loop_file = os.path.join(tmp_dir, 'self_loop_edges.tsv')
+            with open(self_loop_file, 'w') as out:
+                out.write(open(edge_file).read())
+                out.write('g1\tbiolink:interacts_with\tg1\tRO:0002616\t7\n')
+            no_loops = CSFGraph(edge_file=self_loop_file, keep_self_loops=False)
+        for g in (empty, no_loops):
+            self.assertEqual(0, g.edge_count())
+            self.assertEqual(0, g.duplicate_edge_count)
+        self.assertEqual(0, empty.node_count())
+
+    def test_add_and_remove_edges(self):
+        g = CSFGraph(edge_file=self.edge_file, node_file=self.node_file)
+        node_to_index_map = dict(g.node_to_index_map)
+        edge_count = g.edge_count()
+        g1_neighbors = g.neighbors('g1')
+        interacts_with_count = g.edgetype2count_dictionary['biolink:interacts_with']
+
+        g.add_edges([('g1', 'p4'), ('g1', 'x1'), ('g1', 'g2'), ('g1', 'g2')], weights=[2.5, 3, 7, 8],
+                    edge_types=['biolink:interacts_with', 'biolink:new_type', 'biolink:interacts_with',
+                                'biolink:interacts_with'],
+                    node_types={'x1': 'biolink:Gene'})
+        g.remove_edges([('p4', 'g4'), ('g1', 'not_a_node')])
+        self.assertTrue(g.has_pending_updates())
+        self.assertFalse(g.has_edge('g1', 'p4'))
+
+        g.compact()
+        self.assertFalse(g.has_pending_updates())
+        # the indices of the existing nodes do not change and new nodes are added after them
+        for node, i in node_to_index_map.items():
+            self.assertEqual(i, g.node_to_index_map[node])
+        self.assertEqual(len(node_to_index_map), g.node_to_index_map['x1'])
+        self.assertEqual('biolink:Gene', g.index_to_nodetype_map[g.node_to_index_map['x1']])
+        # 2 new undirected edges, 1 removed; adding an existing edge keeps its weight
+        self.assertEqual(edge_count + 2, g.edge_count())
+        self.assertEqual(2.5, g.weight('p4', 'g1'))
+        self.assertEqual(3, g.weight('x1', 'g1'))
+        self.assertEqual(10, g.weight('g1', 'g2'))
+        self.assertFalse(g.has_edge('p4', 'g4'))
+        # neighbors are sorted by index, so the new node comes last
+        self.assertEqual(sorted(g1_neighbors + ['p4']) + ['x1'], g.neighbors('g1'))
+        self.assertEqual('biolink:new_type',
+                         g.index_to_edgetype_map[g.edge_index(g.node_to_index_map['g1'], g.node_to_index_map['x1'])])
+        self.assertEqual(1, g.edgetype2count_dictionary['biolink:new_type'])
+        # g1 - p4 is added and p4 - g4 removed, while the existing edge g1 - g2, added twice, is not counted again
+        self.assertEqual(interacts_with_count + 1 - 1, g.edgetype2count_dictionary['biolink:interacts_with'])
+
+        # the compacted graph is the graph read from the updated edge file
+        edges = sorted((src, dst, float(g.weight(src, dst))) for src, dst in g.edges())
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            edge_file = os.path.join(tmp_dir, 'edges.tsv')
+            with open(edge_file, 'w') as fh:
+                fh.write('subject\tobject\tweight\n')
+                fh.writelines('{}\t{}\t{}\n'.format(*edge) for edge in edges)
+            new_g = CSFGraph(edge_file=edge_file)
+        self.assertEqual(edges, sorted((src, dst, float(new_g.weight(src, dst))) for src, dst in new_g.edges()))
+
+    def test_node_vocabulary(self):
+        self.assertEqual(self.g.nodes(), list(self.g.node_vocabulary))
+        self.assertEqual(self.g.nodes(), [node_id.decode() for node_id in self.g.node_vocabulary.ids.tolist()])
+        self.assertEqual(self.g.nodes(), sorted(self.g.nodes()))
+        with self.assertRaises(KeyError):
+            self.g.node_to_index_map['not_a_node']
+        self.assertNotIn('not_a_node', self.g.node_to_index_map)
+        with self.assertRaises(ValueError):
+            self.g.get_node_index('not_a_node')
+        self.assertEqual(self.g.node_count(), len(self.g.index_to_node_map))
+
+    def test_edges_as_array(self):
+        edges = self.g.edges_as_array()
+        self.assertEqual(np.int32, edges.dtype)
+        self.assertEqual((2, self.g.edge_count()), edges.shape)
+        self.assertEqual(self.g.edges_as_ints(), list(zip(*edges.tolist())))
+        self.assertEqual(self.g.edges(), list(zip(*self.g.edges_as_id_array().tolist())))
+        self.assertEqual(('d1', 'd2'), self.g.edges()[0])
+
+    def test_iter_edge_chunks(self):
+        g = CSFGraph(edge_file=self.edge_file)
+        # removing all edges of a node leaves a node without edges between the chunks
+        g.remove_edges([('g2', nbr) for nbr in g.neighbors('g2')])
+        g.compact()
+        edges = g.edges_as_array()
+        for chunk_size in (1, 2, 3, 5, 8, 100):
+            chunks = list(g.iter_edge_chunks(chunk_size))
+            self.assertTrue(all(chunk.shape[1] <= chunk_size for chunk in chunks))
+            self.assertEqual(edges.tolist(), np.concatenate(chunks, axis=1).tolist())
+        chunks = list(g.iter_edge_chunks(7, as_ids=True))
+        self.assertEqual(g.edges(), [edge for chunk in chunks for edge in zip(*chunk.tolist())])
+
+    def test_subgraph(self):
+        het_g = CSFGraph(edge_file=self.edge_file, node_file=self.node_file)
+        nodes = ['g1', 'g2', 'g3', 'g4', 'p1', 'p4']
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            edge_file = os.path.join(tmp_dir, 'subgraph_edges.tsv')
+            with open(self.edge_file) as fh, open(edge_file, 'w') as out:
+                for i, line in enumerate(fh):
+                    fields = line.split('\t')
+                    if i == 0 or (fields[0] in nodes and fields[2] in nodes):
+                        out.write(line)
+            expected = CSFGraph(edge_file=edge_file, node_file=self.node_file)
+
+        for selection in (nodes, np.array([het_g.node_to_index_map[node] for node in nodes]),
+                          np.isin(het_g.nodes(), nodes)):
+            g = het_g.subgraph(selection)
+            self.assertEqual(expected.nodes(), g.nodes())
+            self.assertEqual(expected.offset_to_edge_.tolist(), g.offset_to_edge_.tolist())
+            self.assertEqual(expected.edge_to.tolist(), g.edge_to.tolist())
+            self.assertEqual(expected.edge_weight.tolist(), g.edge_weight.tolist())
+            self.assertEqual(expected.index_to_nodetype_map, g.index_to_nodetype_map)
+            self.assertEqual(expected.nodetype2count_dictionary, g.nodetype2count_dictionary)
+            self.assertEqual(expected.index_to_edgetype_map, g.index_to_edgetype_map)
+            self.assertEqual(expected.edgetype2count_dictionary, g.edgetype2count_dictionary)
+            self.assertFalse(g.edge_to.flags.writeable)
+        with self.assertRaises(KeyError):
+            het_g.subgraph(['g1', 'x1'])
+
+    def test_largest_component(self):
+        het_g = CSFGraph(edge_file=self.edge_file, node_file=self.node_file)
+        self.assertEqual([0] * het_g.node_count(), het_g.components().tolist())
+        self.assertEqual(het_g.edges(), het_g.largest_component().edges())
+
+        # cut the diseases off the rest of the graph
+        het_g.remove_edges([('g4', 'd2'), ('g3', 'd1'), ('g1', 'd3')])
+        het_g.compact()
+        components = het_g.components()
+        self.assertEqual(2, len(set(components.tolist())))
+        self.assertEqual(1, len({components[het_g.node_to_index_map[node]] for node in ('d1', 'd2', 'd3')}))
+        largest = het_g.largest_component()
+        self.assertEqual(['g1', 'g2', 'g3', 'g4', 'p1', 'p2', 'p3', 'p4'], largest.nodes())
+        self.assertEqual(het_g.edge_count() - 6, largest.edge_count())
+        self.assertEqual({'biolink:Gene': 4, 'biolink:Protein': 4}, largest.nodetype2count_dictionary)
+
+    def test_degrees(self):
+        het_g = CSFGraph(edge_file=self.edge_file, node_file=self.node_file)
+        degrees = het_g.degrees
+        self.assertEqual(np.int32, degrees.dtype)
+        self.assertFalse(degrees.flags.writeable)
+        for node, i in het_g.node_to_index_map.items():
+            neighbors = het_g.neighbors(node)
+            self.assertEqual(len(neighbors), degrees[i])
+            self.assertEqual(len(neighbors), het_g.node_degree(node))
+            self.assertAlmostEqual(sum(het_g.weight(node, nbr) for nbr in neighbors), het_g.weighted_degrees()[i])
+            for j, node_type in enumerate(het_g.node_types):
+                self.assertEqual(sum(het_g.index_to_nodetype_map[het_g.node_to_index_map[nbr]] == node_type
+                                     for nbr in neighbors), het_g.node_type_degrees()[i, j])
+        self.assertEqual(degrees.tolist(), het_g.edge_type_degrees().sum(axis=1).tolist())
+        self.assertEqual((het_g.node_count(), len(het_g.edge_types)), het_g.edge_type_degrees().shape)
+
+        # the degrees follow updates of the graph
+        het_g.add_edges([('g1', 'x1')])
+        het_g.compact()
+        self.assertEqual(1, het_g.node_degree('x1'))
+        self.assertEqual(degrees[het_g.node_to_index_map['g1']] + 1, het_g.node_degree('g1'))
+
+    def test_directed(self):
+        g = CSFGraph(edge_file=self.edge_file, node_file=self.node_file, directed=True)
+        self.assertTrue(g.directed)
+        self.assertEqual(21, g.edge_count())
+        self.assertEqual(self.g.edge_count(), 2 * g.edge_count())
+        self.assertTrue(g.has_edge('g1', 'g2'))
+        self.assertFalse(g.has_edge('g2', 'g1'))
+        self.assertEqual(10, g.weight('g1', 'g2'))
+        self.assertEqual(['d3', 'g2', 'g3', 'g4', 'p1'], sorted(g.neighbors('g1')))
+        self.assertEqual([], g.in_neighbors_view(g.node_to_index_map['g1']).tolist())
+
+        # the reverse edges, from the lazily built reverse graph
+        sources, destinations = g.edges_as_array()
+        for node, i in g.node_to_index_map.items():
+            in_neighbors = g.in_neighbors_view(i)
+            self.assertEqual(sorted(sources[destinations == i].tolist()), in_neighbors.tolist())
+            self.assertEqual(len(in_neighbors), g.in_degrees[i])
+            self.assertEqual(len(g.neighbors(node)), g.degrees[i])
+        self.assertFalse(g.in_neighbors_view(0).flags.writeable)
+        self.assertEqual(self.g.neighbors_view(0).tolist(), self.g.in_neighbors_view(0).tolist())
+        self.assertEqual(self.g.degrees.tolist(), self.g.in_degrees.tolist())
+
+        # the weakly connected components are those of the undirected graph
+        self.assertEqual([0] * g.node_count(), g.components().tolist())
+        self.assertTrue(g.subgraph(['g1', 'g2', 'g3']).directed)
+
+    def test_directed_duplicates_and_updates(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            edge_file = os.path.join(tmp_dir, 'directed_edges.tsv')
+            with open(self.edge_file) as fh, open(edge_file, 'w') as out:
+                out.write(fh.read())
+                out.write('g2\tbiolink:interacts_with\tg1\tRO:0002616\t5\n')
+                out.write('g1\tbiolink:interacts_with\tg2\tRO:0002616\t30\n')
+            g = CSFGraph(edge_file=edge_file, directed=True, duplicate_policy='max')
+
+            # (g2, g1) is a new edge of a directed graph, (g1, g2) a duplicate
+            self.assertEqual(1, g.duplicate_edge_count)
+            self.assertEqual(22, g.edge_count())
+            self.assertEqual(30, g.weight('g1', 'g2'))
+            self.assertEqual(5, g.weight('g2', 'g1'))
+
+            g.in_neighbors_view(0)
+            g.add_edges([('p4', 'g1')])
+            g.remove_edges([('g2', 'g1')])
+            g.compact()
+            self.assertTrue(g.has_edge('p4', 'g1'))
+            self.assertFalse(g.has_edge('g1', 'p4'))
+            self.assertTrue(g.has_edge('g1', 'g2'))
+            self.assertFalse(g.has_edge('g2', 'g1'))
+            self.assertIn(g.node_to_index_map['p4'], g.in_neighbors_view(g.node_to_index_map['g1']).tolist())
+
+            g.save(os.path.join(tmp_dir, 'graph'))
+            loaded = CSFGraph.load(os.path.join(tmp_dir, 'graph'))
+        self.assertTrue(loaded.directed)
+        self.assertEqual(g.edges(), loaded.edges())
+        self.assertEqual(g.in_degrees.tolist(), loaded.in_degrees.tolist())
+
+    def test_node_file_mismatch(self):
+        self.assertIsNone(self.g.node_file_only_count)
+        het_g = CSFGraph(edge_file=self.edge_file, node_file=self.node_file)
+        self.assertEqual(0, het_g.node_file_only_count)
+        self.assertEqual(0, het_g.missing_node_type_count)
+        missing = CSFGraph(edge_file=self.edge_file, node_file=self.node_file_missing_nodes)
+        self.assertEqual(0, missing.node_file_only_count)
+        self.assertEqual(missing.node_count() - 2, missing.missing_node_type_count)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            node_file = os.path.join(tmp_dir, 'nodes.tsv')
+            with open(self.node_file) as fh, open(node_file, 'w') as out:
+                out.write(fh.read())
+                out.write('x1\tno_edges\tbiolink:Gene\n\n')
+                out.write('g1\tgene1\tbiolink:Protein\n')
+            g = CSFGraph(edge_file=self.edge_file, node_file=node_file, chunk_size=3)
+            node_ids, node_type_labels, node_type_codes = g.read_node_columns(node_file, chunk_size=3)
+            with self.assertRaises(ValueError):
+                g.read_node_columns(node_file, cat_col='type')
+        self.assertEqual(1, g.node_file_only_count)
+        self.assertEqual(0, g.missing_node_type_count)
+        self.assertNotIn('x1', g.node_to_index_map)
+        # the last row of a node sets its type
+        self.assertEqual('biolink:Protein', g.index_to_nodetype_map[g.node_to_index_map['g1']])
+        self.assertEqual(het_g.node_count() + 2, len(node_ids))
+        self.assertEqual(['biolink:Disease', 'biolink:Gene', 'biolink:Protein'], node_type_labels)
+        self.assertEqual('biolink:Protein', node_type_labels[node_type_codes[-1]])
+        for node, i in g.node_to_index_map.items():
+            if node != 'g1':
+                self.assertEqual(het_g.index_to_nodetype_map[i], g.index_to_nodetype_map[i])
+
+    def test_reorder_nodes(self):
+        het_g = CSFGraph(edge_file=self.edge_file, node_file=self.node_file)
+        for order in CSFGraph.ORDERS + (np.arange(het_g.node_count())[::-1],):
+            g = het_g.reorder_nodes(order)
+            self.assertEqual(sorted(het_g.nodes()), sorted(g.nodes()))
+            self.assertEqual(sorted(het_g.edges()), sorted(g.edges()))
+            self.assertEqual(het_g.edge_count(), g.edge_count())
+            for node in het_g.nodes():
+                self.assertEqual(het_g.index_to_nodetype_map[het_g.node_to_index_map[node]],
+                                 g.index_to_nodetype_map[g.node_to_index_map[node]])
+                self.assertEqual(het_g.node_degree(node), g.node_degree(node))
+                for neighbor in het_g.neighbors(node):
+                    self.assertEqual(het_g.weight(node, neighbor), g.weight(node, neighbor))
+                    self.assertEqual(het_g.index_to_edgetype_map[het_g.edge_index(het_g.node_to_index_map[node],
+                                                                                  het_g.node_to_index_map[neighbor])],
+                                     g.index_to_edgetype_map[g.edge_index(g.node_to_index_map[node],
+                                                                          g.node_to_index_map[neighbor])])
+            for i in range(g.node_count()):
+                neighbors = g.neighbors_view(i)
+                self.assertTrue(np.all(neighbors[1:] > neighbors[:-1]))
+            self.assertEqual(dict(het_g.edgetype2count_dictionary), dict(g.edgetype2count_dictionary))
+            self.assertEqual(dict(het_g.nodetype2count_dictionary), dict(g.nodetype2count_dictionary))
+
+        directed = CSFGraph(edge_file=self.edge_file, directed=True)
+        for order in CSFGraph.ORDERS:
+            g = directed.reorder_nodes(order)
+            self.assertTrue(g.directed)
+            self.assertEqual(sorted(directed.edges()), sorted(g.edges()))
+
+        degrees = het_g.reorder_nodes('degree').degrees
+        self.assertTrue(np.all(degrees[1:] <= degrees[:-1]))
+        with self.assertRaises(ValueError):
+            het_g.reorder_nodes('random')
+        with self.assertRaises(ValueError):
+            het_g.reorder_nodes(np.zeros(het_g.node_count(), dtype=int))
+
+    def test_bfs_order(self):
+        # a path 0 - 3 - 1 - 4 - 2 and a separate edge 5 - 6
+        g = CSFGraph.__new__(CSFGraph)
+        g.offset_to_edge_, g.edge_to = build_symmetric_csr(np.array([0, 3, 1, 4, 5]), np.array([3, 1, 4, 2, 6]), 7)
+        order = bfs_order(g.offset_to_edge_, g.edge_to)
+        self.assertEqual([1, 3, 4, 0, 2, 5, 6], order.tolist())
+        order = bfs_order(g.offset_to_edge_, g.edge_to, reverse_cuthill_mckee=True)
+        self.assertEqual([6, 5, 2, 4, 1, 3, 0], order.tolist())
+        self.assertEqual([1, 0, 2], degree_order(np.array([2, 3, 1])).tolist())
@@ -0,0 +1,75 @@
+from unittest import TestCase
+import os.path
+from embiggen import CSFGraph
+from embiggen.csf_graph import EdgeList, load_graphs
+
+
+class TestEdgeList(TestCase):
+    def setUp(self):
+        data_dir = os.path.join(os.path.dirname(__file__), 'data', 'ppismall_with_validation')
+        self.edge_files = [os.path.join(data_dir, name + '_edges_max_comp_graph')
+                           for name in ('pos_train', 'pos_validation', 'pos_test',
+                                        'neg_train', 'neg_validation', 'neg_test')]
+        self.small_edge_file = os.path.join(os.path.dirname(__file__), 'data', 'small_graph_edges.tsv')
+
+    def test_edges_match_csf_graph(self):
+        g = CSFGraph(self.small_edge_file)
+        edge_list = EdgeList.from_file(self.small_edge_file)
+        self.assertEqual(g.edges(), edge_list.edges())
+        self.assertEqual(g.edges_as_ints(), edge_list.edges_as_ints())
+        self.assertEqual(g.nodes(), edge_list.nodes())
+        self.assertEqual(g.edge_count(), edge_list.edge_count())
+        self.assertEqual(g.node_count(), edge_list.node_count())
+
+    def test_vocabulary(self):
+        vocabulary = ['a0', 'g1', 'g2', 'zz']
+        edge_list = EdgeList.from_file(self.small_edge_file, vocabulary=vocabulary)
+        self.assertEqual(vocabulary, edge_list.node_ids[:len(vocabulary)].tolist())
+        self.assertIn((1, 2), edge_list.edges_as_ints())
+        self.assertIn((2, 1), edge_list.edges_as_ints())
+        self.assertEqual(CSFGraph(self.small_edge_file).edges(), edge_list.edges())
+
+    def test_load_graphs(self):
+        graphs = load_graphs(self.edge_files, processes=2)
+        self.assertEqual(6, len(graphs))
+        for edge_file, graph in zip(self.edge_files, graphs):
+            g = CSFGraph(edge_file)
+            self.assertIsInstance(graph, CSFGraph)
+            self.assertEqual(g.edge_to.tolist(), graph.edge_to.tolist())
+            self.assertFalse(graph.edge_to.flags.writeable)
+
+    def test_load_edge_lists(self):
+        graphs = load_graphs(self.edge_files, edge_list_only=True, processes=2)
+        pos_train_graph = graphs[0]
+        self.assertIsInstance(pos_train_graph, CSFGraph)
+        for edge_file, edge_list in zip(self.edge_files[1:], graphs[1:]):
+            self.assertIsInstance(edge_list, EdgeList)
+            g = CSFGraph(edge_file)
+            self.assertEqual(g.edges(), edge_list.edges())
+            self.assertEqual(g.nodes(), edge_list.nodes())
+            for (src, dst), (src_idx, dst_idx) in zip(edge_list.edges(), edge_list.edges_as_ints()):
+                if src in pos_train_graph.node_to_index_map:
+                    self.assertEqual(pos_train_graph.node_to_index_map[src], src_idx)
+                if dst in pos_train_graph.node_to_index_map:
+                    self.assertEqual(pos_train_graph.node_to_index_map[dst], dst_idx)
+
+        # a graph loaded before, e.g. from a cache, is used instead of reading the first edge file
+        cached = load_graphs(self.edge_files, edge_list_only=True, processes=2, first_graph=pos_train_graph)
+        self.assertIs(pos_train_graph, cached[0])
+        self.assertEqual([edge_list.edges() for edge_list in graphs[1:]],
+                         [edge_list.edges() for edge_list in cached[1:]])
+
+    def test_edges_as_array(self):
+        g = CSFGraph(self.small_edge_file)
+        edge_list = EdgeList.from_file(self.small_edge_file, vocabulary=g.node_vocabulary)
+        self.assertEqual(g.edges_as_array().tolist(), edge_list.edges_as_array().tolist())
+        self.assertEqual(g.edges_as_id_array().tolist(), edge_list.edges_as_id_array().tolist())
+
+    def test_directed(self):
+        g = CSFGraph(self.small_edge_file, directed=True)
+        edge_list = EdgeList.from_file(self.small_edge_file, directed=True)
+        self.assertEqual(g.edges(), edge_list.edges())
+        self.assertEqual(g.edge_count(), edge_list.edge_count())
+        graphs = load_graphs([self.small_edge_file] * 2, edge_list_only=True, processes=2, directed=True)
+        self.assertTrue(graphs[0].directed)
+        self.assertEqual(g.edges(), graphs[1].edges())
@@ -0,0 +1,102 @@
+from unittest import TestCase
+import os.path
+import tempfile
+import numpy as np  # type: ignore
+from embiggen import CSFGraph
+from embiggen.csf_graph import EdgeList
+from embiggen.csf_graph.components import random_spanning_forest, union_find
+from embiggen.csf_graph.edge_splitter import EdgeSplit, split_edges
+
+
+class TestEdgeSplitter(TestCase):
+    def setUp(self):
+        data_dir = os.path.join(os.path.dirname(__file__), 'data')
+        self.edge_file = os.path.join(data_dir, 'ppismall_with_validation', 'pos_train_edges_max_comp_graph')
+        self.small_edge_file = os.path.join(data_dir, 'small_graph_edges.tsv')
+        self.small_node_file = os.path.join(data_dir, 'small_graph_nodes.tsv')
+        self.graph = CSFGraph(self.edge_file)
+
+    def test_split(self):
+        split = split_edges(self.graph, validation_fraction=0.1, test_fraction=0.2, random_state=1)
+        graph_edges = set(self.graph.edges())
+        train_edges = set(split.pos_train_graph.edges())
+        validation_edges = set(split.pos_validation_graph.edges())
+        test_edges = set(split.pos_test_graph.edges())
+        edge_count = self.graph.edge_count() // 2
+
+        self.assertEqual(round(0.1 * edge_count) * 2, len(validation_edges))
+        self.assertEqual(round(0.2 * edge_count) * 2, len(test_edges))
+        self.assertEqual(graph_edges, train_edges | validation_edges | test_edges)
+        self.assertFalse(train_edges & validation_edges or train_edges & test_edges or validation_edges & test_edges)
+        self.assertEqual(self.graph.nodes(), split.pos_train_graph.nodes())
+        self.assertEqual(1, len(set(split.pos_train_graph.components().tolist())))
+        for source, destination in list(train_edges)[:20]:
+            self.assertEqual(self.graph.weight(source, destination), split.pos_train_graph.weight(source, destination))
+
+        negative_sets = [set(edge_list.edges()) for edge_list in
+                         (split.neg_train_graph, split.neg_validation_graph, split.neg_test_graph)]
+        self.assertEqual([len(train_edges), len(validation_edges), len(test_edges)], [len(s) for s in negative_sets])
+        for negative_edges in negative_sets:
+            self.assertFalse(negative_edges & graph_edges)
+            self.assertFalse(any(source == destination for source, destination in negative_edges))
+        self.assertFalse(negative_sets[0] & negative_sets[1] or negative_sets[0] & negative_sets[2] or
+                         negative_sets[1] & negative_sets[2])
+
+    def test_random_state(self):
+        first = split_edges(self.graph, random_state=3)
+        second = split_edges(self.graph, random_state=3)
+        for a, b in zip(first.graphs(), second.graphs()):
+            self.assertEqual(a.edges(), b.edges())
+        other = split_edges(self.graph, random_state=4)
+        self.assertNotEqual(first.pos_test_graph.edges(), other.pos_test_graph.edges())
+
+    def test_keep_connected(self):
+        # a tree has no edge that can be held out without disconnecting it
+        graph = CSFGraph(self.small_edge_file)
+        graph.remove_edges([('g2', 'g3'), ('p1', 'p3'), ('g2', 'p1'), ('g2', 'p2'), ('g3', 'p3'), ('g3', 'd1'),
+                            ('g1', 'd3'), ('d1', 'd3'), ('g1', 'g4'), ('p3', 'p4'), ('p2', 'p4')])
+        graph.compact()
+        self.assertEqual(graph.node_count() - 1, graph.edge_count() // 2)
+        with self.assertRaises(ValueError):
+            split_edges(graph, validation_fraction=0.1, test_fraction=0.1)
+        split = split_edges(graph, validation_fraction=0.1, test_fraction=0.1, keep_connected=False, random_state=0)
+        self.assertGreater(len(set(split.pos_train_graph.components().tolist())), 1)
+
+    def test_random_spanning_forest(self):
+        sources, destinations = self.graph.edges_as_array()
+        forward = sources < destinations
+        for seed in range(3):
+            forest = random_spanning_forest(self.graph.node_count(), sources[forward], destinations[forward], seed)
+            self.assertEqual(self.graph.node_count() - 1, np.count_nonzero(forest))
+            roots = union_find(self.graph.node_count(), sources[forward][forest], destinations[forward][forest])
+            self.assertEqual([0] * self.graph.node_count(), roots.tolist())
+
+    def test_save(self):
+        graph = CSFGraph(self.small_edge_file, node_file=self.small_node_file)
+        split = split_edges(graph, validation_fraction=0.2, test_fraction=0.2, random_state=0)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = split.save(os.path.join(tmp_dir, 'split'))
+            self.assertEqual(list(EdgeSplit.FILE_NAMES), [os.path.basename(path) for path in paths])
+            train = CSFGraph(paths[0], node_file=self.small_node_file)
+            others = [EdgeList.from_file(path, vocabulary=train.node_vocabulary) for path in paths[1:]]
+        self.assertEqual(split.pos_train_graph.edges(), train.edges())
+        self.assertEqual(split.pos_train_graph.edge_weight.tolist(), train.edge_weight.tolist())
+        self.assertEqual(split.pos_train_graph.index_to_edgetype_map, train.index_to_edgetype_map)
+        for edge_list, other in zip(split.graphs()[1:], others):
+            self.assertEqual(edge_list.edges(), other.edges())
+
+    def test_directed(self):
+        graph = CSFGraph(self.small_edge_file, directed=True)
+        split = split_edges(graph, validation_fraction=0.2, test_fraction=0.2, random_state=0)
+        graph_edges = set(graph.edges())
+        train_edges = set(split.pos_train_graph.edges())
+        validation_edges = set(split.pos_validation_graph.edges())
+        test_edges = set(split.pos_test_graph.edges())
+
+        self.assertTrue(split.pos_train_graph.directed)
+        self.assertEqual(round(0.2 * graph.edge_count()), len(validation_edges))
+        self.assertEqual(graph_edges, train_edges | validation_edges | test_edges)
+        self.assertFalse(train_edges & validation_edges or train_edges & test_edges or validation_edges & test_edges)
+        self.assertEqual(1, len(set(split.pos_train_graph.components().tolist())))
+        for edge_list in (split.neg_train_graph, split.neg_validation_graph, split.neg_test_graph):
+            self.assertFalse(set(edge_list.edges()) & graph_edges)
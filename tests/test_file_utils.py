@@ -0,0 +1,54 @@
+from unittest import TestCase
+import bz2
+import gzip
+import lzma
+import os.path
+import tempfile
+from embiggen.utils.file_utils import detect_compression, open_text
+
+
+class TestFileUtils(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.text = ''.join('line {}\tžluťoučký kůň\n'.format(i) for i in range(20000))
+        self.plain_file = os.path.join(self.tmp_dir.name, 'plain.txt')
+        with open(self.plain_file, 'w', encoding='utf-8') as fh:
+            fh.write(self.text)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def compressed_file(self, module, name: str) -> str:
+        path = os.path.join(self.tmp_dir.name, name)
+        with module.open(path, 'wt', encoding='utf-8') as fh:
+            fh.write(self.text)
+        return path
+
+    def test_plain_file(self):
+        self.assertIsNone(detect_compression(self.plain_file))
+        with open_text(self.plain_file) as fh:
+            self.assertEqual(self.text, fh.read())
+
+    def test_compressed_files(self):
+        for module, compression in ((gzip, 'gzip'), (bz2, 'bz2'), (lzma, 'xz')):
+            # the compression is detected from the contents, not the extension
+            path = self.compressed_file(module, 'edges.' + compression)
+            self.assertEqual(compression, detect_compression(path))
+            with open_text(path) as fh:
+                self.assertEqual('line 0\tžluťoučký kůň\n', fh.readline())
+                self.assertEqual(self.text.splitlines(True)[1:], list(fh))
+
+    def test_close_before_end(self):
+        path = self.compressed_file(gzip, 'edges.gz')
+        fh = open_text(path)
+        fh.readline()
+        fh.close()
+        self.assertTrue(fh.closed)
+
+    def test_corrupt_file(self):
+        path = os.path.join(self.tmp_dir.name, 'corrupt.gz')
+        with open(path, 'wb') as fh:
+            fh.write(gzip.compress(self.text.encode('utf-8'))[:1000])
+        with self.assertRaises(EOFError):
+            with open_text(path) as fh:
+                fh.read()
@@ -1,9 +1,16 @@
 from unittest import TestCase
 
 import os.path
+import sys
+import tempfile
+from unittest import mock
+import numpy as np  # type: ignore
+import tensorflow as tf  # type: ignore
 from embiggen import CSFGraph
+from embiggen.alias_tables import build_alias_tables
 from embiggen.random_walk_generator import N2vGraph
 from embiggen.utils import serialize, deserialize
+from tests.utils.utils import calculate_total_probs
 
 
 class TestGraphCache(TestCase):
@@ -32,6 +39,84 @@ class TestGraphCache(TestCase):
         g.simulate_walks(num_walks, walk_length)
         assert len(g.random_walks_map) > 0
 
+    def test_unweighted_walks(self):
+        """
+        Test that walks on an unweighted graph with p = q = 1 are drawn without alias tables.
+        """
+        data_dir = os.path.join(os.path.dirname(__file__), 'data')
+        graph = CSFGraph(edge_file=os.path.join(data_dir, 'small_graph_edges.tsv'), weight_dtype='unweighted')
+        g = N2vGraph(graph, 1, 1)
+        self.assertTrue(g.uniform_edges)
+        self.assertEqual({}, g.retrieve_alias_nodes())
+        self.assertEqual({}, g.retrieve_alias_edges())
+        start = graph.node_to_index_map['p4']
+        walk = g.node2vec_walk(10, start)
+        self.assertEqual(10, len(walk))
+        for src, dst in zip(walk, walk[1:]):
+            self.assertTrue(graph.has_edge(graph.index_to_node_map[src], graph.index_to_node_map[dst]))
+        g = N2vGraph(graph, 1, 2)
+        self.assertFalse(g.uniform_edges)
+        self.assertEqual(graph.edge_count(), len(g.retrieve_alias_edges()))
+
+    def test_directed_walks(self):
+        """
+        Test that walks on a directed graph follow the edges in their given direction, and that the in-out parameter
+        is applied to the neighbors without an edge to the previous node.
+        """
+        data_dir = os.path.join(os.path.dirname(__file__), 'data')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # g3 -> g1 links the neighbor g3 of g2 back to g1 on the edge g1 -> g2, but g1 -> g3 does not
+            edge_file = os.path.join(tmp_dir, 'directed_edges.tsv')
+            with open(os.path.join(data_dir, 'small_graph_edges.tsv')) as fh, open(edge_file, 'w') as out:
+                out.write(fh.read())
+                out.write('g3\tbiolink:interacts_with\tg1\tRO:0002616\t10\n')
+            graph = CSFGraph(edge_file=edge_file, directed=True)
+        g = N2vGraph(graph, 2, 4)
+        self.assertEqual(graph.edge_count(), len(g.retrieve_alias_edges()))
+        for _ in range(10):
+            walk = g.node2vec_walk(10, graph.node_to_index_map['g1'])
+            for src, dst in zip(walk, walk[1:]):
+                self.assertTrue(graph.has_edge(graph.index_to_node_map[src], graph.index_to_node_map[dst]))
+
+        for src, dst in graph.edges_as_ints():
+            probs = calculate_total_probs(*g.retrieve_alias_edges()[(src, dst)])
+            src_id, dst_id = graph.index_to_node_map[src], graph.index_to_node_map[dst]
+            weights = []
+            for nbr_id in graph.neighbors(dst_id):
+                factor = 2 if nbr_id == src_id else 1 if graph.has_edge(nbr_id, src_id) else 4
+                weights.append(graph.weight(dst_id, nbr_id) / factor)
+            self.assertTrue(np.allclose(np.array(weights) / sum(weights), probs))
+
+    def test_alias_tables(self):
+        """
+        Test that the alias tables are packed by node and by edge position, and that saved tables are memory-mapped
+        by a new N2vGraph instead of being computed again.
+        """
+        g = N2vGraph(self.graph, 2, 0.5)
+        offsets = self.graph.offset_to_edge_
+        self.assertEqual(offsets.tolist(), g.alias_nodes.offsets.tolist())
+        self.assertEqual(self.graph.degrees[self.graph.edge_to].sum(), len(g.alias_edges.j))
+        for src, dst in self.graph.edges_as_ints()[:10]:
+            j, q = g.retrieve_alias_edges()[(src, dst)]
+            self.assertEqual(self.graph.node_degree(self.graph.index_to_node_map[dst]), len(j))
+            self.assertTrue(np.all(j < len(j)))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            g.save_alias_tables(tmp_dir)
+            loaded = N2vGraph(self.graph, 2, 0.5, alias_tables=tmp_dir)
+            self.assertIsInstance(loaded.alias_edges.q, np.memmap)
+            for tables, loaded_tables in ((g.alias_nodes, loaded.alias_nodes), (g.alias_edges, loaded.alias_edges)):
+                self.assertEqual(tables.offsets.tolist(), loaded_tables.offsets.tolist())
+                self.assertEqual(tables.j.tolist(), loaded_tables.j.tolist())
+                self.assertEqual(tables.q.tolist(), loaded_tables.q.tolist())
+            walk = loaded.node2vec_walk(10, 0)
+            for src, dst in zip(walk, walk[1:]):
+                self.assertTrue(self.graph.has_edge(self.graph.index_to_node_map[src],
+                                                    self.graph.index_to_node_map[dst]))
+            with self.assertRaises(ValueError):
+                N2vGraph(self.graph, 1, 0.5, alias_tables=tmp_dir)
+            del loaded
+
     def test_caching_restore(self):
         """
         Test caching of random walks in N2vGraph by,
@@ -74,3 +159,109 @@ class TestGraphCache(TestCase):
         g = deserialize('N2vGraph.pkl')
         k = (10, 1)
         assert k in g.random_walks_map.keys()
+
+    def test_build_alias_tables(self):
+        """
+        Test that the tables built at once by build_alias_tables draw each entry with its normalized probability,
+        including entries with probability zero, entries of exactly the mean and tables whose probabilities are all
+        zero, which become uniform.
+        """
+        rng = np.random.RandomState(0)
+        sizes = [1, 4, 6, 2, 3, 0, 5] + rng.randint(0, 20, size=50).tolist()
+        offsets = np.concatenate([[0], np.cumsum(sizes)])
+        probs = np.concatenate([[3.], [1, 2, 0, 1], [1, 2, 2, 1, 0, 0], [0, 0], [1, 1, 1], [], [0.5, 1, 3, 0, 0.5],
+                                rng.exponential(size=offsets[-1] - 21) ** 3])
+        tables = build_alias_tables(offsets, probs)
+        self.assertEqual(offsets.tolist(), tables.offsets.tolist())
+        for i, size in enumerate(sizes):
+            if size == 0:
+                continue
+            expected = probs[offsets[i]:offsets[i + 1]]
+            expected = expected / expected.sum() if expected.sum() > 0 else np.full(size, 1 / size)
+            self.assertTrue(np.allclose(expected, calculate_total_probs(*tables.table(i)), atol=1e-6))
+
+        # the tables of N2vGraph built in batches match the tables built one at a time
+        g = N2vGraph(self.graph, 2, 0.5)
+        for position, (src, dst) in enumerate(self.graph.edges_as_ints()):
+            edge, (j, q) = g.get_alias_edge((src, dst))
+            self.assertEqual(j.tolist(), g.alias_edges.table(position)[0].tolist())
+            self.assertEqual(q.tolist(), g.alias_edges.table(position)[1].tolist())
+
+    def test_lazy_walks(self):
+        """
+        Test that a lazy N2vGraph makes no alias edges, and that its steps drawn by rejection sampling follow the
+        distribution of the alias edges of an N2vGraph that makes them.
+        """
+        np.random.seed(0)
+        lazy = N2vGraph(self.graph, 2, 0.5, lazy=True)
+        self.assertIsNone(lazy.alias_edges)
+        self.assertEqual(self.graph.node_count(), len(lazy.retrieve_alias_nodes()))
+        walk = lazy.node2vec_walk(20, 0)
+        for src, dst in zip(walk, walk[1:]):
+            self.assertTrue(self.graph.has_edge(self.graph.index_to_node_map[src], self.graph.index_to_node_map[dst]))
+
+        g = N2vGraph(self.graph, 2, 0.5)
+        degrees = self.graph.degrees
+        edges = [(src, dst) for src, dst in self.graph.edges_as_ints() if degrees[dst] >= 3]
+        for src, dst in edges[:5]:
+            draws = lazy._draw_by_rejection(np.full(5000, src), np.full(5000, dst))
+            frequencies = np.bincount(draws, minlength=degrees[dst]) / len(draws)
+            probs = calculate_total_probs(*g.retrieve_alias_edges()[(src, dst)])
+            self.assertTrue(np.allclose(probs, frequencies, atol=0.03))
+
+    def test_walk_batch(self):
+        """
+        Test that walk_batch writes walks along edges into an int32 matrix, stops walks at nodes without neighbors,
+        and that simulate_walks returns their rows as a RaggedTensor.
+        """
+        np.random.seed(0)
+        g = N2vGraph(self.graph, 2, 0.5)
+        start_nodes = np.repeat(np.arange(self.graph.node_count()), 3)
+        walks, lengths = g.walk_batch(start_nodes, 8)
+        self.assertEqual((len(start_nodes), 8), walks.shape)
+        self.assertEqual(np.int32, walks.dtype)
+        self.assertEqual(start_nodes.tolist(), walks[:, 0].tolist())
+        self.assertTrue(np.all(lengths == 8))
+        self.assertTrue(np.all(self.graph.has_edges(walks[:, :-1].ravel(), walks[:, 1:].ravel())))
+
+        # the alias tables draw their entries with the probabilities of the tables
+        draws = g.alias_nodes.draw_batch(np.zeros(20000, dtype=np.int64))
+        frequencies = np.bincount(draws, minlength=self.graph.degrees[0]) / len(draws)
+        self.assertTrue(np.allclose(calculate_total_probs(*g.alias_nodes.table(0)), frequencies, atol=0.02))
+
+        walks_tensor = g.simulate_walks(2, 5)
+        self.assertEqual(2 * self.graph.node_count(), walks_tensor.nrows())
+        self.assertEqual(tf.int32, walks_tensor.dtype)
+
+        # in a directed graph, walks stop at nodes without out-edges
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            edge_file = os.path.join(tmp_dir, 'directed_edges.tsv')
+            with open(edge_file, 'w') as fh:
+                fh.write('subject\tedge_label\tobject\trelation\tweight\n')
+                fh.write('a\tbiolink:interacts_with\tb\tRO:0002616\t1\n')
+                fh.write('b\tbiolink:interacts_with\tc\tRO:0002616\t1\n')
+            graph = CSFGraph(edge_file=edge_file, directed=True)
+        walks, lengths = N2vGraph(graph, 1, 1).walk_batch(np.arange(3), 5)
+        self.assertEqual([3, 2, 1], lengths.tolist())
+        self.assertEqual([0, 1, 2, 0, 0], walks[0].tolist())
+        self.assertEqual([2], N2vGraph(graph, 1, 1).node2vec_walk(5, 2))
+
+    def test_walk_in_pool(self):
+        """
+        Test that walks simulated by worker processes on shared arrays follow edges and only depend on the seed.
+        """
+        for lazy in (False, True):
+            g = N2vGraph(self.graph, 2, 0.5, num_processes=2, lazy=lazy)
+            g.MIN_WALKS_PER_PROCESS = 1
+            np.random.seed(0)
+            walks1 = g.simulate_walks(3, 6).to_tensor().numpy()
+            np.random.seed(0)
+            walks2 = g.simulate_walks(3, 6).to_tensor().numpy()
+            self.assertEqual((3 * self.graph.node_count(), 6), walks1.shape)
+            self.assertEqual(walks1.tolist(), walks2.tolist())
+            self.assertTrue(np.all(self.graph.has_edges(walks1[:, :-1].ravel(), walks1[:, 1:].ravel())))
+
+            # without multiprocessing.shared_memory, as before Python 3.8, the arrays are shared through files
+            with mock.patch.dict(sys.modules, {'multiprocessing.shared_memory': None}):
+                np.random.seed(0)
+                self.assertEqual(walks1.tolist(), g.simulate_walks(3, 6).to_tensor().numpy().tolist())
@@ -0,0 +1,64 @@
+from unittest import TestCase
+import json
+import os.path
+import tempfile
+import numpy as np  # type: ignore
+from embiggen import CSFGraph, N2vGraph
+from embiggen.csf_graph import graph_report, write_graph_report
+from embiggen.csf_graph.components import connected_components
+
+
+class TestGraphReport(TestCase):
+    def setUp(self):
+        data_dir = os.path.join(os.path.dirname(__file__), 'data')
+        self.edge_file = os.path.join(data_dir, 'small_graph_edges.tsv')
+        self.node_file = os.path.join(data_dir, 'small_graph_nodes.tsv')
+        self.graph = CSFGraph(self.edge_file, node_file=self.node_file)
+
+    def test_counts(self):
+        report = graph_report(self.graph, sample_size=5)
+        self.assertEqual(self.graph.node_count(), report['nodes'])
+        self.assertEqual(self.graph.edge_count(), report['edges'])
+        self.assertEqual(self.graph.edge_count() // 2, report['undirected_edges'])
+        self.assertEqual(0, report['self_loops'])
+        self.assertEqual(0, report['isolated_nodes'])
+        self.assertEqual(self.graph.duplicate_edge_count, report['duplicate_edges'])
+        self.assertEqual(self.graph.degrees.max(), report['degree']['max'])
+        self.assertEqual(self.graph.node_count(), sum(report['degree']['histogram'].values()))
+        self.assertEqual({'count': 1, 'largest': self.graph.node_count()},
+                         {key: report['components'][key] for key in ('count', 'largest')})
+        self.assertEqual(report['undirected_edges'], sum(report['edge_types'].values()))
+        self.assertEqual(report['undirected_edges'], sum(report['node_type_mixing'].values()))
+
+    def test_alias_tables(self):
+        alias_tables = graph_report(self.graph, p=2, q=0.5, sample_size=5)['alias_tables']
+        self.assertEqual(self.graph.node_count(), alias_tables['alias_nodes']['tables'])
+        self.assertEqual(self.graph.edge_count(), alias_tables['alias_nodes']['entries'])
+        self.assertEqual(self.graph.edge_count(), alias_tables['alias_edges']['tables'])
+        self.assertEqual(int((self.graph.degrees.astype(np.int64) ** 2).sum()), alias_tables['alias_edges']['entries'])
+        self.assertGreater(alias_tables['total_bytes'], 0)
+        walker = N2vGraph(self.graph, 2, 0.5, num_processes=2)
+        self.assertEqual(walker.alias_nodes.nbytes(), alias_tables['alias_nodes']['bytes'])
+        self.assertEqual(walker.alias_edges.nbytes(), alias_tables['alias_edges']['bytes'])
+
+        unweighted = CSFGraph(self.edge_file, weight_dtype='unweighted')
+        alias_tables = graph_report(unweighted, sample_size=5)['alias_tables']
+        self.assertEqual(0, alias_tables['total_bytes'])
+        self.assertEqual(0, alias_tables['alias_edges']['tables'])
+
+    def test_connected_components(self):
+        # two triangles, a single edge and an isolated node
+        edges = [(0, 1), (1, 2), (2, 0), (3, 5), (5, 4), (4, 3), (6, 7)]
+        sources = np.array([s for s, d in edges] + [d for s, d in edges])
+        destinations = np.array([d for s, d in edges] + [s for s, d in edges])
+        order = np.lexsort((destinations, sources))
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(sources, minlength=9))])
+        components = connected_components(offsets, destinations[order])
+        self.assertEqual([0, 0, 0, 1, 1, 1, 2, 2, 3], components.tolist())
+
+    def test_write_json(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'report.json')
+            report = write_graph_report(self.graph, path, sample_size=5)
+            with open(path) as fh:
+                self.assertEqual(json.loads(json.dumps(report)), json.load(fh))
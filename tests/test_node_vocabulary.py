@@ -0,0 +1,60 @@
+from unittest import TestCase
+import numpy as np  # type: ignore
+from embiggen.csf_graph.node_vocabulary import IndexToNodeMap, NodeVocabulary
+
+
+class TestNodeVocabulary(TestCase):
+    def setUp(self):
+        self.vocabulary = NodeVocabulary(['d1', 'g1', 'g2', 'p1'])
+
+    def test_lookup(self):
+        self.assertEqual(4, len(self.vocabulary))
+        self.assertEqual(2, self.vocabulary['g2'])
+        self.assertIn('p1', self.vocabulary)
+        self.assertNotIn('x1', self.vocabulary)
+        self.assertNotIn(1, self.vocabulary)
+        with self.assertRaises(KeyError):
+            self.vocabulary['x1']
+        # looking up a missing node does not add it
+        self.assertEqual(4, len(self.vocabulary))
+        self.assertEqual(['d1', 'g1', 'g2', 'p1'], list(self.vocabulary))
+
+    def test_encode_and_decode(self):
+        indices = self.vocabulary.encode(np.array(['p1', 'd1', 'g2']))
+        self.assertEqual([3, 0, 2], indices.tolist())
+        self.assertEqual(['p1', 'd1', 'g2'], self.vocabulary.decode(indices).tolist())
+        self.assertEqual([1, -1, 0], self.vocabulary.encode(['g1', 'zz', 'd1'], missing=-1).tolist())
+        with self.assertRaises(KeyError):
+            self.vocabulary.encode(['g1', 'zz'])
+        self.assertEqual([-1], NodeVocabulary().encode(['g1'], missing=-1).tolist())
+
+    def test_extend(self):
+        self.vocabulary.extend(['a1', 'x1'])
+        self.assertEqual(4, self.vocabulary['a1'])
+        self.assertEqual(5, self.vocabulary['x1'])
+        self.assertEqual(0, self.vocabulary['d1'])
+        self.assertEqual([4, 3, 5], self.vocabulary.encode(['a1', 'p1', 'x1']).tolist())
+        self.vocabulary.extend(['g3', 'b1', 'g15'])
+        self.assertEqual(['d1', 'g1', 'g2', 'p1', 'a1', 'x1', 'g3', 'b1', 'g15'], list(self.vocabulary))
+        self.assertEqual(list(range(9)), self.vocabulary.encode(list(self.vocabulary)).tolist())
+        self.assertEqual(np.argsort(self.vocabulary.ids, kind='stable').tolist(), self.vocabulary._order.tolist())
+
+    def test_extend_sorted(self):
+        self.vocabulary.extend(['q1', 'r1'])
+        self.assertIsNone(self.vocabulary._order)
+        self.assertEqual(5, self.vocabulary['r1'])
+
+    def test_ids_are_utf8_bytes(self):
+        vocabulary = NodeVocabulary(['g1', 'gén1'])
+        self.assertEqual('S', vocabulary.ids.dtype.kind)
+        self.assertEqual([b'g1', 'gén1'.encode('utf-8')], vocabulary.ids.tolist())
+        self.assertEqual(1, vocabulary['gén1'])
+        self.assertEqual(['gén1'], vocabulary.decode([1]).tolist())
+        self.assertEqual('gén1', IndexToNodeMap(vocabulary)[1])
+
+    def test_index_to_node_map(self):
+        index_to_node_map = IndexToNodeMap(self.vocabulary)
+        self.assertEqual('g1', index_to_node_map[1])
+        self.assertEqual({0: 'd1', 1: 'g1', 2: 'g2', 3: 'p1'}, dict(index_to_node_map))
+        with self.assertRaises(KeyError):
+            index_to_node_map[4]